@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark export_png.py pada model sintetis berbagai ukuran
+
+Untuk setiap ukuran, model dibuat dengan gen_model.py (di-cache di
+.cache/bench/), lalu diukur di proses terpisah supaya peak RSS per ukuran
+tidak saling tercampur. Stage yang diukur: elements (load elemen/relasi),
+discover, parse diagram, collect (layout), draw dan encode.
+
+Baseline referensi ada di bench/baseline.json (di-commit, jadi checkout
+CI yang baru pun bisa --compare). Perbarui setelah perubahan performa yang
+memang disengaja, atau kalau mesin CI berganti, lalu commit file-nya:
+  python scripts/bench_export.py --sizes 1k,10k --save
+
+Pemakaian:
+  python scripts/bench_export.py --sizes 1k,10k,100k --output /tmp/bench.json
+  python scripts/bench_export.py --sizes 1k,10k --compare      # exit 1 kalau regresi
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import gen_model
+
+BENCH_DIR = os.path.join(".cache", "bench")
+DEFAULT_BASELINE = os.path.join("bench", "baseline.json")
+BENCH_VERSION = 1
+STAGES = ["elements", "discover", "parse", "collect", "draw", "encode"]
+# Selisih di bawah ini dianggap noise, bukan regresi
+MIN_DELTA_S = 0.05
+
+
+def peak_rss_mb():
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: byte
+    return round(rss / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def ensure_model(elements, seed, **gen_opts):
+    """Model sintetis untuk ukuran ini; dibuat ulang hanya kalau parameter beda"""
+    out = os.path.join(BENCH_DIR, f"model-{elements}-s{seed}")
+    stamp = gen_model.read_stamp(out)
+    wanted = dict(elements=elements, seed=seed, **gen_opts)
+    if stamp is None or any(stamp.get(k) != v for k, v in wanted.items()):
+        print(f"  … generate model {elements} elemen → {out}", flush=True)
+        gen_model.generate_model(out, **wanted)
+    return out
+
+
+def run_one(model_folder, render_limit):
+    """Ukur semua stage pada satu model (dipanggil di proses anak) → dict hasil"""
+    import export_png as ex
+
+    stats = {}
+    with ex.stage(stats, "elements"):
+        with ex.contextlib.redirect_stdout(io.StringIO()):
+            elements_map = ex.load_model_elements(model_folder)
+    with ex.stage(stats, "discover"):
+        paths = ex.discover_diagrams(model_folder)
+
+    fonts = ex.load_fonts()
+    nodes = connections = rendered = 0
+    # Diagram diproses satu per satu (streaming), sama seperti export_png.main
+    parse_stats = {}
+    for i, (path, diagram) in enumerate(ex.iter_diagrams(paths, parse_stats, elements_map)):
+        if i < render_limit:
+            info = {}
+            with ex.contextlib.redirect_stdout(io.StringIO()):
+                ex.draw_diagram(diagram, elements_map, io.BytesIO(), *fonts, stats=info)
+            for name, t in info.get("stages", {}).items():
+                acc = stats["stages"].setdefault(name, {"wall": 0.0, "cpu": 0.0})
+                acc["wall"] += t["wall"]
+                acc["cpu"] += t["cpu"]
+            nodes += info.get("nodes", 0)
+            connections += info.get("connections", 0)
+            rendered += 1
+        else:
+            with ex.stage(stats, "collect"):
+                ex.layout_diagram(diagram, elements_map)
+        del diagram
+    stats["stages"]["parse"] = {
+        "wall": sum(t["parse"]["wall"] for t in parse_stats.values()),
+        "cpu": sum(t["parse"]["cpu"] for t in parse_stats.values())}
+
+    return {
+        "elements": len(elements_map),
+        "diagrams": len(paths),
+        "rendered": rendered,
+        "nodes_drawn": nodes,
+        "connections_drawn": connections,
+        "stages": {k: round(v["wall"], 4) for k, v in stats["stages"].items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def throughput(result):
+    stages = result["stages"]
+    render_s = stages.get("draw", 0) + stages.get("encode", 0)
+    return {
+        "elements_per_s": round(result["elements"] / max(stages["elements"], 1e-9)),
+        "diagrams_parsed_per_s": round(result["diagrams"] / max(stages["parse"], 1e-9), 1),
+        "diagrams_rendered_per_s": round(result["rendered"] / max(render_s, 1e-9), 2),
+        "nodes_drawn_per_s": round(result["nodes_drawn"] / max(stages.get("draw", 0), 1e-9)),
+    }
+
+
+def measure(model_folder, render_limit, repeat=3):
+    """Jalankan run_one `repeat` kali, masing-masing di proses baru
+
+    Waktu per stage diambil minimum antar run (paling sedikit noise),
+    peak RSS diambil maksimum.
+    """
+    runs = []
+    for _ in range(max(1, repeat)):
+        cmd = [sys.executable, os.path.abspath(__file__), "--run-one", model_folder,
+               "--render-limit", str(render_limit)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else
+                               f"exit {proc.returncode}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    result = dict(runs[0])
+    result["stages"] = {name: min(r["stages"][name] for r in runs) for name in runs[0]["stages"]}
+    result["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    result["runs"] = len(runs)
+    result["throughput"] = throughput(result)
+    return result
+
+
+def compare(baseline, current, threshold):
+    """Bandingkan hasil dengan baseline → list regresi (string)"""
+    problems = []
+    for size, cur in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if base is None:
+            continue
+        for name in STAGES:
+            old, new = base["stages"].get(name), cur["stages"].get(name)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > MIN_DELTA_S:
+                problems.append(f"{size} {name}: {old:.3f}s → {new:.3f}s "
+                                f"(+{(new / old - 1) * 100:.0f}%)")
+        old_rss, new_rss = base.get("peak_rss_mb"), cur.get("peak_rss_mb")
+        if old_rss and new_rss and new_rss > old_rss * (1 + threshold):
+            problems.append(f"{size} memori: {old_rss} MB → {new_rss} MB "
+                            f"(+{(new_rss / old_rss - 1) * 100:.0f}%)")
+    return problems
+
+
+def print_table(results):
+    head = f"{'ukuran':>8} " + " ".join(f"{s:>9}" for s in STAGES) + f" {'RSS MB':>8}"
+    print(head)
+    print("-" * len(head))
+    for size, r in results.items():
+        print(f"{size:>8} " + " ".join(f"{r['stages'].get(s, 0):>9.3f}" for s in STAGES)
+              + f" {r['peak_rss_mb']:>8}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark export diagram pada model sintetis")
+    ap.add_argument("--sizes", default="1k,10k,100k",
+                    help="Jumlah elemen, dipisah koma (default: 1k,10k,100k)")
+    ap.add_argument("--render-limit", type=int, default=20, metavar="N",
+                    help="Jumlah diagram yang di-draw/encode per ukuran (default: 20)")
+    ap.add_argument("--repeat", type=int, default=3, metavar="N",
+                    help="Ulangi pengukuran N kali, ambil waktu minimum (default: 3)")
+    ap.add_argument("--nodes-per-diagram", type=int, default=200)
+    ap.add_argument("--depth", type=int, default=1)
+    ap.add_argument("--density", type=float, default=1.5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--output", "-o", default=None, metavar="PATH",
+                    help="Tulis hasil ke JSON")
+    ap.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                    help=f"Simpan hasil sebagai baseline (default: {DEFAULT_BASELINE})")
+    ap.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None,
+                    metavar="PATH", help="Bandingkan dengan baseline, exit 1 kalau regresi")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="Batas regresi relatif (default: 0.25 = +25%%)")
+    ap.add_argument("--run-one", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.render_limit)))
+        return
+
+    sizes = [gen_model.parse_count(s) for s in args.sizes.split(",") if s.strip()]
+    results = {}
+    for n in sizes:
+        label = f"{n // 1000}k" if n % 1000 == 0 else str(n)
+        print(f"⏱️  {label} elemen", flush=True)
+        model = ensure_model(n, args.seed, nodes_per_diagram=args.nodes_per_diagram,
+                             depth=args.depth, density=args.density)
+        start = time.perf_counter()
+        results[label] = measure(model, args.render_limit, args.repeat)
+        print(f"  selesai dalam {time.perf_counter() - start:.1f}s", flush=True)
+
+    report = {"version": BENCH_VERSION, "python": platform.python_version(),
+              "platform": platform.platform(), "render_limit": args.render_limit,
+              "repeat": args.repeat,
+              "results": results}
+    print()
+    print_table(results)
+
+    for path in (args.output, args.save):
+        if path:
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\n💾 Hasil disimpan: {path}")
+
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Baseline tidak bisa dibaca: {e}")
+            sys.exit(1)
+        if baseline.get("platform") != report["platform"]:
+            print(f"  [warn] baseline diukur di {baseline.get('platform')} — "
+                  f"waktu mungkin tidak sebanding")
+        for size in results:
+            if size not in baseline.get("results", {}):
+                print(f"  [warn] ukuran {size} tidak ada di baseline — tidak dibandingkan")
+        problems = compare(baseline, report, args.threshold)
+        for p in problems:
+            print(f"  [regresi] {p}")
+        if problems:
+            print(f"❌ {len(problems)} regresi dibanding {args.compare}")
+            sys.exit(1)
+        print(f"✅ Tidak ada regresi dibanding {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
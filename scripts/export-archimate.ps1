@@ -1,6 +1,9 @@
 param(
     [string]$Source = 'model',
     [string]$OutDir = 'exported_diagrams',
+    [ValidateSet('auto', 'batch', 'per-file', 'placeholder')]
+    [string]$Mode = 'auto',
+    [int]$Jobs = 0,
     [switch]$DryRun = $false
 )
 
@@ -9,9 +12,13 @@ if (-not $python) {
     $python = 'python'
 }
 
-if ($DryRun) {
-    & $python scripts/export_archimate.py --source $Source --outdir $OutDir --dry-run
+$exportArgs = @('scripts/export_archimate.py', '--source', $Source, '--outdir', $OutDir, '--mode', $Mode)
+if ($Jobs -gt 0) {
+    $exportArgs += @('--jobs', $Jobs)
 }
-else {
-    & $python scripts/export_archimate.py --source $Source --outdir $OutDir
+if ($DryRun) {
+    $exportArgs += '--dry-run'
 }
+
+& $python @exportArgs
+exit $LASTEXITCODE
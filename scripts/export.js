@@ -1,5 +1,6 @@
 // ===== LOAD MODEL =====
-var modelPath = "/github/workspace/model/archiPKG.archimate";
+// Hasil scripts/model_archimate.py pack (default .cache/archiPKG.archimate)
+var modelPath = java.lang.System.getenv("ARCHI_MODEL") || "/github/workspace/.cache/archiPKG.archimate";
 var model = archi.loadModel(modelPath);
 if (!model) {
     console.log("MODEL TIDAK DITEMUKAN: " + modelPath);
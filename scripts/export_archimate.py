@@ -4,19 +4,36 @@ Simple automation to export ArchiMate diagram XML files to PNG.
 
 Behavior:
 - Scans a source folder (default: ./model and ./model/diagrams) for .archimate or .xml diagram files.
-- If a config file provides an `archi_command_template`, the script will run that command (formatting {input} and {output}).
+  The .archimate pack generated from the Grafico folder (model_archimate.py pack) is skipped.
+- Batch mode: if the config provides an `archi_batch_command_template`, Archi is started once per model
+  (formatting {model} and {outdir}), the same way the workflow's `--exportImages` call does.
+- Per-file mode: if the config provides an `archi_command_template`, that command is run for every
+  diagram (formatting {input} and {output}) by a bounded pool of parallel jobs.
 - Otherwise the script creates a placeholder PNG for each diagram using Pillow, so you get automated outputs even without Archi installed.
 
+Every command runs with a per-job timeout and is retried with exponential backoff. A job that still
+fails (non-zero exit or timeout) is reported as failed and the script exits 1; a placeholder PNG is
+still written for its diagrams. "placeholder" status is reserved for runs without any Archi command
+configured. A summary of exports, placeholders and failures is printed at the end.
+
 Configure a command template in tools/archi_export/config.json, e.g.:
-  "archi_command_template": "C:\\Program Files\\Archi\\Archi.exe -nosplash -application com.archimatetool.commandline -model \"{input}\" -export \"{output}\""
+  "archi_batch_command_template": "\"C:\\Program Files\\Archi\\Archi.exe\" -application com.archimatetool.commandline.app -nosplash --loadModel \"{model}\" --exportImages format=PNG scale=2.0 folder=\"{outdir}\""
+
+Templates are split into an argument list (no shell); placeholders are filled in after splitting, so
+paths with spaces stay a single argument. A template may also be given as a JSON list of arguments.
 
 This script requires `Pillow` for placeholder PNG generation. See requirements.txt.
 """
 import argparse
 import json
 import os
+import shlex
+import signal
 import subprocess
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from pathlib import Path
 
 try:
@@ -24,6 +41,19 @@ try:
 except Exception:
     Image = None
 
+MODES = ('auto', 'batch', 'per-file', 'placeholder')
+DEFAULT_JOBS = 2
+DEFAULT_TIMEOUT = 600
+DEFAULT_RETRIES = 1
+DEFAULT_BACKOFF = 2.0
+# Written by model_archimate.py pack from the Grafico folder; exporting it again would duplicate every view
+PACK_NAME = 'archiPKG.archimate'
+
+
+def is_generated_pack(path: Path):
+    """True for the file written by model_archimate.py pack (same model as the Grafico folder)."""
+    return path.name == PACK_NAME or path.with_name(path.name + '.manifest.json').exists()
+
 
 def find_diagram_files(src: Path):
     files = []
@@ -31,12 +61,25 @@ def find_diagram_files(src: Path):
         return files
     # search for .archimate files and xml files under diagrams
     for p in src.rglob('*.archimate'):
+        if is_generated_pack(p):
+            continue
         files.append(p)
     for p in (src / 'diagrams').rglob('*.xml') if (src / 'diagrams').exists() else []:
-        files.append(p)
+        # folder.xml is Grafico folder metadata, not a view
+        if p.name != 'folder.xml':
+            files.append(p)
     return sorted(set(files))
 
 
+def find_models(src: Path, files):
+    """Models for batch mode: every .archimate file, plus `src` itself when it is a Grafico folder."""
+    models = [f for f in files if f.suffix == '.archimate']
+    grafico = [f for f in files if f.suffix == '.xml']
+    if grafico:
+        models.insert(0, src)
+    return models, grafico
+
+
 def load_config(path: Path):
     if not path.exists():
         return {}
@@ -62,23 +105,187 @@ def make_placeholder_png(text: str, out_path: Path, size=(1200, 900)):
     y = margin
     for line in lines:
         draw.text((margin, y), line, fill=(40, 40, 40), font=font)
-        y += font.getsize(line)[1] + 6
-    draw.text((margin, size[1] - 40), f'Generated: {datetime.utcnow().isoformat()}Z', fill=(120, 120, 120), font=font)
+        bbox = draw.textbbox((0, 0), line or ' ', font=font)
+        y += bbox[3] - bbox[1] + 6
+    generated = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    draw.text((margin, size[1] - 40), f'Generated: {generated}Z', fill=(120, 120, 120), font=font)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     img.save(out_path, 'PNG')
 
 
-def run_archi_command(template: str, input_file: Path, output_file: Path, dry_run=False):
-    cmd = template.format(input=str(input_file), output=str(output_file))
-    print('Running:', cmd)
+def build_command(template, **values):
+    """Split a command template into an argument list, then fill in the placeholders per argument."""
+    if isinstance(template, list):
+        parts = [str(p) for p in template]
+    else:
+        lexer = shlex.shlex(template, posix=True)
+        lexer.whitespace_split = True
+        if os.name == 'nt':
+            # keep Windows path backslashes literal; quotes still group arguments
+            lexer.escape = ''
+        parts = list(lexer)
+    return [p.format(**values) for p in parts]
+
+
+def _kill_tree(proc):
+    """Kill a timed-out command including its children (Archi.exe starts a separate JVM)."""
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(proc.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+def run_archi_command(cmd, timeout=None, dry_run=False):
+    """Run one argument list → (returncode, error message or None); returncode None means timeout."""
     if dry_run:
-        return 0
+        return 0, None
+    kwargs = {'stdout': subprocess.PIPE, 'stderr': subprocess.STDOUT}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    try:
+        proc = subprocess.Popen(cmd, **kwargs)
+    except OSError as e:
+        return 2, f'failed to start: {e}'
     try:
-        completed = subprocess.run(cmd, shell=True, check=False)
-        return completed.returncode
+        output, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_tree(proc)
+        proc.communicate()
+        return None, f'timed out after {timeout}s'
+    if proc.returncode != 0:
+        tail = output.decode('utf-8', 'replace').strip().splitlines()[-1:] if output else []
+        return proc.returncode, f'exit code {proc.returncode}' + (f': {tail[0]}' if tail else '')
+    return 0, None
+
+
+def run_with_retry(cmd, timeout, retries, backoff, dry_run=False):
+    """Run a command, retrying failures with exponential backoff → (ok, attempts, error)."""
+    error = None
+    for attempt in range(1, retries + 2):
+        rc, error = run_archi_command(cmd, timeout, dry_run)
+        if rc == 0:
+            return True, attempt, None
+        if error and error.startswith('failed to start'):
+            # a missing executable will not appear on retry
+            return False, attempt, error
+        if attempt <= retries:
+            time.sleep(backoff * 2 ** (attempt - 1))
+    return False, retries + 1, error
+
+
+def write_placeholder(f: Path, out_path: Path, reason: str):
+    """Placeholder PNG for one diagram → (status, error); status is 'placeholder' or 'failed'."""
+    try:
+        make_placeholder_png(f'Placeholder for {f.name}\n\n{reason}', out_path)
+        return 'placeholder', None
     except Exception as e:
-        print('Failed to run Archi command:', e)
-        return 2
+        return 'failed', f'placeholder failed: {e}'
+
+
+def output_path(f: Path, src: Path, outdir: Path):
+    rel = f.relative_to(src) if f.is_relative_to(src) else Path(f.name)
+    return (outdir / rel.parent / (f.stem + '.png')).resolve()
+
+
+def per_file_job(f: Path, out_path: Path, template, opts):
+    """Export one diagram with the per-file template, falling back to a placeholder."""
+    start = time.perf_counter()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    result = {'name': str(f), 'attempts': 0}
+    if template:
+        cmd = build_command(template, input=str(f.resolve()), output=str(out_path))
+        if opts['dry_run']:
+            print('Running:', subprocess.list2cmdline(cmd) if os.name == 'nt' else shlex.join(cmd))
+        ok, result['attempts'], error = run_with_retry(
+            cmd, opts['timeout'], opts['retries'], opts['backoff'], opts['dry_run'])
+        if ok:
+            result['status'] = 'dry-run' if opts['dry_run'] else 'ok'
+        else:
+            # Archi is configured but broke or hung: a failure, even if a placeholder is written
+            _, placeholder_error = write_placeholder(
+                f, out_path, f'(Archi command failed: {error})')
+            result['status'] = 'failed'
+            result['error'] = error if placeholder_error is None else f'{error}; {placeholder_error}'
+    elif opts['dry_run']:
+        result['status'] = 'dry-run'
+    else:
+        result['status'], result['error'] = write_placeholder(
+            f, out_path, 'To render a real PNG, configure `archi_batch_command_template` or '
+                         '`archi_command_template` in tools/archi_export/config.json.')
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def batch_job(model: Path, folder: Path, diagrams, template, opts, src: Path):
+    """Export a whole model with a single Archi start; on failure write placeholders for its diagrams."""
+    start = time.perf_counter()
+    folder.mkdir(parents=True, exist_ok=True)
+    cmd = build_command(template, model=str(model.resolve()), outdir=str(folder.resolve()))
+    if opts['dry_run']:
+        print('Running:', subprocess.list2cmdline(cmd) if os.name == 'nt' else shlex.join(cmd))
+    ok, attempts, error = run_with_retry(
+        cmd, opts['timeout'], opts['retries'], opts['backoff'], opts['dry_run'])
+    results = []
+    if ok:
+        result = {'name': str(model), 'status': 'dry-run' if opts['dry_run'] else 'ok',
+                  'attempts': attempts}
+        if not opts['dry_run']:
+            result['exported'] = len(list(folder.rglob('*.png')))
+        results.append(result)
+    else:
+        base = model if model.is_dir() else src
+        for f in diagrams:
+            _, placeholder_error = write_placeholder(
+                f, output_path(f, base, folder), f'(Archi batch export failed: {error})')
+            results.append({'name': str(f), 'status': 'failed', 'attempts': attempts,
+                            'error': error if placeholder_error is None
+                            else f'{error}; {placeholder_error}'})
+    for r in results:
+        r['seconds'] = time.perf_counter() - start
+    return results
+
+
+def run_jobs(jobs, workers):
+    """Run (callable, args) jobs on a bounded thread pool, printing each result as it finishes.
+
+    Results are numbered over the whole run; a batch job can yield one result per diagram,
+    so the job counter is printed separately.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in jobs]
+        for done, fut in enumerate(as_completed(futures), 1):
+            res = fut.result()
+            for r in res if isinstance(res, list) else [res]:
+                results.append(r)
+                note = f' ({r["error"]})' if r.get('error') else ''
+                extra = f', {r["exported"]} PNGs' if 'exported' in r else ''
+                tries = f', {r["attempts"]} attempts' if r['attempts'] > 1 else ''
+                print(f'[{len(results)}] {r["status"]:<11} {r["name"]} '
+                      f'({r["seconds"]:.1f}s{extra}{tries}, job {done}/{len(futures)}){note}',
+                      flush=True)
+    return results
+
+
+def print_summary(results, elapsed):
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    print()
+    print(f'Summary: {counts.get("ok", 0)} exported, {counts.get("placeholder", 0)} placeholders, '
+          f'{counts.get("failed", 0)} failed'
+          + (f', {counts["dry-run"]} dry-run' if counts.get('dry-run') else '')
+          + f' in {elapsed:.1f}s')
+    for r in results:
+        if r['status'] in ('placeholder', 'failed') and r.get('error'):
+            print(f'  {r["status"]}: {r["name"]} - {r["error"]}')
+    return counts
 
 
 def main():
@@ -87,6 +294,16 @@ def main():
     ap.add_argument('--outdir', '-o', default='exported_diagrams', help='Output directory for PNGs')
     ap.add_argument('--config', '-c', default='tools/archi_export/config.json', help='Config JSON path')
     ap.add_argument('--dry-run', action='store_true', help='Print commands but do not execute')
+    ap.add_argument('--mode', choices=MODES, default='auto',
+                    help='auto = batch template if configured, else per-file template, else placeholders')
+    ap.add_argument('--jobs', '-j', type=int, default=None,
+                    help=f'Parallel Archi processes (config `jobs`, default {DEFAULT_JOBS})')
+    ap.add_argument('--timeout', type=float, default=None,
+                    help=f'Per-job timeout in seconds (config `timeout`, default {DEFAULT_TIMEOUT})')
+    ap.add_argument('--retries', type=int, default=None,
+                    help=f'Retries per failed job (config `retries`, default {DEFAULT_RETRIES})')
+    ap.add_argument('--backoff', type=float, default=None,
+                    help=f'Initial retry delay in seconds, doubled per retry (default {DEFAULT_BACKOFF})')
     args = ap.parse_args()
 
     src = Path(args.source)
@@ -98,30 +315,47 @@ def main():
         print('No .archimate or diagram XML files found under', src)
         return
 
+    opts = {
+        'dry_run': args.dry_run,
+        'timeout': args.timeout if args.timeout is not None else cfg.get('timeout', DEFAULT_TIMEOUT),
+        'retries': max(0, args.retries if args.retries is not None else cfg.get('retries', DEFAULT_RETRIES)),
+        'backoff': args.backoff if args.backoff is not None else cfg.get('backoff', DEFAULT_BACKOFF),
+    }
+    workers = args.jobs or cfg.get('jobs', DEFAULT_JOBS)
+    batch_template = cfg.get('archi_batch_command_template')
     template = cfg.get('archi_command_template')
-    for f in files:
-        rel = f.relative_to(src) if f.is_relative_to(src) else f.name
-        out_name = f.stem + '.png'
-        out_path = outdir / rel.parent / out_name if isinstance(rel, Path) else outdir / out_name
-
-        out_path = out_path.resolve()
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-
-        if template:
-            rc = run_archi_command(template, f.resolve(), out_path, dry_run=args.dry_run)
-            if rc != 0:
-                print(f'Archi command returned {rc} for {f}, creating placeholder instead.')
-                try:
-                    make_placeholder_png(f'Placeholder for {f.name}\n(Archi command failed)', out_path)
-                except Exception as e:
-                    print('Failed to write placeholder PNG:', e)
-        else:
-            try:
-                txt = f'Placeholder for {f.name}\n\nTo render a real PNG, configure `archi_command_template` in tools/archi_export/config.json.'
-                make_placeholder_png(txt, out_path)
-                print('Created placeholder PNG:', out_path)
-            except Exception as e:
-                print('Failed to create placeholder PNG for', f, '-', e)
+
+    mode = args.mode
+    if mode == 'auto':
+        mode = 'batch' if batch_template else 'per-file'
+    if mode == 'batch' and not batch_template:
+        print('ERROR: --mode batch needs `archi_batch_command_template` in', args.config)
+        sys.exit(2)
+    if mode == 'per-file' and args.mode == 'per-file' and not template:
+        print('ERROR: --mode per-file needs `archi_command_template` in', args.config)
+        sys.exit(2)
+    if mode == 'placeholder':
+        template = None
+
+    start = time.perf_counter()
+    if mode == 'batch':
+        models, grafico = find_models(src, files)
+        jobs = []
+        for model in models:
+            folder = outdir if len(models) == 1 else outdir / model.stem
+            diagrams = grafico if model == src else [model]
+            jobs.append((batch_job, (model, folder, diagrams, batch_template, opts, src)))
+        print(f'Batch export: {len(models)} model(s), {len(files)} diagram file(s), '
+              f'{min(workers, len(jobs))} parallel job(s)')
+    else:
+        jobs = [(per_file_job, (f, output_path(f, src, outdir), template, opts)) for f in files]
+        print(f'Per-file export: {len(files)} diagram file(s), '
+              f'{min(workers, len(jobs))} parallel job(s)')
+
+    results = run_jobs(jobs, workers)
+    counts = print_summary(results, time.perf_counter() - start)
+    if counts.get('failed'):
+        sys.exit(1)
 
 
 if __name__ == '__main__':
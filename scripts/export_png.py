@@ -1,55 +1,31 @@
 #!/usr/bin/env python3
 """
-Export ArchiMate diagrams dari format Grafico (coArchi v1) ke PNG
+Export ArchiMate diagrams dari format Grafico (coArchi v1) ke PNG (atau SVG)
 Dengan simbol relasi ArchiMate yang benar
 """
 
 import xml.etree.ElementTree as ET
+import argparse
+import contextlib
+import functools
+import hashlib
+import io
+import json
 import os
 import sys
 import re
 import math
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    os.system("pip install Pillow -q")
-    from PIL import Image, ImageDraw, ImageFont
-
-ELEMENT_COLORS = {
-    "BusinessActor":         ("#FFFFC0", "#8B8B00"),
-    "BusinessRole":          ("#FFFFC0", "#8B8B00"),
-    "BusinessProcess":       ("#FFFFC0", "#8B8B00"),
-    "BusinessFunction":      ("#FFFFC0", "#8B8B00"),
-    "BusinessService":       ("#FFFFC0", "#8B8B00"),
-    "BusinessObject":        ("#FFFFC0", "#8B8B00"),
-    "BusinessEvent":         ("#FFFFC0", "#8B8B00"),
-    "BusinessInteraction":   ("#FFFFC0", "#8B8B00"),
-    "BusinessCollaboration": ("#FFFFC0", "#8B8B00"),
-    "BusinessInterface":     ("#FFFFC0", "#8B8B00"),
-    "Product":               ("#FFFFC0", "#8B8B00"),
-    "ValueStream":           ("#FFE0B0", "#8B5000"),
-    "Capability":            ("#FFE0B0", "#8B5000"),
-    "Resource":              ("#FFE0B0", "#8B5000"),
-    "CourseOfAction":        ("#FFE0B0", "#8B5000"),
-    "ApplicationComponent":  ("#C0E0FF", "#00008B"),
-    "ApplicationService":    ("#C0E0FF", "#00008B"),
-    "ApplicationFunction":   ("#C0E0FF", "#00008B"),
-    "ApplicationProcess":    ("#C0E0FF", "#00008B"),
-    "DataObject":            ("#C0E0FF", "#00008B"),
-    "Node":                  ("#C0FFC0", "#006400"),
-    "Device":                ("#C0FFC0", "#006400"),
-    "SystemSoftware":        ("#C0FFC0", "#006400"),
-    "TechnologyService":     ("#C0FFC0", "#006400"),
-    "Artifact":              ("#C0FFC0", "#006400"),
-    "Stakeholder":           ("#FFD700", "#8B6914"),
-    "Goal":                  ("#FFD700", "#8B6914"),
-    "Requirement":           ("#FFD700", "#8B6914"),
-    "WorkPackage":           ("#FFB6C1", "#8B0000"),
-    "Deliverable":           ("#FFB6C1", "#8B0000"),
-    "Grouping":              ("#F0F0F0", "#888888"),
-}
-DEFAULT_COLOR = ("#F5F5F5", "#666666")
+# Layout folder Grafico + parsing file elemen: satu definisi, dipakai juga oleh index
+from model_index import DEFAULT_INDEX, ELEMENT_FOLDERS, iter_element_files, parse_element_file
+
+# Warna elemen + style relasi per theme (lihat bagian THEME)
+THEMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "tools", "archi_export", "themes.json")
 
 SCALE = 1.5
 PADDING = 60
@@ -57,6 +33,24 @@ MIN_W = 1400
 MIN_H = 900
 FONT_SIZE = 12
 TITLE_FONT_SIZE = 18
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+]
+
+# Naikkan kalau perubahan kode mengubah hasil gambar (membatalkan manifest lama)
+RENDER_REVISION = 3
+
+# Kanvas lebih besar dari ini di-render per band (lihat save_tiled_png)
+TILE_AUTO_PIXELS = 40_000_000
+DEFAULT_TILE_SIZE = 512
+
+DEFAULT_LABEL_CACHE = os.path.join(".cache", "label-cache.json")
+# Waktu render per diagram (bobot --shard); sengaja di luar manifest supaya
+# manifest yang di-commit tidak berubah kalau tidak ada yang di-render ulang
+DEFAULT_RENDER_TIMES = os.path.join(".cache", "render-times.json")
+MANIFEST_NAME = ".export-manifest.json"
+MANIFEST_VERSION = 1
 
 
 def strip_ns(tag):
@@ -67,22 +61,23 @@ def get_type(xsi_type):
     return xsi_type.split(":")[-1] if ":" in xsi_type else xsi_type
 
 
-def get_colors(etype):
-    etype_clean = get_type(str(etype))
-    for key, val in ELEMENT_COLORS.items():
-        if key.lower() == etype_clean.lower():
-            return val
-    for key, val in ELEMENT_COLORS.items():
-        if key.lower() in etype_clean.lower():
-            return val
-    return DEFAULT_COLOR
+def pil():
+    """Import Pillow saat pertama dipakai → (Image, ImageDraw, ImageFont)
+
+    Tidak di-import di level modul supaya import export_png tetap murah dan
+    tanpa side effect.
+    """
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        raise ImportError("Pillow belum terpasang — jalankan: "
+                          "pip install -r requirements.txt") from None
+    return Image, ImageDraw, ImageFont
 
 
 def load_fonts():
-    for path in [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-    ]:
+    ImageFont = pil()[2]
+    for path in FONT_PATHS:
         if os.path.exists(path):
             try:
                 return (ImageFont.truetype(path, FONT_SIZE),
@@ -108,6 +103,108 @@ def wrap_text(text, max_chars=16):
     return lines[:4]
 
 
+def font_key(font):
+    """Identitas font yang stabil antar proses/run (untuk key cache)"""
+    path = getattr(font, "path", None)
+    # Font default Pillow (≥ 10.1) dimuat dari BytesIO, bukan path
+    name = os.path.basename(path) if isinstance(path, str) else "default"
+    return f"{name}:{getattr(font, 'size', 0)}"
+
+
+class LabelCache:
+    """Cache LRU untuk layout label: (text, max_chars, font) → (lines, widths)
+
+    Nama elemen yang sama (aktor, aplikasi) muncul di banyak view; wrap_text dan
+    pengukuran textbbox cukup dilakukan sekali. Bisa disimpan ke file JSON.
+
+    track_new=True (worker pool dengan --label-cache): miss juga dicatat di
+    `new` (paling banyak maxsize entri) sampai diambil take_new().
+    """
+
+    VERSION = 1
+
+    def __init__(self, maxsize=8192):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.new = {}
+        self.track_new = False
+        self.hits = self.misses = 0
+
+    def layout(self, text, max_chars, font, draw):
+        key = (text, max_chars, font_key(font))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        lines = wrap_text(text, max_chars=max_chars)
+        widths = []
+        for line in lines:
+            try:
+                bbox = draw.textbbox((0, 0), line, font=font)
+                widths.append(bbox[2] - bbox[0])
+            except Exception:
+                widths.append(len(line) * 7)
+        entry = (lines, widths)
+        self._put(key, entry)
+        if self.track_new:
+            self.new[key] = entry
+            if len(self.new) > self.maxsize:
+                del self.new[next(iter(self.new))]
+        return entry
+
+    def _put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def merge(self, entries):
+        """Tambah entri dari proses lain (worker pool)"""
+        for key, entry in entries.items():
+            self._put(key, entry)
+
+    def take_new(self):
+        new, self.new = self.new, {}
+        return new
+
+    def load(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.VERSION:
+            return
+        entries = data.get("entries")
+        if not isinstance(entries, list):
+            return
+        for item in entries:
+            # [text, max_chars, font_key, lines, widths] — entri rusak dilewati
+            if not (isinstance(item, list) and len(item) == 5):
+                continue
+            text, max_chars, fkey, lines, widths = item
+            if not (isinstance(text, str) and isinstance(max_chars, int)
+                    and isinstance(fkey, str) and isinstance(lines, list)
+                    and isinstance(widths, list) and len(lines) == len(widths)):
+                continue
+            self._put((text, max_chars, fkey), (lines, widths))
+
+    def save(self, path):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        entries = [[*key, *entry] for key, entry in self.entries.items()]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+LABEL_CACHE = LabelCache()
+
+
 # ─── SIMBOL RELASI ARCHIMATE ──────────────────────────────────────────────────
 
 def draw_arrow_open(draw, tx, ty, dx, dy, length, color, size=12):
@@ -181,258 +278,2135 @@ def draw_circle_filled(draw, sx, sy, dx, dy, length, color, r=7):
     draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=color)
 
 
-def draw_connection(draw, conn, src_node, tgt_node, ox, oy):
-    """Gambar satu koneksi dengan simbol ArchiMate yang tepat"""
-    rel_type = conn.get("type", "")
-    rel_clean = get_type(rel_type)
-
-    sx = int((src_node["x"] + src_node["w"] / 2 + ox) * SCALE) + PADDING
-    sy = int((src_node["y"] + src_node["h"] / 2 + oy) * SCALE) + PADDING + 60
-    tx = int((tgt_node["x"] + tgt_node["w"] / 2 + ox) * SCALE) + PADDING
-    ty = int((tgt_node["y"] + tgt_node["h"] / 2 + oy) * SCALE) + PADDING + 60
-
+def clip_to_borders(sx, sy, tx, ty, src_rect, tgt_rect):
+    """Potong garis tengah-ke-tengah supaya mulai/berakhir di tepi kotak node
+
+    Kalau kotak bertumpuk (mis. node di dalam grouping) garis tidak diubah.
+    """
+    dx, dy = tx - sx, ty - sy
+    length = math.sqrt(dx * dx + dy * dy)
+    if length < 1:
+        return sx, sy, tx, ty
+
+    def exit_dist(rect):
+        hw, hh = (rect[2] - rect[0]) / 2, (rect[3] - rect[1]) / 2
+        ux, uy = abs(dx) / length, abs(dy) / length
+        return min(hw / ux if ux else math.inf, hh / uy if uy else math.inf)
+
+    t_src, t_tgt = exit_dist(src_rect), exit_dist(tgt_rect)
+    if t_src + t_tgt >= length:
+        return sx, sy, tx, ty
+    return (int(sx + dx * t_src / length), int(sy + dy * t_src / length),
+            int(tx - dx * t_tgt / length), int(ty - dy * t_tgt / length))
+
+
+# ─── THEME ────────────────────────────────────────────────────────────────────
+# Warna elemen dan style relasi dibaca dari THEMES_PATH, lalu tiap theme
+# dikompilasi sekali jadi tabel hash. Resolusi tipe → style di-memo per tipe
+# (dan per id untuk overrides), jadi lookup per node/koneksi O(1).
+
+# Nama simbol ujung relasi di themes.json → fungsi gambar
+SYMBOLS = {
+    "arrow_open":     draw_arrow_open,
+    "arrow_filled":   draw_arrow_filled,
+    "arrow_hollow":   draw_arrow_hollow,
+    "diamond_filled": draw_diamond_filled,
+    "diamond_hollow": draw_diamond_hollow,
+    "circle_filled":  draw_circle_filled,
+    "none":           None,
+}
+DASH_STYLES = ("solid", "dashed")
+
+
+class Theme:
+    """Theme terkompilasi; dibuat lewat load_theme()
+
+    element_style/relationship_style: tipe → style (memo per tipe).
+    node_style/connection_style: sama, tapi cek overrides per id dulu —
+    id elemen/relasi model (ref) atau id objek diagram.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+        default = spec.get("element_default", {})
+        self.element_default = (default.get("fill", "#F5F5F5"), default.get("border", "#666666"))
+        self.elements = {}      # tipe (lowercase) → (fill, border), urut seperti di theme
+        for group in spec.get("elements", ()):
+            for etype in group["types"]:
+                self.elements[etype.lower()] = (group.get("fill", self.element_default[0]),
+                                                group.get("border", self.element_default[1]))
+        self.relationship_default = self._relationship(spec.get("relationship_default", {}),
+                                                       ("#555555", False, None, None))
+        self.relationships = {rtype: self._relationship(rspec, self.relationship_default)
+                              for rtype, rspec in spec.get("relationships", {}).items()}
+        self.overrides = spec.get("overrides", {})
+        self._element_memo, self._relationship_memo, self._override_memo = {}, {}, {}
+
+    @staticmethod
+    def _relationship(rspec, base):
+        """dict themes.json → (warna, dashed, simbol source, simbol target)"""
+        color, dashed, source, target = base
+        if "dash" in rspec:
+            if rspec["dash"] not in DASH_STYLES:
+                raise ValueError(f"dash tidak dikenal: {rspec['dash']}")
+            dashed = rspec["dash"] == "dashed"
+        for end in ("source", "target"):
+            if end in rspec and rspec[end] not in SYMBOLS:
+                raise ValueError(f"simbol {end} tidak dikenal: {rspec[end]}")
+        return (rspec.get("color", color), dashed,
+                SYMBOLS[rspec["source"]] if "source" in rspec else source,
+                SYMBOLS[rspec["target"]] if "target" in rspec else target)
+
+    def element_style(self, etype):
+        """Tipe elemen → (fill, border); persis dulu, lalu nama tipe theme yang terkandung"""
+        style = self._element_memo.get(etype)
+        if style is None:
+            clean = get_type(str(etype)).lower()
+            style = self.elements.get(clean)
+            if style is None:
+                style = next((val for key, val in self.elements.items() if key in clean),
+                             self.element_default)
+            self._element_memo[etype] = style
+        return style
+
+    def relationship_style(self, rtype):
+        """Tipe relasi → (warna, dashed, simbol source, simbol target)"""
+        style = self._relationship_memo.get(rtype)
+        if style is None:
+            style = self._relationship_memo[rtype] = self.relationships.get(
+                get_type(rtype), self.relationship_default)
+        return style
+
+    def _override(self, obj, base, compile_fn):
+        key = obj.ref if obj.ref in self.overrides else obj.id
+        if key not in self.overrides:
+            return base
+        memo_key = (key, base)
+        if memo_key not in self._override_memo:
+            self._override_memo[memo_key] = compile_fn(self.overrides[key], base)
+        return self._override_memo[memo_key]
+
+    @staticmethod
+    def _element(espec, base):
+        return espec.get("fill", base[0]), espec.get("border", base[1])
+
+    def node_style(self, node):
+        base = self.element_style(node.type)
+        if not self.overrides:
+            return base
+        return self._override(node, base, self._element)
+
+    def connection_style(self, conn):
+        base = self.relationship_style(conn.type)
+        if not self.overrides:
+            return base
+        return self._override(conn, base, self._relationship)
+
+
+def read_themes(path=None):
+    """themes.json → {"default": nama, "themes": {nama: spec mentah}}"""
+    with open(path or THEMES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def theme_spec(themes, name):
+    """Spec theme dengan "extends" sudah diselesaikan (anak menimpa induk per key)"""
+    chain, current = [], name
+    while current:
+        if current in chain:
+            raise ValueError(f"extends melingkar: {' → '.join(chain + [current])}")
+        if current not in themes["themes"]:
+            raise ValueError(f"theme tidak ada: {current}")
+        chain.append(current)
+        current = themes["themes"][current].get("extends")
+    spec = {}
+    for current in reversed(chain):
+        for key, value in themes["themes"][current].items():
+            if key == "extends":
+                continue
+            if key == "elements":
+                spec[key] = spec.get(key, []) + value
+            elif key in ("relationships", "overrides"):
+                merged = dict(spec.get(key, {}))
+                for k, v in value.items():
+                    merged[k] = dict(merged.get(k, {}), **v)
+                spec[key] = merged
+            else:
+                spec[key] = dict(spec.get(key, {}), **value)
+    return spec
+
+
+@functools.lru_cache(maxsize=None)
+def load_theme(name=None, path=None):
+    """Kompilasi theme `name` (default: "default" di file) dari themes.json"""
+    themes = read_themes(path)
+    name = name or themes.get("default", "archimate")
+    return Theme(name, theme_spec(themes, name))
+
+
+# ─── DRAW LIST KONEKSI ────────────────────────────────────────────────────────
+# Semua koneksi dikompilasi dulu jadi primitif yang dikelompokkan per style,
+# lalu di-flush sekaligus: geometri (termasuk dash) dihitung sekali per diagram,
+# bukan per panggilan/tile.
+
+LINE_WIDTH = 2
+DASH_LEN = 8
+GAP_LEN = 6
+
+
+def connection_endpoints(src_node, tgt_node, ox, oy):
+    sx = int((src_node.x + src_node.w / 2 + ox) * SCALE) + PADDING
+    sy = int((src_node.y + src_node.h / 2 + oy) * SCALE) + PADDING + 60
+    tx = int((tgt_node.x + tgt_node.w / 2 + ox) * SCALE) + PADDING
+    ty = int((tgt_node.y + tgt_node.h / 2 + oy) * SCALE) + PADDING + 60
+    # Ujung garis di tepi kotak, bukan di tengah (tidak tertimpa node)
+    return clip_to_borders(sx, sy, tx, ty, node_rect(src_node, ox, oy),
+                           node_rect(tgt_node, ox, oy))
+
+
+def segment_span(sx, sy, dx, dy, length, y1, y2):
+    """Rentang jarak [t0, t1] sepanjang garis yang y-nya di dalam [y1, y2], atau None"""
+    if dy == 0:
+        return (0.0, float(length)) if y1 <= sy <= y2 else None
+    ta = (y1 - sy) * length / dy
+    tb = (y2 - sy) * length / dy
+    t0, t1 = max(0.0, min(ta, tb)), min(float(length), max(ta, tb))
+    return (t0, t1) if t0 <= t1 else None
+
+
+def dash_segments(sx, sy, tx, ty, y_range=None):
+    """Segmen dash satu garis; y_range → hanya dash di rentang y itu (per tile)"""
     dx = tx - sx
     dy = ty - sy
     length = max(math.sqrt(dx**2 + dy**2), 1)
+    total = int(length)
+    period = DASH_LEN + GAP_LEN
+    start, stop = 0, total
+    if y_range is not None:
+        span = segment_span(sx, sy, dx, dy, length, *y_range)
+        if span is None:
+            return []
+        start, stop = int(span[0] // period) * period, min(total, int(span[1]) + 1)
+    return [(int(sx + pos * dx / length), int(sy + pos * dy / length),
+             int(sx + end * dx / length), int(sy + end * dy / length))
+            for pos, end in ((p, min(p + DASH_LEN, total))
+                             for p in range(start, stop, period))]
+
+
+class DrawList:
+    """Primitif koneksi per style; juga meniru line/polygon/ellipse ImageDraw
+    supaya helper draw_arrow_* dkk. bisa merekam ke sini.
+
+    Garis disimpan sebagai run (sx, sy, tx, ty) per (warna, lebar, dashed);
+    dash baru dipecah saat flush, dan hanya untuk region yang digambar.
+    """
+
+    ROW_H = 256
+
+    def __init__(self):
+        self.runs = {}      # (color, width, dashed) → [(sx, sy, tx, ty), ...]
+        self.shapes = []    # simbol ujung, digambar setelah semua garis
+        self._rows = {}
+
+    def line(self, xy, fill="#000000", width=1):
+        (x1, y1), (x2, y2) = xy
+        self.runs.setdefault((fill, width, False), []).append((x1, y1, x2, y2))
+
+    def polygon(self, xy, fill=None, outline=None, width=1):
+        self.shapes.append(("polygon", xy, fill, outline, width))
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        x1, y1, x2, y2 = xy
+        self.shapes.append(("ellipse", [(x1, y1), (x2, y2)], fill, outline, width))
+
+    def add_connection(self, conn, src_node, tgt_node, ox, oy, theme=None):
+        sx, sy, tx, ty = connection_endpoints(src_node, tgt_node, ox, oy)
+        dx = tx - sx
+        dy = ty - sy
+        length = max(math.sqrt(dx**2 + dy**2), 1)
+
+        color, dashed, source_symbol, target_symbol = \
+            (theme or load_theme()).connection_style(conn)
+        key = (color, LINE_WIDTH, dashed)
+        self.runs.setdefault(key, []).append((sx, sy, tx, ty))
+
+        if source_symbol:
+            source_symbol(self, sx, sy, dx, dy, length, color)
+        if target_symbol:
+            target_symbol(self, tx, ty, dx, dy, length, color)
+        self._rows = {}
+
+    def _runs_in(self, key, y1, y2):
+        """Run yang rentang y-nya beririsan dengan [y1, y2] (lewat index baris)"""
+        runs = self.runs[key]
+        rows = self._rows.get(key)
+        if rows is None:
+            rows = self._rows[key] = {}
+            h = self.ROW_H
+            for i, (_, a, _, b) in enumerate(runs):
+                lo, hi = (a, b) if a <= b else (b, a)
+                for row in range(lo // h, hi // h + 1):
+                    rows.setdefault(row, []).append(i)
+        picked = set()
+        for row in range(y1 // self.ROW_H, y2 // self.ROW_H + 1):
+            picked.update(rows.get(row, ()))
+        return [runs[i] for i in sorted(picked)]
+
+    def flush(self, draw, region=None):
+        """Gambar semua primitif ke `draw`; region → hanya yang beririsan (per tile)"""
+        vector = getattr(draw, "vector", False)
+        margin = LINE_WIDTH + 1
+        y_range = None
+        if region is not None:
+            y_range = (int(region[1]) - margin, int(region[3]) + margin)
+
+        for key in self.runs:
+            color, width, dashed = key
+            runs = self.runs[key] if y_range is None else self._runs_in(key, *y_range)
+            if vector:
+                # Backend vektor: satu elemen untuk semua garis style ini
+                draw.lines(runs, fill=color, width=width,
+                           dash=(DASH_LEN, GAP_LEN) if dashed else None)
+                continue
+            if dashed:
+                segs = [seg for run in runs for seg in dash_segments(*run, y_range)]
+            else:
+                segs = runs
+            line = draw.line
+            for x1, y1, x2, y2 in segs:
+                line([(x1, y1), (x2, y2)], fill=color, width=width)
+
+        for kind, xy, fill, outline, width in self.shapes:
+            if y_range is not None:
+                ys = [p[1] for p in xy]
+                if min(ys) > y_range[1] or max(ys) < y_range[0]:
+                    continue
+            if kind == "ellipse":
+                draw.ellipse([*xy[0], *xy[1]], fill=fill, outline=outline, width=width)
+            elif outline and width > 1 and not vector:
+                # ImageDraw.polygon dengan width > 1 membuat mask seukuran kanvas
+                # per panggilan — outline digambar sebagai polyline tertutup saja
+                draw.polygon(xy, fill=fill)
+                draw.line(list(xy) + [xy[0]], fill=outline, width=width, joint="curve")
+            else:
+                draw.polygon(xy, fill=fill, outline=outline, width=width)
+
+
+def compile_connections(layout, theme=None):
+    drawlist = DrawList()
+    ox, oy = layout["ox"], layout["oy"]
+    theme = theme or load_theme()
+    for conn, src, tgt in layout["edges"]:
+        drawlist.add_connection(conn, src, tgt, ox, oy, theme)
+    return drawlist
+
+
+def draw_connection(draw, conn, src_node, tgt_node, ox, oy, theme=None):
+    """Gambar satu koneksi dengan simbol ArchiMate yang tepat"""
+    drawlist = DrawList()
+    drawlist.add_connection(conn, src_node, tgt_node, ox, oy, theme)
+    drawlist.flush(draw)
 
-    # Warna dan style garis per relasi
-    LINE_STYLES = {
-        "TriggeringRelationship":     ("#000000", "solid"),
-        "FlowRelationship":           ("#000000", "solid"),
-        "RealizationRelationship":    ("#000000", "dashed"),
-        "AssignmentRelationship":     ("#000000", "solid"),
-        "CompositionRelationship":    ("#000000", "solid"),
-        "AggregationRelationship":    ("#000000", "solid"),
-        "AssociationRelationship":    ("#555555", "solid"),
-        "ServingRelationship":        ("#000000", "solid"),
-        "AccessRelationship":         ("#555555", "dashed"),
-        "InfluenceRelationship":      ("#555555", "dashed"),
-        "SpecializationRelationship": ("#000000", "solid"),
-    }
-
-    style = LINE_STYLES.get(rel_clean, ("#555555", "solid"))
-    color = style[0]
-    is_dashed = style[1] == "dashed"
-
-    # Gambar garis (solid atau dashed)
-    if is_dashed:
-        # Simulasi dashed dengan segmen pendek
-        dash_len = 8
-        gap_len = 6
-        total = int(length)
-        pos = 0
-        while pos < total:
-            end = min(pos + dash_len, total)
-            x1 = int(sx + pos * dx / length)
-            y1 = int(sy + pos * dy / length)
-            x2 = int(sx + end * dx / length)
-            y2 = int(sy + end * dy / length)
-            draw.line([(x1, y1), (x2, y2)], fill=color, width=2)
-            pos += dash_len + gap_len
-    else:
-        draw.line([(sx, sy), (tx, ty)], fill=color, width=2)
-
-    # Gambar simbol di ujung TARGET (arrow head)
-    if rel_clean in ("TriggeringRelationship", "FlowRelationship"):
-        draw_arrow_filled(draw, tx, ty, dx, dy, length, color)
 
-    elif rel_clean in ("RealizationRelationship", "SpecializationRelationship"):
-        draw_arrow_hollow(draw, tx, ty, dx, dy, length, color)
+def element_entry(path, sha1, eid, name, etype, source=None, target=None):
+    """Baris hasil parse_element_file / index → entry elements_map
 
-    elif rel_clean == "ServingRelationship":
-        draw_arrow_open(draw, tx, ty, dx, dy, length, color)
+    Relasi juga menyimpan "source"/"target" (id dari href) untuk model_graph.
+    """
+    entry = {"id": eid, "name": name, "type": etype, "path": path, "sha1": sha1}
+    if source:
+        entry["source"] = source
+    if target:
+        entry["target"] = target
+    return entry
 
-    elif rel_clean == "AssociationRelationship":
-        draw_arrow_open(draw, tx, ty, dx, dy, length, color)
 
-    elif rel_clean == "InfluenceRelationship":
-        draw_arrow_open(draw, tx, ty, dx, dy, length, color)
+def load_element_file(path):
+    """Parse satu file elemen/relasi → entry elements_map (None kalau tanpa id)"""
+    sha1, eid, name, etype, source, target = parse_element_file(path)
+    return element_entry(path, sha1, eid, name, etype, source, target) if eid else None
 
-    # Gambar simbol di ujung SOURCE
-    if rel_clean == "AssignmentRelationship":
-        draw_circle_filled(draw, sx, sy, dx, dy, length, color)
-        draw_arrow_filled(draw, tx, ty, dx, dy, length, color)
 
-    elif rel_clean == "CompositionRelationship":
-        draw_diamond_filled(draw, sx, sy, dx, dy, length, color)
+def load_elements(model_folder, log=None):
+    elements_map = {}
+    for rel, path, _ in iter_element_files(model_folder):
+        try:
+            entry = load_element_file(path)
+            if entry:
+                elements_map[entry["id"]] = entry
+        except Exception as e:
+            print(f"  [warn] {os.path.basename(rel)}: {e}", file=log)
+    return elements_map
 
-    elif rel_clean == "AggregationRelationship":
-        draw_diamond_hollow(draw, sx, sy, dx, dy, length, color)
 
+def load_elements_indexed(model_folder, index_path, log=None):
+    """Baca elemen lewat index persisten — hanya file baru/berubah yang di-parse"""
+    from model_index import ModelIndex
 
-def parse_grafico(model_folder):
     elements_map = {}
-    for subdir in ["business","application","technology","motivation",
-                   "strategy","implementation_migration","other","relations"]:
-        folder = os.path.join(model_folder, subdir)
-        if not os.path.isdir(folder):
-            continue
-        for fname in os.listdir(folder):
-            if not fname.endswith(".xml"):
-                continue
-            try:
-                root = ET.parse(os.path.join(folder, fname)).getroot()
-                eid = root.get("id")
-                if eid:
-                    elements_map[eid] = {
-                        "id": eid,
-                        "name": root.get("name", ""),
-                        "type": strip_ns(root.tag),
-                    }
-            except Exception as e:
-                print(f"  [warn] {fname}: {e}")
+    with ModelIndex(index_path) as idx:
+        rows, stats = idx.refresh(model_folder)
+    for rel, (sha1, eid, name, etype, source, target, error) in rows.items():
+        if error:
+            print(f"  [warn] {rel.rsplit('/', 1)[-1]}: {error}", file=log)
+        elif eid:
+            elements_map[eid] = element_entry(os.path.join(model_folder, *rel.split("/")),
+                                              sha1, eid, name, etype, source, target)
+    print(f"  Index: {stats['cached']} dari cache, {stats['parsed']} di-parse ulang", file=log)
+    return elements_map
+
+
+def load_model_elements(model_folder, index_path=None, log=None):
+    """log: file-like untuk pesan (default: stdout), sama seperti draw_diagram"""
+    if index_path:
+        elements_map = load_elements_indexed(model_folder, index_path, log)
+    else:
+        elements_map = load_elements(model_folder, log)
+    print(f"  Total elemen: {len(elements_map)}", file=log)
+    return elements_map
 
-    print(f"  Total elemen: {len(elements_map)}")
 
-    diagrams = []
+def discover_diagrams(model_folder, log=None):
+    """Semua file diagram di diagrams/ termasuk subfolder (belum di-parse)"""
     diagrams_folder = os.path.join(model_folder, "diagrams")
     if not os.path.isdir(diagrams_folder):
-        print(f"  [warn] Folder diagrams/ tidak ada")
-        return diagrams, elements_map
-
-    for fname in sorted(os.listdir(diagrams_folder)):
-        if not fname.endswith(".xml"):
-            continue
+        print(f"  [warn] Folder diagrams/ tidak ada", file=log)
+        return []
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(diagrams_folder):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            # folder.xml hanya metadata folder Grafico, bukan view
+            if fname.endswith(".xml") and fname != "folder.xml":
+                paths.append(os.path.join(dirpath, fname))
+    return paths
+
+
+def iter_diagrams(paths, stats=None, elements_map=None):
+    """Parse diagram satu per satu — yield (path, root), lalu lanjut ke berikutnya
+
+    stats (dict, opsional): stats[path] diisi waktu parse per file.
+    elements_map (opsional): file besar di-stream → StreamedDiagram.
+    """
+    for path in paths:
+        timing = {} if stats is not None else None
         try:
-            root = ET.parse(os.path.join(diagrams_folder, fname)).getroot()
-            print(f"  Found diagram: '{root.get('name', fname)}'")
-            diagrams.append(root)
+            with stage(timing, "parse"):
+                root = load_diagram(path, elements_map)
         except Exception as e:
-            print(f"  [warn] {fname}: {e}")
+            print(f"  [warn] {os.path.basename(path)}: {e}")
+            continue
+        finally:
+            if timing is not None:
+                stats[path] = timing["stages"]
+        yield path, root
+
 
+def parse_grafico(model_folder, index_path=None):
+    """Versi non-streaming: semua diagram di-parse dan disimpan di memori"""
+    elements_map = load_model_elements(model_folder, index_path)
+    diagrams = []
+    for path, root in iter_diagrams(discover_diagrams(model_folder)):
+        print(f"  Found diagram: '{root.get('name', os.path.basename(path))}'")
+        diagrams.append((path, root))
     return diagrams, elements_map
 
 
-def resolve_element(child, elements_map):
-    xsi_type = child.get("{http://www.w3.org/2001/XMLSchema-instance}type", "")
+XSI_TYPE = "{http://www.w3.org/2001/XMLSchema-instance}type"
+
+
+class Node:
+    """Satu objek diagram; x/y absolut (offset parent sudah ditambahkan)"""
+    __slots__ = ("id", "x", "y", "w", "h", "label", "type", "xsi_type", "ref")
+
+    def __init__(self, id, x, y, w, h, label, type, xsi_type, ref=""):
+        self.id = id
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.label = label
+        self.type = type
+        self.xsi_type = xsi_type
+        self.ref = ref          # id elemen model (href archimateElement)
+
+    def __repr__(self):
+        return f"Node({self.id!r}, {self.type!r}, {self.x}, {self.y}, {self.w}, {self.h})"
+
+
+class Connection:
+    __slots__ = ("source", "target", "type", "id", "ref")
+
+    def __init__(self, source, target, type, id="", ref=""):
+        self.source, self.target, self.type = source, target, type
+        self.id = id            # id koneksi di diagram
+        self.ref = ref          # id relasi model (href archimateRelationship)
+
+    def __repr__(self):
+        return f"Connection({self.source!r} → {self.target!r}, {self.type!r})"
+
+
+def element_label(child, arch, elements_map):
+    """(nama, tipe) objek diagram dari atribut child + <archimateElement> (arch)"""
     elem_name = child.get("name", "")
     arch_type = ""
-    for sub in child:
-        if strip_ns(sub.tag) == "archimateElement":
-            sub_xsi = sub.get("{http://www.w3.org/2001/XMLSchema-instance}type", "")
-            arch_type = get_type(sub_xsi)
-            href = sub.get("href", "")
-            if "#" in href:
-                ref_id = href.split("#")[-1]
-                if ref_id in elements_map:
-                    edata = elements_map[ref_id]
-                    if not elem_name:
-                        elem_name = edata.get("name", "")
-                    if not arch_type:
-                        arch_type = edata.get("type", "")
-            break
-    return elem_name, arch_type if arch_type else get_type(xsi_type)
+    if arch is not None:
+        arch_type = get_type(arch.get(XSI_TYPE, ""))
+        href = arch.get("href", "")
+        if "#" in href:
+            edata = elements_map.get(href.split("#")[-1])
+            if edata:
+                if not elem_name:
+                    elem_name = edata.get("name", "")
+                if not arch_type:
+                    arch_type = edata.get("type", "")
+    return elem_name, arch_type if arch_type else get_type(child.get(XSI_TYPE, ""))
+
 
+def resolve_element(child, elements_map):
+    arch = next((sub for sub in child if strip_ns(sub.tag) == "archimateElement"), None)
+    return element_label(child, arch, elements_map)
+
+
+def href_id(ref):
+    """href "Type_id.xml#id" (elemen atau dict atribut) → id, "" kalau tidak ada"""
+    href = ref.get("href", "") if ref is not None else ""
+    return href.split("#")[-1] if "#" in href else ""
 
-def resolve_relation_type(conn):
+
+def resolve_relation(conn):
+    """sourceConnections → (tipe relasi, id relasi model)"""
     for sub in conn:
         if strip_ns(sub.tag) == "archimateRelationship":
-            xsi = sub.get("{http://www.w3.org/2001/XMLSchema-instance}type", "")
-            return get_type(xsi)
-    return get_type(conn.get("{http://www.w3.org/2001/XMLSchema-instance}type", ""))
+            return get_type(sub.get(XSI_TYPE, "")), href_id(sub)
+    return get_type(conn.get(XSI_TYPE, "")), ""
+
+
+def make_connection(sub, default_source, target):
+    rel_type, ref = resolve_relation(sub)
+    return Connection(sub.get("source", default_source) or default_source, target, rel_type,
+                      sub.get("id", ""), ref)
 
 
 def collect_all(elem, elements_map, offset_x=0, offset_y=0):
+    """Semua Node + Connection di bawah elem (urutan pre-order, seperti XML)
+
+    Iteratif dengan stack (iterator anak, offset parent), jadi kedalaman
+    nesting tidak dibatasi recursion limit; sub-elemen tiap child dibaca
+    sekali saja.
+    """
     nodes, connections = [], []
-    for child in elem:
-        tag = strip_ns(child.tag)
-        if tag == "children":
-            bounds = next((b for b in child if strip_ns(b.tag) == "bounds"), None)
-            if bounds is not None:
-                x = int(float(bounds.get("x", 0))) + offset_x
-                y = int(float(bounds.get("y", 0))) + offset_y
-                w = int(float(bounds.get("width", 120)))
-                h = int(float(bounds.get("height", 55)))
-                node_id = child.get("id", "")
-                xsi_type = child.get("{http://www.w3.org/2001/XMLSchema-instance}type", "")
-                elem_name, elem_type = resolve_element(child, elements_map)
-                nodes.append({"id": node_id, "x": x, "y": y, "w": w, "h": h,
-                               "label": elem_name, "type": elem_type, "xsi_type": xsi_type})
-                # Kumpulkan sourceConnections
-                for sub in child:
-                    if strip_ns(sub.tag) == "sourceConnections":
-                        src = sub.get("source", node_id)
-                        tgt = sub.get("target", "")
-                        rel = resolve_relation_type(sub)
-                        if tgt:
-                            connections.append({"source": src or node_id,
-                                                "target": tgt, "type": rel})
-                # Rekursif
-                cn, cc = collect_all(child, elements_map, x, y)
-                nodes.extend(cn)
-                connections.extend(cc)
+    stack = [(iter(elem), offset_x, offset_y)]
+    while stack:
+        it, ox, oy = stack[-1]
+        child = next(it, None)
+        if child is None:
+            stack.pop()
+            continue
+        if strip_ns(child.tag) != "children":
+            continue
+        bounds = arch = None
+        conns, kids = [], []
+        for sub in child:
+            tag = strip_ns(sub.tag)
+            if tag == "children":
+                kids.append(sub)
+            elif tag == "sourceConnections":
+                conns.append(sub)
+            elif tag == "bounds":
+                if bounds is None:
+                    bounds = sub
+            elif tag == "archimateElement":
+                if arch is None:
+                    arch = sub
+        if bounds is None:
+            continue
+        x = int(float(bounds.get("x", 0))) + ox
+        y = int(float(bounds.get("y", 0))) + oy
+        node_id = child.get("id", "")
+        elem_name, elem_type = element_label(child, arch, elements_map)
+        nodes.append(Node(node_id, x, y, int(float(bounds.get("width", 120))),
+                          int(float(bounds.get("height", 55))),
+                          elem_name, elem_type, child.get(XSI_TYPE, ""), href_id(arch)))
+        for sub in conns:
+            tgt = sub.get("target", "")
+            if tgt:
+                connections.append(make_connection(sub, node_id, tgt))
+        if kids:
+            stack.append((iter(kids), x, y))
     return nodes, connections
 
 
-def draw_diagram(diagram, elements_map, output_path, font, bold_font):
-    name = diagram.get("name", "Untitled")
-    nodes, connections = collect_all(diagram, elements_map)
+# ─── STREAMING LOADER ─────────────────────────────────────────────────────────
 
-    if not nodes:
-        print(f"  [skip] '{name}' — tidak ada elemen visual")
-        return False
+# File diagram sebesar ini atau lebih dibaca dengan iterparse (tanpa DOM penuh)
+STREAM_AUTO_BYTES = 16 << 20
 
-    min_x = min(n["x"] for n in nodes)
-    min_y = min(n["y"] for n in nodes)
-    max_x = max(n["x"] + n["w"] for n in nodes)
-    max_y = max(n["y"] + n["h"] for n in nodes)
 
-    canvas_w = max(int((max_x - min_x) * SCALE) + PADDING * 2, MIN_W)
-    canvas_h = max(int((max_y - min_y) * SCALE) + PADDING * 2 + 70, MIN_H)
+class StreamedDiagram:
+    """Diagram hasil stream_diagram: atribut root + Node/Connection, tanpa DOM
 
-    img = Image.new("RGB", (canvas_w, canvas_h), "#FFFFFF")
-    draw = ImageDraw.Draw(img)
+    Bisa dipakai di tempat root ElementTree oleh layout_diagram, draw_diagram
+    dan diagram_dependencies (get() membaca atribut root).
+    """
+    __slots__ = ("attrib", "nodes", "connections", "refs")
+
+    def __init__(self, attrib, nodes, connections, refs):
+        self.attrib = attrib
+        self.nodes = nodes
+        self.connections = connections
+        self.refs = refs
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+
+class _Frame:
+    """State satu <children> yang sedang terbuka di stream_diagram"""
+    __slots__ = ("elem", "id", "ox", "oy", "pending", "bounds", "arch", "conns",
+                 "nodes", "sub_conns", "late")
+
+    def __init__(self, elem, ox, oy, pending):
+        self.elem = elem
+        self.id = elem.get("id", "")
+        self.ox, self.oy = ox, oy
+        # pending: bounds parent belum terbaca → posisi relatif, digeser saat parent selesai
+        self.pending = pending
+        self.bounds = self.arch = None
+        self.conns, self.nodes, self.sub_conns, self.late = [], [], [], []
+
+
+def stream_diagram(source, elements_map):
+    """Parse diagram dengan iterparse → StreamedDiagram
+
+    Node/koneksi dibuat begitu elemennya selesai dibaca, lalu elemen XML
+    di-clear dan dilepas dari parent-nya, jadi DOM yang hidup hanya
+    sepanjang jalur nesting saat ini. Offset parent dilacak dengan stack
+    frame; urutan hasil sama dengan collect_all.
+    """
+    nodes, connections, refs = [], [], []
+    attrib = None
+    path, frames = [], []
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if attrib is None:
+                attrib = dict(el.attrib)
+            href = el.get("href", "")
+            if "#" in href:
+                refs.append(href.split("#")[-1])
+            if strip_ns(el.tag) == "children" and path and (
+                    len(path) == 1 or (frames and path[-1] is frames[-1].elem)):
+                parent = frames[-1] if frames else None
+                if parent is None:
+                    frames.append(_Frame(el, 0, 0, False))
+                elif parent.bounds is None:
+                    frames.append(_Frame(el, 0, 0, True))
+                else:
+                    frames.append(_Frame(el, parent.ox + parent.bounds[0],
+                                         parent.oy + parent.bounds[1], False))
+            path.append(el)
+            continue
+
+        path.pop()
+        if not path:
+            break
+        parent_el = path[-1]
+        frame = frames[-1] if frames else None
+        if frame is not None and el is frame.elem:
+            frames.pop()
+            if frame.bounds is not None:
+                bx, by, w, h = frame.bounds
+                x, y = frame.ox + bx, frame.oy + by
+                if frame.late:
+                    for n in frame.late:
+                        n.x += x
+                        n.y += y
+                elem_name, elem_type = element_label(el, frame.arch, elements_map)
+                sub_nodes = [Node(frame.id, x, y, w, h, elem_name, elem_type,
+                                  el.get(XSI_TYPE, ""), href_id(frame.arch))] + frame.nodes
+                sub_conns = frame.conns + frame.sub_conns
+                parent = frames[-1] if frames else None
+                if parent is None:
+                    nodes.extend(sub_nodes)
+                    connections.extend(sub_conns)
+                else:
+                    parent.nodes.extend(sub_nodes)
+                    parent.sub_conns.extend(sub_conns)
+                    if frame.pending:
+                        parent.late.extend(sub_nodes)
+        elif frame is not None and parent_el is frame.elem:
+            tag = strip_ns(el.tag)
+            if tag == "bounds":
+                if frame.bounds is None:
+                    frame.bounds = (int(float(el.get("x", 0))), int(float(el.get("y", 0))),
+                                    int(float(el.get("width", 120))),
+                                    int(float(el.get("height", 55))))
+            elif tag == "archimateElement":
+                if frame.arch is None:
+                    frame.arch = dict(el.attrib)
+            elif tag == "sourceConnections":
+                tgt = el.get("target", "")
+                if tgt:
+                    frame.conns.append(make_connection(el, frame.id, tgt))
+        elif len(path) > 1 and strip_ns(parent_el.tag) != "children":
+            # Bukan elemen yang dikonsumsi (mis. isi sourceConnections) — biarkan
+            # sampai parent-nya selesai
+            continue
+        el.clear()
+        parent_el.remove(el)
+    return StreamedDiagram(attrib or {}, nodes, connections, refs)
+
+
+def load_diagram(path, elements_map=None, stream=None):
+    """Root ElementTree, atau StreamedDiagram untuk file besar
+
+    stream=None: otomatis (file >= STREAM_AUTO_BYTES dan elements_map ada).
+    """
+    if stream is None:
+        stream = elements_map is not None and os.path.getsize(path) >= STREAM_AUTO_BYTES
+    if stream:
+        return stream_diagram(path, elements_map or {})
+    return ET.parse(path).getroot()
+
+
+# ─── PROFILING ────────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def stage(stats, name):
+    """Catat wall/CPU time blok ini ke stats["stages"][name] (stats None = no-op)"""
+    if stats is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        t = stats.setdefault("stages", {}).setdefault(name, {"wall": 0.0, "cpu": 0.0})
+        t["wall"] += time.perf_counter() - wall
+        t["cpu"] += time.process_time() - cpu
+
+
+def _output_size(output):
+    if hasattr(output, "tell"):
+        return output.tell()
+    try:
+        return os.path.getsize(output)
+    except OSError:
+        return None
+
+
+# ─── BACKEND RENDER ───────────────────────────────────────────────────────────
+
+class PngCanvas:
+    """Raster Pillow; `draw` adalah ImageDraw biasa (di-encode ke PNG atau WebP)"""
+
+    def __init__(self, width, height, background="#FFFFFF", ext="png"):
+        Image, ImageDraw, _ = pil()
+        if ext == "webp" and max(width, height) > WEBP_MAX_SIZE:
+            raise ValueError(f"kanvas {width}x{height} melebihi batas WebP {WEBP_MAX_SIZE} px")
+        self.ext = ext
+        self.img = Image.new("RGB", (width, height), background)
+        self.draw = ImageDraw.Draw(self.img)
+
+    def tobytes(self, encoding=None):
+        return encode_image(self.img, self.ext, encoding)
+
+
+def make_canvas(fmt, width, height):
+    if fmt == "svg":
+        from svg_backend import SvgCanvas
+        return SvgCanvas(width, height)
+    if fmt in ("png", "webp"):
+        return PngCanvas(width, height, ext=fmt)
+    raise ValueError(f"Format tidak dikenal: {fmt}")
+
+
+OUTPUT_FORMATS = ("png", "svg", "webp")
+
+
+# ─── ENCODING ─────────────────────────────────────────────────────────────────
+# Diagram hanya memakai sedikit warna rata (warna theme + anti-alias teks),
+# jadi PNG palette (mode P) dan level/strategi zlib bisa memperkecil output
+# yang di-commit tiap run. Default = PNG RGB zlib level 6, sama seperti dulu.
+
+WEBP_MAX_SIZE = 16383
+PALETTE_MODES = ("off", "exact", "quantize")
+ZLIB_STRATEGIES = {"default": 0, "filtered": 1, "huffman": 2, "rle": 3, "fixed": 4}
+DEFAULT_ENCODING = {"palette": "off", "compress_level": None, "strategy": "default"}
+# Kandidat untuk --encode-report: nama → (format, encoding)
+ENCODE_CANDIDATES = {
+    "png":             ("png", {}),
+    "png-l1":          ("png", {"compress_level": 1}),
+    "png-l9":          ("png", {"compress_level": 9}),
+    "png-rle":         ("png", {"strategy": "rle"}),
+    "palette-exact":   ("png", {"palette": "exact"}),
+    "palette":         ("png", {"palette": "quantize"}),
+    "palette-l9":      ("png", {"palette": "quantize", "compress_level": 9}),
+    "palette-l9-filt": ("png", {"palette": "quantize", "compress_level": 9,
+                                "strategy": "filtered"}),
+    "webp-lossless":   ("webp", {}),
+}
+DEFAULT_ENCODE_REPORT = os.path.join(".cache", "encode-report.json")
+
+
+def to_palette(img, mode):
+    """RGB → mode P; "exact" hanya kalau warna ≤ 256 (tanpa perubahan piksel), selain itu None"""
+    Image = pil()[0]
+    if mode == "exact":
+        colors = img.getcolors(256)
+        if colors is None:
+            return None
+        palette = Image.new("P", (1, 1))
+        palette.putpalette([c for _, rgb in colors for c in rgb])
+        return img.quantize(palette=palette, dither=Image.Dither.NONE)
+    return img.quantize(256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+
+
+def encode_image(img, fmt="png", encoding=None):
+    """Image Pillow → bytes PNG/WebP sesuai opsi encoding"""
+    enc = dict(DEFAULT_ENCODING, **(encoding or {}))
+    buf = io.BytesIO()
+    if fmt == "webp":
+        img.save(buf, "WEBP", lossless=True)
+        return buf.getvalue()
+    if enc["palette"] != "off":
+        img = to_palette(img, enc["palette"]) or img
+    params = {"dpi": (150, 150)}
+    if enc["compress_level"] is not None:
+        params["compress_level"] = enc["compress_level"]
+    if enc["strategy"] != "default":
+        params["compress_type"] = ZLIB_STRATEGIES[enc["strategy"]]
+    img.save(buf, "PNG", **params)
+    return buf.getvalue()
+
+
+def write_output(output, data):
+    """Tulis bytes ke path atau file-like → False kalau file sudah berisi byte yang sama"""
+    if hasattr(output, "write"):
+        output.write(data)
+        return True
+    try:
+        if os.path.getsize(output) == len(data):
+            with open(output, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(output, "wb") as f:
+        f.write(data)
+    return True
+
+
+def replace_output(tmp, output):
+    """Pindahkan tmp ke output → False (tmp dibuang) kalau output sudah berisi byte yang sama
+
+    Versi write_output untuk hasil yang di-stream ke file (save_tiled_png);
+    dibandingkan per blok, tanpa membaca seluruh file ke memori.
+    """
+    try:
+        if os.path.getsize(output) == os.path.getsize(tmp):
+            with open(tmp, "rb") as a, open(output, "rb") as b:
+                while True:
+                    chunk = a.read(1 << 20)
+                    if chunk != b.read(1 << 20):
+                        break
+                    if not chunk:
+                        os.remove(tmp)
+                        return False
+    except OSError:
+        pass
+    os.replace(tmp, output)
+    return True
 
-    # Header
-    draw.rectangle([(0, 0), (canvas_w, 52)], fill="#2C3E50")
-    draw.text((PADDING, 15), name, fill="#FFFFFF", font=bold_font)
 
-    ox, oy = -min_x, -min_y
-    id_map = {n["id"]: n for n in nodes if n.get("id")}
+def compare_encodings(img):
+    """Encode img dengan semua ENCODE_CANDIDATES → {nama: {"bytes", "seconds"}}"""
+    result = {}
+    for name, (fmt, enc) in ENCODE_CANDIDATES.items():
+        if fmt == "webp" and max(img.size) > WEBP_MAX_SIZE:
+            continue
+        start = time.perf_counter()
+        size = len(encode_image(img, fmt, enc))
+        result[name] = {"bytes": size, "seconds": time.perf_counter() - start}
+    return result
+
+
+# ─── VARIANT RESOLUSI ─────────────────────────────────────────────────────────
+# Satu render → beberapa ukuran (full, medium, thumbnail untuk portal docs).
+# Raster di-downsample LANCZOS dari kanvas penuh (mode tile: per band, ikut
+# di-stream), SVG cukup ditulis ulang dengan width/height lain.
+# Nama file: <diagram>@<variant>.<ext>; daftar ukuran di VARIANT_INDEX_NAME.
+
+VARIANT_INDEX_NAME = "variants.json"
+DEFAULT_VARIANTS = "medium=0.5,thumb=320px"
+
+
+def parse_variants(text):
+    """"medium=0.5,thumb=320px" → [{"name", "scale"} atau {"name", "width"}]"""
+    variants = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if not re.fullmatch(r"[a-zA-Z0-9_\-]+", name) or name == "full":
+            raise argparse.ArgumentTypeError(f"nama variant tidak valid: '{name}'")
+        try:
+            if value.endswith("px"):
+                spec = {"name": name, "width": int(value[:-2])}
+            else:
+                spec = {"name": name, "scale": float(value)}
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"ukuran variant '{part}' harus FAKTOR atau LEBARpx")
+        if spec.get("scale", spec.get("width")) <= 0:
+            raise argparse.ArgumentTypeError(f"ukuran variant '{part}' harus > 0")
+        variants.append(spec)
+    if len({v["name"] for v in variants}) != len(variants):
+        raise argparse.ArgumentTypeError("nama variant ganda")
+    return variants
+
+
+def variant_size(width, height, spec):
+    """Ukuran variant — tidak pernah lebih besar dari kanvas penuh"""
+    factor = min(spec["scale"] if "scale" in spec else spec["width"] / width, 1.0)
+    return max(1, round(width * factor)), max(1, round(height * factor))
+
+
+def variant_path(output_path, name):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}@{name}{ext}"
+
+
+def save_variants(canvas, fmt, output_path, variants, width, height, encoding=None):
+    """Tulis semua variant dari kanvas yang sudah digambar → {nama: {file, width, height}}"""
+    result = {}
+    for spec in variants:
+        size = variant_size(width, height, spec)
+        if fmt == "svg":
+            data = canvas.tobytes(size=size)
+        else:
+            data = encode_image(canvas.img.resize(size, pil()[0].Resampling.LANCZOS), fmt, encoding)
+        path = variant_path(output_path, spec["name"])
+        write_output(path, data)
+        result[spec["name"]] = {"file": os.path.basename(path), "width": size[0], "height": size[1]}
+    return result
+
+
+def write_variant_index(output_folder, manifest):
+    """Tulis VARIANT_INDEX_NAME dari entri manifest yang punya variant"""
+    index = {out_name: {"diagram": entry.get("diagram"), "variants": entry["variants"]}
+             for out_name, entry in sorted(manifest.get("outputs", {}).items())
+             if entry.get("variants")}
+    path = os.path.join(output_folder, VARIANT_INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"outputs": index}, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def build_encode_report(per_diagram, current, tiled=()):
+    """{nama diagram: compare_encodings(...)} → laporan total per opsi encoding
+
+    tiled: diagram yang di-render per band — tidak punya gambar utuh untuk
+    di-encode ulang, jadi tidak masuk total (dicatat terpisah).
+    """
+    totals = {}
+    for results in per_diagram.values():
+        for name, r in results.items():
+            t = totals.setdefault(name, {"bytes": 0, "seconds": 0.0, "diagrams": 0})
+            t["bytes"] += r["bytes"]
+            t["seconds"] += r["seconds"]
+            t["diagrams"] += 1
+    for t in totals.values():
+        t["seconds"] = round(t["seconds"], 4)
+    return {"current": current, "diagrams": len(per_diagram),
+            "totals": dict(sorted(totals.items(), key=lambda kv: kv[1]["bytes"])),
+            "per_diagram": per_diagram, "tiled": sorted(tiled)}
+
+
+def print_encode_report(report):
+    base = report["totals"].get("png", {}).get("bytes") or 1
+    print(f"\n📦 Encoding ({report['diagrams']} diagram):")
+    for name, t in report["totals"].items():
+        print(f"  {name:<16} {t['bytes'] / 1024:>10.1f} KiB  {t['bytes'] / base:>6.1%}  "
+              f"{t['seconds']:>7.2f}s")
+    if report.get("tiled"):
+        print(f"  ({len(report['tiled'])} diagram di-render per band — tidak diukur)")
+
+
+class TranslatedDraw:
+    """Proxy ImageDraw yang menggeser semua koordinat (untuk render per tile)"""
+
+    def __init__(self, draw, dx, dy):
+        self._draw, self.dx, self.dy = draw, dx, dy
+
+    def _pts(self, xy):
+        dx, dy = self.dx, self.dy
+        if xy and isinstance(xy[0], (tuple, list)):
+            return [(x + dx, y + dy) for x, y in xy]
+        return [v + (dx if i % 2 == 0 else dy) for i, v in enumerate(xy)]
+
+    def line(self, xy, **kw):
+        self._draw.line(self._pts(xy), **kw)
+
+    def polygon(self, xy, **kw):
+        self._draw.polygon(self._pts(xy), **kw)
+
+    def rectangle(self, xy, **kw):
+        self._draw.rectangle(self._pts(xy), **kw)
+
+    def ellipse(self, xy, **kw):
+        self._draw.ellipse(self._pts(xy), **kw)
+
+    def text(self, xy, text, **kw):
+        self._draw.text((xy[0] + self.dx, xy[1] + self.dy), text, **kw)
+
+    def textbbox(self, xy, text, **kw):
+        return self._draw.textbbox(xy, text, **kw)
+
+
+def layout_diagram(diagram, elements_map, viewport=None):
+    """Kumpulkan node/koneksi dan hitung ukuran kanvas → dict layout, atau None
+
+    viewport (x, y, w, h) dalam koordinat diagram: kanvas hanya memuat area itu.
+    """
+    if isinstance(diagram, StreamedDiagram):
+        nodes, connections = diagram.nodes, diagram.connections
+    else:
+        nodes, connections = collect_all(diagram, elements_map)
+    if not nodes:
+        return None
 
-    # Gambar koneksi dulu
-    seen = set()
+    if viewport:
+        min_x, min_y, vw, vh = viewport
+        width = int(vw * SCALE) + PADDING * 2
+        height = int(vh * SCALE) + PADDING * 2 + 70
+    else:
+        min_x = min(n.x for n in nodes)
+        min_y = min(n.y for n in nodes)
+        max_x = max(n.x + n.w for n in nodes)
+        max_y = max(n.y + n.h for n in nodes)
+        width = max(int((max_x - min_x) * SCALE) + PADDING * 2, MIN_W)
+        height = max(int((max_y - min_y) * SCALE) + PADDING * 2 + 70, MIN_H)
+
+    # Urutan gambar: node besar dulu (background); koneksi duplikat dibuang
+    id_map = {n.id: n for n in nodes if n.id}
+    edges, seen = [], set()
     for conn in connections:
-        key = (conn["source"], conn["target"])
+        key = (conn.source, conn.target)
         if key in seen:
             continue
         seen.add(key)
-        src = id_map.get(conn["source"])
-        tgt = id_map.get(conn["target"])
+        src = id_map.get(conn.source)
+        tgt = id_map.get(conn.target)
         if src and tgt:
-            draw_connection(draw, conn, src, tgt, ox, oy)
+            edges.append((conn, src, tgt))
+
+    return {
+        "name": diagram.get("name", "Untitled"),
+        "nodes": sorted(nodes, key=lambda n: n.w * n.h, reverse=True),
+        "connections": connections,
+        "edges": edges,
+        "width": width,
+        "height": height,
+        "ox": -min_x,
+        "oy": -min_y,
+    }
+
+
+def node_rect(n, ox, oy):
+    x1 = int((n.x + ox) * SCALE) + PADDING
+    y1 = int((n.y + oy) * SCALE) + PADDING + 60
+    return x1, y1, x1 + int(n.w * SCALE), y1 + int(n.h * SCALE)
+
+
+def spatial_index(layout):
+    """Grid index (koordinat kanvas) atas node, dibangun sekali per layout"""
+    if "index" not in layout:
+        from spatial import GridIndex
+
+        ox, oy = layout["ox"], layout["oy"]
+        layout["index"] = GridIndex.build(node_rect(n, ox, oy) for n in layout["nodes"])
+    return layout["index"]
+
+
+def visible_nodes(layout, region):
+    """Node yang beririsan dengan region (koordinat kanvas)"""
+    return [layout["nodes"][i] for i in spatial_index(layout).query(region, margin=2)]
+
+
+def _intersects(rect, region):
+    return (region is None or
+            (rect[0] <= region[2] and rect[2] >= region[0] and
+             rect[1] <= region[3] and rect[3] >= region[1]))
+
+
+def paint_diagram(draw, layout, font, bold_font, region=None):
+    """Gambar layout ke `draw`; region (x1, y1, x2, y2) = hanya yang beririsan"""
+    canvas_w = layout["width"]
+    ox, oy = layout["ox"], layout["oy"]
+    nodes = layout["nodes"]
+    if region is not None:
+        nodes = visible_nodes(layout, region)
+
+    # Header
+    if _intersects((0, 0, canvas_w, 52), region):
+        draw.rectangle([(0, 0), (canvas_w, 52)], fill="#2C3E50")
+        draw.text((PADDING, 15), layout["name"], fill="#FFFFFF", font=bold_font)
+
+    # Gambar koneksi dulu (draw list dikompilasi sekali, dipakai ulang per tile)
+    theme = layout.get("theme") or load_theme()
+    if "drawlist" not in layout:
+        layout["drawlist"] = compile_connections(layout, theme)
+    layout["drawlist"].flush(draw, region)
 
     # Gambar node (besar dulu = background)
-    for n in sorted(nodes, key=lambda n: n["w"] * n["h"], reverse=True):
-        x1 = int((n["x"] + ox) * SCALE) + PADDING
-        y1 = int((n["y"] + oy) * SCALE) + PADDING + 60
-        x2 = x1 + int(n["w"] * SCALE)
-        y2 = y1 + int(n["h"] * SCALE)
+    for n in nodes:
+        x1, y1, x2, y2 = node_rect(n, ox, oy)
 
-        fill, border = get_colors(n["type"])
+        fill, border = theme.node_style(n)
         draw.rectangle([x1, y1, x2, y2], fill=fill, outline=border, width=2)
 
-        label = n["label"] or n["type"] or "?"
-        lines = wrap_text(label, max_chars=max(8, int(n["w"] * SCALE / 8)))
+        label = n.label or n.type or "?"
+        lines, widths = LABEL_CACHE.layout(label, max(8, int(n.w * SCALE / 8)),
+                                           font, draw)
         line_h = FONT_SIZE + 4
         total_h = len(lines) * line_h
         ty_s = y1 + max(6, (y2 - y1 - total_h) // 2)
-        for line in lines:
-            try:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                tw = bbox[2] - bbox[0]
-            except Exception:
-                tw = len(line) * 7
+        for line, tw in zip(lines, widths):
             draw.text((x1 + max(4, (x2 - x1 - tw) // 2), ty_s),
                       line, fill="#1a1a1a", font=font)
             ty_s += line_h
 
-    img.save(output_path, "PNG", dpi=(150, 150))
-    print(f"  ✅ {output_path} ({len(nodes)} nodes, {len(connections)} koneksi)")
+
+def save_tiled_png(layout, output, font, bold_font, tile_size, stats=None, encoding=None,
+                   variants=()):
+    """Render per band setinggi `tile_size` dan stream ke PNG — memori ~ 1 band
+
+    Dari opsi encoding hanya level/strategi zlib yang dipakai (palette butuh
+    seluruh gambar). variants = [(path, (w, h))]: tiap band juga di-downsample
+    ke writer variant masing-masing. Path ditulis lewat file .tmp lalu
+    replace_output → False kalau output sudah berisi byte yang sama.
+    """
+    enc = dict(DEFAULT_ENCODING, **(encoding or {}))
+    level = 6 if enc["compress_level"] is None else enc["compress_level"]
+    targets = [p for p in [output, *(path for path, _ in variants)] if not hasattr(p, "write")]
+    try:
+        _stream_tiled_png(layout, output, font, bold_font, tile_size, stats, enc, level,
+                          variants)
+    except BaseException:
+        for path in targets:
+            with contextlib.suppress(OSError):
+                os.remove(path + ".tmp")
+        raise
+    written = {path: replace_output(path + ".tmp", path) for path in targets}
+    return written.get(output, True)
+
+
+def _stream_tiled_png(layout, output, font, bold_font, tile_size, stats, enc, level, variants):
+    from png_stream import PngStreamWriter
+
+    Image, ImageDraw, _ = pil()
+    width, height = layout["width"], layout["height"]
+    with contextlib.ExitStack() as stack:
+        fp = output if hasattr(output, "write") else stack.enter_context(open(output + ".tmp",
+                                                                              "wb"))
+        writer = PngStreamWriter(fp, width, height, dpi=150, level=level,
+                                 strategy=ZLIB_STRATEGIES[enc["strategy"]])
+        scaled = [(PngStreamWriter(stack.enter_context(open(path + ".tmp", "wb")), *size,
+                                   dpi=150, level=level,
+                                   strategy=ZLIB_STRATEGIES[enc["strategy"]]),
+                   size) for path, size in variants]
+        for top in range(0, height, tile_size):
+            band_h = min(tile_size, height - top)
+            with stage(stats, "draw"):
+                band = Image.new("RGB", (width, band_h), "#FFFFFF")
+                draw = TranslatedDraw(ImageDraw.Draw(band), 0, -top)
+                paint_diagram(draw, layout, font, bold_font,
+                              region=(0, top, width, top + band_h))
+            with stage(stats, "encode"):
+                writer.write_band(band.tobytes())
+            with stage(stats, "variants"):
+                for vwriter, (vw, vh) in scaled:
+                    y0, y1 = round(top * vh / height), round((top + band_h) * vh / height)
+                    if y1 > y0:
+                        vwriter.write_band(band.resize((vw, y1 - y0),
+                                                       Image.Resampling.LANCZOS).tobytes())
+            del band, draw
+        with stage(stats, "encode"):
+            writer.close()
+            for vwriter, _ in scaled:
+                vwriter.close()
+
+
+def draw_diagram(diagram, elements_map, output_path, font, bold_font, fmt="png",
+                 tile_size=None, viewport=None, encoding=None, encode_report=False,
+                 variants=None, theme=None, stats=None, log=None):
+    """Render satu diagram ke output_path (path atau file-like)
+
+    stats (dict, opsional) diisi waktu per stage, jumlah node/koneksi, ukuran
+    kanvas, ukuran output dan apakah file ditulis (False = byte sama) —
+    dipakai oleh --profile. encode_report=True menambahkan stats["encodings"]
+    (ukuran/waktu semua ENCODE_CANDIDATES) untuk gambar raster tidak bertile.
+    variants (hasil parse_variants) hanya dipakai kalau output_path berupa path;
+    ukurannya masuk stats["variants"]. theme: hasil load_theme() (default:
+    theme default di THEMES_PATH). log: file-like untuk pesan [skip]/[warn]/✅
+    (default: stdout) — pemanggil yang ingin senyap memberi sink sendiri,
+    bukan mengalihkan sys.stdout (global, tidak aman antar thread).
+    """
+    with stage(stats, "collect"):
+        layout = layout_diagram(diagram, elements_map, viewport)
+    name = diagram.get("name", "Untitled")
+    if layout is None:
+        print(f"  [skip] '{name}' — tidak ada elemen visual", file=log)
+        return False
+    layout["theme"] = theme
+
+    canvas_w, canvas_h = layout["width"], layout["height"]
+    region = None
+    if viewport:
+        region = (0, 0, canvas_w, canvas_h)
+        if not visible_nodes(layout, region):
+            print(f"  [skip] '{name}' — tidak ada elemen di viewport", file=log)
+            return False
+    if fmt == "png" and tile_size is None and canvas_w * canvas_h > TILE_AUTO_PIXELS:
+        tile_size = DEFAULT_TILE_SIZE
+        # Mode tile tidak punya seluruh gambar di memori (lihat save_tiled_png)
+        if (encoding or {}).get("palette", "off") != "off":
+            print(f"  [warn] '{name}': kanvas {canvas_w}x{canvas_h} di-render per band — "
+                  f"--palette diabaikan (RGB)", file=log)
+        if encode_report:
+            print(f"  [warn] '{name}': kanvas di-render per band — tidak masuk --encode-report",
+                  file=log)
+    written = True
+    if hasattr(output_path, "write"):
+        variants = None
+    sizes = {"full": {"file": os.path.basename(output_path), "width": canvas_w,
+                      "height": canvas_h}} if variants else None
+    if fmt == "png" and tile_size:
+        scaled = [(variant_path(output_path, v["name"]), variant_size(canvas_w, canvas_h, v))
+                  for v in variants or ()]
+        written = save_tiled_png(layout, output_path, font, bold_font, tile_size, stats,
+                                 encoding, scaled)
+        for v, (path, (vw, vh)) in zip(variants or (), scaled):
+            sizes[v["name"]] = {"file": os.path.basename(path), "width": vw, "height": vh}
+    else:
+        with stage(stats, "draw"):
+            canvas = make_canvas(fmt, canvas_w, canvas_h)
+            paint_diagram(canvas.draw, layout, font, bold_font, region)
+        with stage(stats, "encode"):
+            data = canvas.tobytes(encoding) if fmt != "svg" else canvas.tobytes()
+        written = write_output(output_path, data)
+        if variants:
+            with stage(stats, "variants"):
+                sizes.update(save_variants(canvas, fmt, output_path, variants,
+                                           canvas_w, canvas_h, encoding))
+        if encode_report and stats is not None and fmt != "svg":
+            stats["encodings"] = compare_encodings(canvas.img)
+        del canvas, data
+    if stats is not None:
+        stats.update(nodes=len(layout["nodes"]), connections=len(layout["connections"]),
+                     width=canvas_w, height=canvas_h, tiled=bool(fmt == "png" and tile_size),
+                     bytes=_output_size(output_path), written=written)
+        if sizes:
+            stats["variants"] = sizes
+    print(f"  ✅ {output_path} ({len(layout['nodes'])} nodes, "
+          f"{len(layout['connections'])} koneksi"
+          + ("" if written else ", byte sama — tidak ditulis ulang") + ")", file=log)
     return True
 
 
-def main():
+# ─── EXPORT INKREMENTAL ───────────────────────────────────────────────────────
+
+def file_digest(path, cache):
+    """SHA-1 isi file, di-cache per run"""
+    if path not in cache:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                h.update(chunk)
+        cache[path] = h.hexdigest()
+    return cache[path]
+
+
+def settings_digest(extra=None, theme=None):
+    """Hash setting renderer — kalau berubah, semua diagram di-render ulang"""
+    settings = {
+        "RENDER_REVISION": RENDER_REVISION, "extra": extra or {},
+        "SCALE": SCALE, "PADDING": PADDING, "MIN_W": MIN_W, "MIN_H": MIN_H,
+        "FONT_SIZE": FONT_SIZE, "TITLE_FONT_SIZE": TITLE_FONT_SIZE,
+        "FONT_PATHS": [p for p in FONT_PATHS if os.path.exists(p)],
+        "THEME": (theme or load_theme()).digest,
+    }
+    blob = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()
+
+
+def model_relpath(path, model_folder):
+    return os.path.relpath(path, model_folder).replace(os.sep, "/")
+
+
+def diagram_dependencies(diagram, path, elements_map, model_folder, cache):
+    """Hash diagram XML + semua file elemen/relasi yang di-href olehnya"""
+    deps = {model_relpath(path, model_folder): file_digest(path, cache)}
+    if isinstance(diagram, StreamedDiagram):
+        refs = diagram.refs
+    else:
+        refs = (sub.get("href").split("#")[-1] for sub in diagram.iter()
+                if "#" in sub.get("href", ""))
+    for ref_id in refs:
+        edata = elements_map.get(ref_id)
+        if edata and edata.get("path"):
+            if edata.get("sha1"):
+                cache.setdefault(edata["path"], edata["sha1"])
+            deps[model_relpath(edata["path"], model_folder)] = file_digest(edata["path"], cache)
+        else:
+            # Referensi belum ada — dicatat supaya penambahannya memicu render ulang
+            deps["#" + ref_id] = None
+    return deps
+
+
+def load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(output_folder, manifest):
+    """Tulis manifest (tidak ditulis ulang kalau isinya sama)"""
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    data = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_render_times(path):
+    """{relpath diagram: detik render terakhir} dari DEFAULT_RENDER_TIMES"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            times = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {k: v for k, v in times.items() if isinstance(v, (int, float))} \
+        if isinstance(times, dict) else {}
+
+
+def save_render_times(path, times):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(times, f, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(manifest, out_name, deps, settings, output_folder):
+    if manifest.get("settings") != settings:
+        return False
+    entry = manifest.get("outputs", {}).get(out_name)
+    if not entry or entry.get("deps") != deps:
+        return False
+    if entry.get("rendered"):
+        # Variant (--variants) juga harus masih ada; "full" = out_name sendiri
+        names = {out_name} | {v["file"] for v in entry.get("variants", {}).values()}
+        return all(os.path.exists(os.path.join(output_folder, n)) for n in names)
+    return True
+
+
+# ─── PIPELINE RENDER ──────────────────────────────────────────────────────────
+# discover → parse → collect → draw → free: paling banyak satu tree diagram
+# (atau satu per job yang sedang jalan) hidup di memori.
+
+_worker = {}
+
+
+def _init_worker(elements_map, opts, label_cache_path=None, profile=False, model_folder=None):
+    """Initializer pool: elements_map dan font dikirim sekali per worker"""
+    _worker["elements_map"] = elements_map
+    _worker["model_folder"] = model_folder
+    _worker["digests"] = {}
+    _worker["fonts"] = load_fonts()
+    _worker["opts"] = opts
+    _worker["profile"] = profile
+    if label_cache_path:
+        LABEL_CACHE.load(label_cache_path)
+        # Hanya di sini miss dikirim balik ke proses utama (lihat _render_in_worker)
+        LABEL_CACHE.track_new = True
+
+
+def _render_one(diagram, elements_map, out, fonts, opts, profile=False):
+    """Render satu diagram → (ok, log, error, info)
+
+    Log ditangkap supaya bisa dicetak berurutan; info berisi statistik
+    (hit/miss label cache, durasi render, dan stats --profile) untuk proses utama.
+    """
+    log = io.StringIO()
+    hits, misses = LABEL_CACHE.hits, LABEL_CACHE.misses
+    stats = {}
+    start = time.perf_counter()
+    try:
+        ok = draw_diagram(diagram, elements_map, out, *fonts, stats=stats, log=log, **opts)
+        error = None
+    except Exception as e:
+        ok, error = False, f"{type(e).__name__}: {e}"
+    info = {"label_hits": LABEL_CACHE.hits - hits,
+            "label_misses": LABEL_CACHE.misses - misses,
+            "seconds": time.perf_counter() - start,
+            "written": stats.get("written"),
+            "tiled": stats.get("tiled"),
+            "encodings": stats.pop("encodings", None),
+            "variants": stats.pop("variants", None)}
+    if profile:
+        info["stats"] = stats
+    return ok, log.getvalue(), error, info
+
+
+def referenced_elements(diagram, elements_map):
+    """Subset elements_map yang di-href diagram (cukup untuk me-render-nya)"""
+    if isinstance(diagram, StreamedDiagram):
+        ids = diagram.refs
+    else:
+        ids = (sub.get("href").split("#")[-1] for sub in diagram.iter()
+               if "#" in sub.get("href", ""))
+    return {ref_id: elements_map[ref_id] for ref_id in ids if ref_id in elements_map}
+
+
+def render_bytes(diagram, elements_map, fonts, fmt="png", log=None, **opts):
+    """Render diagram ke memori → bytes (None kalau tidak ada yang digambar)
+
+    Pesan draw_diagram ditulis ke log (default: dibuang).
+    """
+    buf = io.BytesIO()
+    ok = draw_diagram(diagram, elements_map, buf, *fonts, fmt=fmt,
+                      log=io.StringIO() if log is None else log, **opts)
+    return buf.getvalue() if ok else None
+
+
+def _render_bytes_in_worker(diagram, elements_map, fmt):
+    """diagram: XML (bytes) atau StreamedDiagram (sudah tanpa DOM, di-pickle apa adanya)"""
+    if isinstance(diagram, bytes):
+        diagram = ET.fromstring(diagram)
+    data = render_bytes(diagram, elements_map, _worker["fonts"], fmt, **_worker["opts"])
+    # Server tidak mengumpulkan entri label baru — buang supaya tidak menumpuk
+    LABEL_CACHE.take_new()
+    return data
+
+
+def _load_and_render(path, out, elements_map, fonts, opts, model_folder, digests,
+                     profile=False):
+    """Parse diagram, hitung dependensinya, lalu render → (ok, log, error, info)
+
+    info["deps"] berisi dependensi untuk manifest; profile=True: stage
+    parse/deps ikut di info["stats"]["stages"].
+    """
+    timing = {} if profile else None
+    try:
+        with stage(timing, "parse"):
+            diagram = load_diagram(path, elements_map)
+        with stage(timing, "deps"):
+            deps = diagram_dependencies(diagram, path, elements_map, model_folder, digests)
+    except Exception as e:
+        return False, "", f"{type(e).__name__}: {e}", {}
+    result = _render_one(diagram, elements_map, out, fonts, opts, profile)
+    del diagram
+    result[3]["deps"] = deps
+    if profile:
+        stats = result[3]["stats"]
+        stats["stages"] = dict(timing["stages"], **stats.get("stages", {}))
+    return result
+
+
+def _render_in_worker(path, out):
+    result = _load_and_render(path, out, _worker["elements_map"], _worker["fonts"],
+                              _worker["opts"], _worker["model_folder"], _worker["digests"],
+                              _worker["profile"])
+    # Entri label baru dikirim balik supaya bisa disimpan oleh proses utama
+    result[3]["labels"] = LABEL_CACHE.take_new()
+    return result
+
+
+def output_name(diagram, fmt):
+    safe = re.sub(r'[^a-zA-Z0-9_\-]', '_', diagram.get("name", "Untitled"))
+    return f"{safe}.{fmt}"
+
+
+def resolve_output_names(paths, fmt):
+    """{path: nama view} untuk diagram yang di-export (hanya header yang dibaca)
+
+    View yang file output-nya ditimpa view lain dengan nama sama dibuang.
+
+    Export penuh menulis view bernama sama ke file yang sama, jadi hanya
+    view terakhir (urutan discover) yang tersisa. View sebelumnya dilewati
+    di sini, supaya tiap file output (dan entri manifest) punya satu pemilik
+    dan --incremental menghasilkan file yang sama dengan export penuh.
+    """
+    names = {}
+    for path in paths:
+        try:
+            names[path] = diagram_header(path)[1]
+        except ET.ParseError as e:
+            print(f"  [warn] {os.path.basename(path)}: {e}")
+    owner = {output_name({"name": name}, fmt): path for path, name in names.items()}
+    kept = {}
+    for path, name in names.items():
+        out_name = output_name({"name": name}, fmt)
+        if owner[out_name] == path:
+            kept[path] = name
+        else:
+            print(f"  [warn] '{name}' ({os.path.basename(path)}) dilewati — nama output "
+                  f"{out_name} juga dipakai {os.path.basename(owner[out_name])}")
+    return kept
+
+
+def stored_deps(manifest, out_name, path, elements_map, model_folder, known, cache):
+    """Dependensi entri manifest kalau semua file-nya masih sama, selain itu None
+
+    Diagram tidak perlu di-parse: selama file diagram sama, href-nya juga
+    sama, jadi cukup digest tiap file dependensi yang dibandingkan. known =
+    {relpath: sha1} dari elements_map (tanpa membaca file lagi).
+    """
+    deps = (manifest.get("outputs", {}).get(out_name) or {}).get("deps")
+    if not deps or model_relpath(path, model_folder) not in deps:
+        return None
+    for key, digest in deps.items():
+        if key.startswith("#"):
+            # Referensi yang dulu belum ada — sekarang ada → render ulang
+            edata = elements_map.get(key[1:])
+            if edata and edata.get("path"):
+                return None
+            continue
+        try:
+            current = known.get(key) or file_digest(
+                os.path.join(model_folder, *key.split("/")), cache)
+        except OSError:
+            return None
+        if current != digest:
+            return None
+    return deps
+
+
+def iter_jobs(names, elements_map, model_folder, output_folder, old_manifest, settings,
+              fmt="png", profile=False):
+    """Tentukan per diagram apakah perlu di-render ulang, tanpa mem-parse diagram
+
+    names: hasil resolve_output_names. Parse + hitung dependensi baru
+    dilakukan saat render (di worker untuk --jobs > 1).
+    profile=True: job["stages"] berisi waktu cek manifest.
+    """
+    known = {model_relpath(e["path"], model_folder): e["sha1"]
+             for e in elements_map.values() if e.get("path") and e.get("sha1")}
+    digests = {}
+    for path, dname in names.items():
+        out_name = output_name({"name": dname}, fmt)
+        timing = {} if profile else None
+        with stage(timing, "check"):
+            deps = old_manifest and stored_deps(old_manifest, out_name, path, elements_map,
+                                                model_folder, known, digests)
+            fresh = bool(deps) and is_up_to_date(old_manifest, out_name, deps, settings,
+                                                 output_folder)
+        job = {"name": dname, "path": path, "out_name": out_name,
+               "out": os.path.join(output_folder, out_name), "fresh": fresh}
+        if timing is not None:
+            job["stages"] = timing["stages"]
+        yield job
+
+
+def render_diagrams(jobs, elements_map, model_folder, n_jobs=1, opts=None,
+                    label_cache_path=None, profile=False):
+    """Yield (job, (ok, log, error, info)) dalam urutan `jobs`; job fresh → hasil None
+
+    Diagram di-parse oleh yang me-render (proses ini kalau serial, worker
+    kalau paralel) dan tree-nya dilepas begitu job selesai.
+    """
+    opts = opts or {}
+    if n_jobs <= 1:
+        fonts, digests = load_fonts(), {}
+        for job in jobs:
+            yield job, None if job["fresh"] else _load_and_render(
+                job["path"], job["out"], elements_map, fonts, opts, model_folder, digests,
+                profile)
+        return
+
+    window = deque()
+    with _RenderPool(n_jobs, (elements_map, opts, label_cache_path, profile,
+                              model_folder)) as pool:
+        for job in jobs:
+            window.append((job, None if job["fresh"] else pool.submit(job, window)))
+            # Batasi job yang menunggu supaya memori tetap terbatas
+            while len(window) > n_jobs * 2:
+                yield pool.collect(window)
+        while window:
+            yield pool.collect(window)
+
+
+class _RenderPool:
+    """Process pool render yang dibuat ulang kalau worker mati
+
+    Worker yang mati (segfault, OOM kill, os._exit) merusak seluruh
+    ProcessPoolExecutor: semua future yang belum selesai ikut gagal dengan
+    BrokenProcessPool. Pool lalu dibuat ulang dan job yang hilang dikirim
+    ulang. Job yang sudah dua kali ikut hilang di-render sendirian di pool
+    1 worker — kalau worker itu juga mati, berarti diagram itu penyebabnya
+    dan hanya job itu yang gagal.
+    """
+
+    def __init__(self, n_jobs, initargs):
+        self.n_jobs = n_jobs
+        self.initargs = initargs
+        self.restarts = 0
+        self.pool = self._new_pool(n_jobs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown(cancel_futures=True)
+
+    def _new_pool(self, workers):
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=self.initargs)
+
+    def submit(self, job, window):
+        try:
+            return self.pool.submit(_render_in_worker, job["path"], job["out"])
+        except BrokenProcessPool:
+            self.restart(window)
+            return self.pool.submit(_render_in_worker, job["path"], job["out"])
+
+    def collect(self, window):
+        """Hasil job terdepan di window → (job, result)"""
+        while True:
+            job, fut = window[0]
+            if fut is None:
+                window.popleft()
+                return job, None
+            try:
+                result = fut.result()
+            except BrokenProcessPool:
+                self.restart(window)
+                continue
+            except Exception as e:
+                result = False, "", f"{type(e).__name__}: {e}", {}
+            window.popleft()
+            return job, result
+
+    def restart(self, window):
+        """Buat pool baru dan kirim ulang job di window yang hilang bersama pool lama"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        lost = [i for i, (_, fut) in enumerate(window) if fut is not None and _lost(fut)]
+        self.pool = self._new_pool(self.n_jobs)
+        self.restarts += 1
+        print(f"  [warn] worker render mati — pool dibuat ulang, {len(lost)} diagram diulang",
+              flush=True)
+        for i in lost:
+            job = window[i][0]
+            job["crashes"] = job.get("crashes", 0) + 1
+            window[i] = (job, self._isolated(job) if job["crashes"] > 1
+                         else self.pool.submit(_render_in_worker, job["path"], job["out"]))
+
+    def _isolated(self, job):
+        """Render satu job di pool 1 worker → future yang sudah selesai"""
+        solo = self._new_pool(1)
+        try:
+            fut = solo.submit(_render_in_worker, job["path"], job["out"])
+            fut.exception()
+        finally:
+            solo.shutdown(wait=False, cancel_futures=True)
+        if not isinstance(fut.exception(), BrokenProcessPool):
+            return fut
+        done = Future()
+        done.set_result((False, "", "worker mati saat me-render diagram ini (BrokenProcessPool)",
+                         {}))
+        return done
+
+
+def _lost(fut):
+    """Future yang ikut gagal karena pool rusak (atau belum jalan sama sekali)"""
+    if not fut.done() or fut.cancelled():
+        return True
+    return isinstance(fut.exception(), BrokenProcessPool)
+
+
+def parse_viewport(text):
+    try:
+        x, y, w, h = (int(float(v)) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("format viewport: x,y,w,h")
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError("lebar/tinggi viewport harus > 0")
+    return x, y, w, h
+
+
+# ─── PROFIL RUN ───────────────────────────────────────────────────────────────
+
+PROFILE_VERSION = 1
+DEFAULT_PROFILE = os.path.join(".cache", "export-profile.json")
+
+
+def _round_stages(stages):
+    return {k: {"wall": round(v["wall"], 4), "cpu": round(v["cpu"], 4)}
+            for k, v in stages.items()}
+
+
+def profile_entry(job, stats):
+    """Satu baris laporan --profile per diagram (stage parse/deps + render)"""
+    stages = dict(job.get("stages", {}))
+    stages.update((stats or {}).get("stages", {}))
+    entry = {"name": job["name"], "path": job["path"], "output": job["out_name"],
+             "fresh": job["fresh"],
+             "wall": round(sum(v["wall"] for v in stages.values()), 4),
+             "cpu": round(sum(v["cpu"] for v in stages.values()), 4),
+             "stages": _round_stages(stages)}
+    for key in ("nodes", "connections", "width", "height", "tiled", "bytes"):
+        if stats and key in stats:
+            entry[key] = stats[key]
+    return entry
+
+
+def build_profile(run_stages, diagrams, **meta):
+    """Gabungkan stage run + per diagram → dict laporan JSON"""
+    totals = {}
+    for d in diagrams:
+        for name, t in d["stages"].items():
+            acc = totals.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            acc["wall"] += t["wall"]
+            acc["cpu"] += t["cpu"]
+    rendered = [d for d in diagrams if not d["fresh"]]
+    slowest = max(rendered, key=lambda d: d["wall"], default=None)
+    return dict(meta, version=PROFILE_VERSION,
+                run=_round_stages(run_stages), stages=_round_stages(totals),
+                slowest=slowest and slowest["name"],
+                diagrams=sorted(diagrams, key=lambda d: -d["wall"]))
+
+
+def profile_diagram(path, elements_map, opts, dump_path):
+    """Render ulang satu diagram di bawah cProfile (output dibuang) → dump pstats"""
+    import cProfile
+
+    diagram = load_diagram(path, elements_map)
+    fonts = load_fonts()
+    profiler = cProfile.Profile()
+    profiler.runcall(draw_diagram, diagram, elements_map, io.BytesIO(), *fonts,
+                     log=io.StringIO(), **opts)
+    parent = os.path.dirname(dump_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    profiler.dump_stats(dump_path)
+
+
+# ─── SHARDING ─────────────────────────────────────────────────────────────────
+# --shard i/N: setiap runner CI menghitung pembagian yang sama dari input yang
+# sama (file model + manifest/profil sebelumnya), lalu hanya me-render bagiannya.
+
+def parse_tile_size(text):
+    try:
+        size = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("tile size harus bilangan bulat")
+    if size <= 0:
+        raise argparse.ArgumentTypeError("tile size harus > 0")
+    return size
+
+
+def parse_shard(text):
+    try:
+        index, count = (int(v) for v in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("format shard: i/N (mis. 2/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("shard harus 1 <= i <= N")
+    return index, count
+
+
+def diagram_costs(paths, model_folder, times, profile_path=None):
+    """→ ({path: estimasi detik render}, True) atau ({path: byte XML}, False)
+
+    Sumber: waktu render sebelumnya (`times`, lihat load_render_times) atau
+    laporan --profile; diagram tanpa riwayat diestimasi dari ukuran file XML
+    dikali rata-rata detik/byte diagram yang punya riwayat. Tanpa riwayat
+    sama sekali, ukuran file XML langsung dipakai sebagai bobot.
+    """
+    timed = dict(times)
+    if profile_path:
+        try:
+            with open(profile_path, encoding="utf-8") as f:
+                report = json.load(f)
+            for d in report.get("diagrams", []):
+                if not d.get("fresh"):
+                    timed[model_relpath(d["path"], report.get("model", model_folder))] = d["wall"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  [warn] profil shard tidak bisa dibaca: {e}")
+    sizes = {p: os.path.getsize(p) for p in paths}
+    rels = {p: model_relpath(p, model_folder) for p in paths}
+    known = [p for p in paths if rels[p] in timed]
+    known_bytes = sum(sizes[p] for p in known)
+    rate = sum(timed[rels[p]] for p in known) / known_bytes if known_bytes else 1.0
+    return ({p: timed[rels[p]] if rels[p] in timed else sizes[p] * rate for p in paths},
+            bool(known_bytes))
+
+
+def shard_paths(paths, costs, index, count, fmt="png"):
+    """Bagi diagram ke `count` shard (LPT: terberat dulu ke shard teringan) → path shard `index`
+
+    Diagram dengan nama output sama selalu masuk shard yang sama, supaya
+    hasilnya sama dengan export tanpa shard (yang terakhir menimpa).
+    """
+    units = {}
+    for path in paths:
+        try:
+            _, name = diagram_header(path)
+        except ET.ParseError:
+            name = None
+        key = output_name({"name": name}, fmt) if name is not None else path
+        units.setdefault(key, []).append(path)
+    order = sorted(units.values(), key=lambda ps: (-sum(costs[p] for p in ps), ps[0]))
+    loads = [0.0] * count
+    assigned = {}
+    for group in order:
+        target = min(range(count), key=lambda i: (loads[i], i))
+        loads[target] += sum(costs[p] for p in group)
+        for p in group:
+            assigned[p] = target
+    return [p for p in paths if assigned[p] == index - 1], loads
+
+
+# ─── WATCH MODE ───────────────────────────────────────────────────────────────
+
+class WatchSession:
+    """Model + diagram yang tetap di memori; render ulang hanya view terdampak
+
+    users memetakan key dependensi (relpath file atau "#id" yang belum ada)
+    → set path diagram yang memakainya, sama dengan key di manifest.
+    """
+
+    def __init__(self, model_folder, output_folder, elements_map, manifest, opts):
+        self.model_folder = model_folder
+        self.output_folder = output_folder
+        self.elements_map = elements_map
+        self.manifest = manifest
+        self.opts = opts
+        self.fmt = opts.get("fmt", "png")
+        self.fonts = load_fonts()
+        self.by_path = {os.path.abspath(e["path"]): eid
+                        for eid, e in elements_map.items() if e.get("path")}
+        self.diagrams, self.outputs, self.deps, self.users = {}, {}, {}, {}
+        digests = {}
+        for path, diagram in iter_diagrams(discover_diagrams(model_folder),
+                                           elements_map=elements_map):
+            self._track(os.path.abspath(path), diagram, digests)
+
+    def _track(self, path, diagram, digests):
+        self._untrack(path)
+        deps = diagram_dependencies(diagram, path, self.elements_map, self.model_folder,
+                                    digests)
+        self.diagrams[path] = diagram
+        self.outputs[path] = output_name(diagram, self.fmt)
+        self.deps[path] = deps
+        for key in deps:
+            self.users.setdefault(key, set()).add(path)
+
+    def _untrack(self, path):
+        self.diagrams.pop(path, None)
+        self.outputs.pop(path, None)
+        for key in self.deps.pop(path, {}):
+            users = self.users.get(key)
+            if users:
+                users.discard(path)
+                if not users:
+                    del self.users[key]
+
+    def _drop_output(self, out_name):
+        entry = self.manifest["outputs"].pop(out_name, None) or {}
+        for name in [out_name] + [v["file"] for k, v in entry.get("variants", {}).items()
+                                  if k != "full"]:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.output_folder, name))
+
+    def apply(self, changed):
+        """Terapkan perubahan file ke memori → set path diagram yang perlu di-render"""
+        affected = set()
+        for path in sorted(os.path.abspath(p) for p in changed):
+            rel = model_relpath(path, self.model_folder)
+            top = rel.split("/", 1)[0]
+            if top == "diagrams":
+                if os.path.basename(path) != "folder.xml":
+                    affected.add(path)
+                continue
+            if top not in ELEMENT_FOLDERS:
+                continue
+            old_id = self.by_path.pop(path, None)
+            if old_id:
+                self.elements_map.pop(old_id, None)
+            entry = None
+            if os.path.exists(path):
+                try:
+                    entry = load_element_file(path)
+                except Exception as e:
+                    print(f"  [warn] {os.path.basename(path)}: {e}")
+            if entry:
+                self.elements_map[entry["id"]] = entry
+                self.by_path[path] = entry["id"]
+            affected |= self.users.get(rel, set())
+            for eid in {old_id, entry and entry["id"]} - {None}:
+                affected |= self.users.get("#" + eid, set())
+        return affected
+
+    def reload(self, path, digests):
+        """Parse ulang satu diagram → root baru (None kalau file hilang/gagal)"""
+        if not os.path.exists(path):
+            self._untrack(path)
+            return None
+        try:
+            diagram = load_diagram(path, self.elements_map)
+        except Exception as e:
+            print(f"  [warn] {os.path.basename(path)}: {e}")
+            return None
+        self._track(path, diagram, digests)
+        return diagram
+
+    def update(self, affected, changed, digests):
+        """Perbarui diagram terdampak → {path: root atau None (hilang/gagal)}
+
+        Hanya file diagram yang memang ada di `changed` yang di-parse ulang;
+        diagram yang terdampak karena file elemen/relasi berubah memakai DOM
+        di memori, cukup dependensinya yang dihitung ulang.
+        """
+        changed = {os.path.abspath(p) for p in changed}
+        result = {}
+        for path in sorted(affected):
+            # Label StreamedDiagram sudah diambil dari elements_map saat parse
+            if (path in changed or path not in self.diagrams
+                    or isinstance(self.diagrams[path], StreamedDiagram)):
+                result[path] = self.reload(path, digests)
+            else:
+                self._track(path, self.diagrams[path], digests)
+                result[path] = self.diagrams[path]
+        return result
+
+    def render(self, affected, changed=None):
+        """Render diagram terdampak, perbarui manifest → jumlah render
+
+        changed: file yang berubah (lihat update); None = parse ulang semua.
+        """
+        digests, count = {}, 0
+        old_outs = {path: self.outputs.get(path) for path in affected}
+        updated = self.update(affected, affected if changed is None else changed, digests)
+        for path, diagram in updated.items():
+            old_out = old_outs[path]
+            if diagram is None:
+                if old_out and path not in self.diagrams:
+                    self._drop_output(old_out)
+                    print(f"  [hapus] {old_out}")
+                continue
+            out_name = self.outputs[path]
+            if old_out and old_out != out_name:
+                self._drop_output(old_out)
+            print(f"→ {diagram.get('name', 'Untitled')}")
+            rendered, log, error, info = _render_one(
+                diagram, self.elements_map, os.path.join(self.output_folder, out_name),
+                self.fonts, self.opts)
+            sys.stdout.write(log)
+            if error:
+                print(f"  ❌ [error] '{diagram.get('name', 'Untitled')}': {error}")
+                continue
+            self.manifest["outputs"][out_name] = {
+                "diagram": model_relpath(path, self.model_folder),
+                "deps": self.deps[path],
+                "rendered": rendered,
+            }
+            if info.get("variants"):
+                self.manifest["outputs"][out_name]["variants"] = info["variants"]
+            count += 1
+        return count
+
+    def run(self, interval=None, polling=False):
+        from model_watch import DEFAULT_INTERVAL, make_watcher
+
+        with make_watcher(self.model_folder, interval or DEFAULT_INTERVAL, polling) as watcher:
+            print(f"\n👀 Watch ({watcher.name}): {len(self.diagrams)} diagram di memori — "
+                  f"Ctrl+C untuk berhenti")
+            try:
+                while True:
+                    changed = watcher.wait()
+                    start = time.perf_counter()
+                    affected = self.apply(changed)
+                    if not affected:
+                        continue
+                    count = self.render(affected, changed)
+                    save_manifest(self.output_folder, self.manifest)
+                    if self.opts.get("variants"):
+                        write_variant_index(self.output_folder, self.manifest)
+                    print(f"⚡ {count} diagram di-render ulang "
+                          f"({len(changed)} file berubah) dalam "
+                          f"{(time.perf_counter() - start) * 1000:.0f} ms", flush=True)
+            except KeyboardInterrupt:
+                print("\n👋 Watch dihentikan")
+
+
+# ─── API ──────────────────────────────────────────────────────────────────────
+#
+#   import export_png
+#   model = export_png.load_model("model")
+#   png = export_png.render(model, "id-3d8ec848...", "png")   # → bytes
+
+class Model:
+    """Model Grafico di memori; dibuat lewat load_model()"""
+
+    def __init__(self, folder, elements_map, diagrams, warnings=()):
+        self.folder = folder
+        self.elements_map = elements_map
+        self.diagrams = diagrams          # {id: {"id", "name", "path"}}
+        self.warnings = list(warnings)
+
+    def views(self):
+        return sorted(self.diagrams.values(), key=lambda d: (d["name"], d["id"]))
+
+    def find(self, diagram_id):
+        """Info diagram berdasarkan id, atau nama kalau nama itu unik"""
+        if diagram_id in self.diagrams:
+            return self.diagrams[diagram_id]
+        matches = [d for d in self.diagrams.values() if d["name"] == diagram_id]
+        if len(matches) == 1:
+            return matches[0]
+        raise KeyError(f"diagram tidak ditemukan: {diagram_id}")
+
+    def parse(self, diagram_id):
+        return ET.parse(self.find(diagram_id)["path"]).getroot()
+
+
+def diagram_header(path):
+    """(id, name) dari elemen root diagram tanpa mem-parse seluruh file"""
+    with open(path, "rb") as f:
+        for _, elem in ET.iterparse(f, events=("start",)):
+            return elem.get("id"), elem.get("name", "Untitled")
+    return None, None
+
+
+def load_model(path, index_path=None):
+    """Baca model Grafico → Model; tidak menulis file dan tidak mencetak log
+
+    Diagram belum di-parse penuh (hanya id/nama); elemen dibaca semua.
+    Peringatan parse disimpan di Model.warnings.
+    """
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Folder model tidak ditemukan: {path}")
+    log = io.StringIO()
+    elements_map = load_model_elements(path, index_path, log)
+    paths = discover_diagrams(path, log)
+    diagrams = {}
+    for dpath in paths:
+        try:
+            did, name = diagram_header(dpath)
+        except ET.ParseError as e:
+            print(f"  [warn] {os.path.basename(dpath)}: {e}", file=log)
+            continue
+        if did:
+            diagrams[did] = {"id": did, "name": name, "path": dpath}
+    warnings = [line.strip() for line in log.getvalue().splitlines() if "[warn]" in line]
+    return Model(path, elements_map, diagrams, warnings)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_fonts():
+    return load_fonts()
+
+
+def render(model, diagram_id, fmt="png", tile_size=None, viewport=None):
+    """Render satu diagram ke memori → bytes PNG/SVG
+
+    KeyError kalau diagram tidak ada, ValueError kalau format tidak dikenal
+    atau diagram tidak punya elemen visual (di dalam viewport).
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"format tidak dikenal: {fmt} (pilih: {', '.join(OUTPUT_FORMATS)})")
+    diagram = load_diagram(model.find(diagram_id)["path"], model.elements_map)
+    data = render_bytes(diagram, model.elements_map, cached_fonts(), fmt,
+                        tile_size=tile_size, viewport=viewport)
+    if data is None:
+        raise ValueError(f"diagram '{diagram.get('name', 'Untitled')}' tidak punya elemen visual")
+    return data
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export diagram ArchiMate (Grafico) ke PNG/SVG")
+    ap.add_argument("--incremental", action="store_true",
+                    help=f"Lewati diagram yang dependensinya tidak berubah (manifest: {MANIFEST_NAME})")
+    ap.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                    help="Jumlah proses render paralel (default: 1, 0 = semua core)")
+    ap.add_argument("--index", nargs="?", const=DEFAULT_INDEX, default=None, metavar="PATH",
+                    help=f"Pakai index model persisten (default: {DEFAULT_INDEX})")
+    ap.add_argument("--format", choices=OUTPUT_FORMATS, default="png", dest="fmt",
+                    help="Format output: png (raster Pillow), svg (vektor) atau webp (lossless)")
+    ap.add_argument("--tile-size", type=parse_tile_size, default=None, metavar="PX",
+                    help="Render PNG per band setinggi PX piksel (memori terbatas); "
+                         f"otomatis untuk kanvas > {TILE_AUTO_PIXELS:,} piksel")
+    ap.add_argument("--palette", choices=PALETTE_MODES, default="off",
+                    help="PNG mode palette: exact (≤ 256 warna, tanpa perubahan piksel, "
+                         "selain itu tetap RGB) atau quantize (256 warna, lossy)")
+    ap.add_argument("--compress-level", type=int, choices=range(10), default=None, metavar="0-9",
+                    help="Level zlib PNG (default Pillow: 6)")
+    ap.add_argument("--zlib-strategy", choices=list(ZLIB_STRATEGIES), default="default",
+                    help="Strategi zlib PNG (default: default)")
+    ap.add_argument("--encode-report", nargs="?", const=DEFAULT_ENCODE_REPORT, default=None,
+                    metavar="PATH",
+                    help="Bandingkan ukuran/waktu encode semua opsi per diagram → JSON "
+                         f"(default: {DEFAULT_ENCODE_REPORT}); output tetap pakai opsi yang dipilih")
+    ap.add_argument("--variants", nargs="?", type=parse_variants, const=DEFAULT_VARIANTS,
+                    default=None, metavar="SPEC",
+                    help="Tulis juga variant resolusi lain dari render yang sama, mis. "
+                         f"'{DEFAULT_VARIANTS}' (default) → Nama@medium.png, Nama@thumb.png "
+                         f"+ {VARIANT_INDEX_NAME}")
+    ap.add_argument("--theme", default=None, metavar="NAMA",
+                    help="Theme warna/style relasi (default: \"default\" di themes.json)")
+    ap.add_argument("--themes", default=THEMES_PATH, metavar="PATH",
+                    help="File theme (default: tools/archi_export/themes.json)")
+    ap.add_argument("--viewport", type=parse_viewport, default=None, metavar="X,Y,W,H",
+                    help="Export hanya area ini (koordinat diagram)")
+    ap.add_argument("--label-cache", nargs="?", const=DEFAULT_LABEL_CACHE, default=None,
+                    metavar="PATH",
+                    help=f"Simpan cache layout label antar run (default: {DEFAULT_LABEL_CACHE})")
+    ap.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE, default=None, metavar="PATH",
+                    help=f"Tulis laporan waktu per stage/diagram ke JSON (default: {DEFAULT_PROFILE})")
+    ap.add_argument("--profile-dump", default=None, metavar="PATH",
+                    help="Render ulang diagram paling lambat di bawah cProfile → file pstats")
+    ap.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                    help="Render hanya bagian ke-I dari N (seimbang per waktu render); "
+                         "gabungkan hasilnya dengan scripts/merge_exports.py")
+    ap.add_argument("--shard-costs", default=None, metavar="PATH",
+                    help="Laporan --profile sebelumnya sebagai bobot shard "
+                         "(default: waktu render di --render-times, lalu ukuran XML)")
+    ap.add_argument("--render-times", default=DEFAULT_RENDER_TIMES, metavar="PATH",
+                    help=f"File waktu render per diagram untuk --shard (default: {DEFAULT_RENDER_TIMES})")
+    ap.add_argument("--watch", action="store_true",
+                    help="Setelah export, pantau folder model dan render ulang view yang berubah")
+    ap.add_argument("--watch-interval", type=float, default=None, metavar="DETIK",
+                    help="Interval polling untuk --watch (default: 0.5)")
+    ap.add_argument("--watch-polling", action="store_true",
+                    help="Paksa polling walau inotify tersedia")
+    args = ap.parse_args(argv)
+    if args.tile_size is not None:
+        # save_tiled_png hanya menulis PNG RGB per band, tanpa gambar utuh di memori
+        if args.fmt != "png":
+            ap.error(f"--tile-size hanya untuk --format png (bukan {args.fmt})")
+        if args.palette != "off":
+            ap.error("--palette tidak bisa digabung dengan --tile-size")
+        if args.encode_report:
+            ap.error("--encode-report tidak bisa digabung dengan --tile-size")
+    profile = bool(args.profile or args.profile_dump)
+    n_jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     model_folder = os.environ.get("MODEL_FOLDER", "model")
     output_folder = os.environ.get("OUTPUT_FOLDER", "exports")
     if not os.path.isdir(model_folder):
@@ -441,27 +2415,170 @@ def main():
         print("ERROR: Folder model tidak ditemukan!")
         sys.exit(1)
 
+    try:
+        pil()
+    except ImportError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    try:
+        theme = load_theme(args.theme, args.themes)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: theme tidak bisa dimuat ({args.themes}): {e}")
+        sys.exit(1)
+
     os.makedirs(output_folder, exist_ok=True)
     print(f"📂 Model  : {model_folder}")
-    print(f"📁 Output : {output_folder}\n")
-
-    diagrams, elements_map = parse_grafico(model_folder)
-    if not diagrams:
+    print(f"📁 Output : {output_folder}")
+    print(f"🎨 Theme  : {theme.name}\n")
+
+    run_stats = {} if profile else None
+    if args.label_cache:
+        LABEL_CACHE.load(args.label_cache)
+    with stage(run_stats, "elements"):
+        elements_map = load_model_elements(model_folder, args.index)
+    with stage(run_stats, "discover"):
+        paths = discover_diagrams(model_folder)
+    if not paths:
         print("❌ Tidak ada diagram ditemukan!")
         sys.exit(1)
 
-    print(f"\n🎨 Export {len(diagrams)} diagram...\n")
-    font, bold_font = load_fonts()
-    exported = 0
-    for diagram in diagrams:
-        dname = diagram.get("name", "Untitled")
-        safe = re.sub(r'[^a-zA-Z0-9_\-]', '_', dname)
-        out = os.path.join(output_folder, f"{safe}.png")
-        print(f"→ {dname}")
-        if draw_diagram(diagram, elements_map, out, font, bold_font):
-            exported += 1
-
-    print(f"\n✅ Selesai! {exported}/{len(diagrams)} diagram di-export")
+    encoding = {"palette": args.palette, "compress_level": args.compress_level,
+                "strategy": args.zlib_strategy}
+    extra = {"viewport": args.viewport}
+    if args.variants:
+        extra["variants"] = args.variants
+    if encoding != DEFAULT_ENCODING:
+        # Hanya kalau bukan default, supaya manifest lama tetap valid
+        extra["encoding"] = encoding
+    settings = settings_digest(extra, theme)
+    names = resolve_output_names(paths, args.fmt)
+    paths = list(names)
+    previous = load_manifest(output_folder)
+    old_manifest = previous if args.incremental else {}
+    times, new_times = load_render_times(args.render_times), {}
+    manifest = {"version": MANIFEST_VERSION, "settings": settings, "outputs": {
+        # Entri format lain (mis. .svg saat export .png) tetap disimpan
+        k: v for k, v in previous.get("outputs", {}).items()
+        if previous.get("settings") == settings and not k.endswith("." + args.fmt)
+    }}
+    if args.shard:
+        index, count = args.shard
+        costs, timed = diagram_costs(paths, model_folder, times, args.shard_costs)
+        total = len(paths)
+        paths, loads = shard_paths(paths, costs, index, count, args.fmt)
+        unit = (lambda v: f"{v:.1f}s") if timed else (lambda v: f"{v / 1024:.0f} KiB XML")
+        # Manifest shard hanya berisi output shard ini (digabung merge_exports.py)
+        manifest["outputs"] = {}
+        manifest["shard"] = {"index": index, "count": count, "format": args.fmt}
+        print(f"🧩 Shard {index}/{count}: {len(paths)} dari {total} diagram "
+              f"(bobot {unit(loads[index - 1])}, shard terberat {unit(max(loads))})")
+        if not paths:
+            save_manifest(output_folder, manifest)
+            print("✅ Tidak ada diagram untuk shard ini")
+            return
+
+    print(f"\n🎨 Export {len(paths)} diagram...\n")
+    jobs = iter_jobs({p: names[p] for p in paths}, elements_map, model_folder, output_folder,
+                     old_manifest, settings, args.fmt, profile)
+    exported = unchanged = failed = identical = 0
+    profiled = []
+    encodings, encode_tiled = {}, []
+    label_hits = label_misses = 0
+    opts = {"fmt": args.fmt, "tile_size": args.tile_size, "viewport": args.viewport,
+            "encoding": encoding, "encode_report": bool(args.encode_report),
+            "variants": args.variants, "theme": theme}
+    with stage(run_stats, "diagrams"):
+        for job, result in render_diagrams(jobs, elements_map, model_folder, n_jobs, opts,
+                                           args.label_cache, profile):
+            print(f"→ {job['name']}")
+            if profile:
+                profiled.append(profile_entry(job, result and result[3].get("stats")))
+            if result is None:
+                print(f"  [up-to-date] '{job['name']}'")
+                # "seconds" dari manifest versi lama dibuang (sekarang di render_times)
+                manifest["outputs"][job["out_name"]] = {
+                    k: v for k, v in old_manifest["outputs"][job["out_name"]].items()
+                    if k != "seconds"}
+                unchanged += 1
+                continue
+            rendered, log, error, info = result
+            sys.stdout.write(log)
+            label_hits += info.get("label_hits", 0)
+            label_misses += info.get("label_misses", 0)
+            if args.label_cache and info.get("labels"):
+                LABEL_CACHE.merge(info["labels"])
+            if error:
+                print(f"  ❌ [error] '{job['name']}': {error}")
+                failed += 1
+                continue
+            if rendered:
+                exported += 1
+                identical += info.get("written") is False
+            if info.get("encodings"):
+                encodings[job["name"]] = info["encodings"]
+            elif rendered and info.get("tiled"):
+                encode_tiled.append(job["name"])
+            rel = model_relpath(job["path"], model_folder)
+            manifest["outputs"][job["out_name"]] = {
+                "diagram": rel,
+                "deps": info["deps"],
+                "rendered": rendered,
+            }
+            # Dipakai --shard sebagai bobot diagram di run berikutnya
+            times[rel] = new_times[rel] = round(info.get("seconds", 0.0), 3)
+            if info.get("variants"):
+                manifest["outputs"][job["out_name"]]["variants"] = info["variants"]
+
+    if args.shard:
+        # Semua shard harus membaca bobot yang sama, jadi file render times tidak
+        # diubah di sini; merge_exports.py memindahkan waktu ini ke sana
+        manifest["times"] = new_times
+    else:
+        save_render_times(args.render_times, times)
+    save_manifest(output_folder, manifest)
+    if args.variants:
+        print(f"\n🖼️  Index variant: {write_variant_index(output_folder, manifest)}")
+    if profile:
+        report = build_profile(run_stats["stages"], profiled, model=model_folder, format=args.fmt,
+                               jobs=n_jobs, count=len(paths))
+        if args.profile:
+            parent = os.path.dirname(args.profile)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(args.profile, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"\n⏱️  Profil: {args.profile}")
+        slowest = next((d for d in report["diagrams"] if not d["fresh"]), None)
+        if args.profile_dump and slowest:
+            profile_diagram(slowest["path"], elements_map, opts, args.profile_dump)
+            print(f"⏱️  cProfile '{slowest['name']}' ({slowest['wall']:.2f}s): "
+                  f"{args.profile_dump}")
+    if args.encode_report:
+        report = build_encode_report(encodings, {"format": args.fmt, **encoding}, encode_tiled)
+        parent = os.path.dirname(args.encode_report)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(args.encode_report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print_encode_report(report)
+        print(f"📦 Laporan encoding: {args.encode_report}")
+    if args.label_cache:
+        LABEL_CACHE.save(args.label_cache)
+    if label_hits + label_misses:
+        rate = label_hits / (label_hits + label_misses)
+        print(f"\n🔤 Label cache: {rate:.0%} hit ({label_hits} hit, {label_misses} miss)")
+    print(f"\n✅ Selesai! {exported}/{len(paths)} diagram di-export"
+          + (f", {unchanged} tidak berubah" if unchanged else "")
+          + (f", {identical} byte sama (tidak ditulis)" if identical else "")
+          + (f", {failed} gagal" if failed else ""))
+    if args.watch:
+        WatchSession(model_folder, output_folder, elements_map, manifest, opts).run(
+            args.watch_interval, args.watch_polling)
+        if args.label_cache:
+            LABEL_CACHE.save(args.label_cache)
+        return
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Generator model Grafico (coArchi) sintetis untuk benchmark
+
+Menulis folder model dengan struktur sama seperti hasil coArchi: satu file
+XML per elemen/relasi, folder.xml per folder, dan diagram (bisa bersarang
+dalam sub-folder) berisi group bertingkat + koneksi. Output deterministik
+untuk seed yang sama.
+
+Pemakaian:
+  python scripts/gen_model.py --out /tmp/model-10k --elements 10000
+  python scripts/gen_model.py --out /tmp/m --elements 1000 --depth 3 --density 2.5
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+from xml.sax.saxutils import quoteattr
+
+NS = ('xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"\n'
+      '    xmlns:archimate="http://www.archimatetool.com/archimate"')
+
+# Folder → tipe elemen (bobot kira-kira seperti model nyata: banyak business/application)
+ELEMENT_TYPES = {
+    "business": ["BusinessActor", "BusinessRole", "BusinessProcess", "BusinessFunction",
+                 "BusinessService", "BusinessObject", "BusinessEvent"],
+    "application": ["ApplicationComponent", "ApplicationService", "ApplicationInterface",
+                    "ApplicationFunction", "DataObject"],
+    "technology": ["Node", "Device", "SystemSoftware", "TechnologyService", "Artifact"],
+    "motivation": ["Stakeholder", "Driver", "Goal", "Requirement", "Principle"],
+    "strategy": ["Capability", "ValueStream", "Resource"],
+    "implementation_migration": ["WorkPackage", "Deliverable", "Plateau"],
+    "other": ["Location", "Grouping"],
+}
+FOLDER_WEIGHTS = {"business": 35, "application": 30, "technology": 15, "motivation": 8,
+                  "strategy": 6, "implementation_migration": 4, "other": 2}
+RELATION_TYPES = ["TriggeringRelationship", "FlowRelationship", "RealizationRelationship",
+                  "AssignmentRelationship", "CompositionRelationship",
+                  "AggregationRelationship", "AssociationRelationship",
+                  "ServingRelationship", "AccessRelationship", "InfluenceRelationship",
+                  "SpecializationRelationship"]
+WORDS = ["Order", "Customer", "Invoice", "Payment", "Produksi", "Gudang", "Supplier",
+         "Report", "Planning", "Inventory", "Portal", "Gateway", "Database", "Server",
+         "Approval", "Shipment", "Quality", "Finance", "Data", "Service", "Management",
+         "Monitoring", "Integration", "Request", "Schedule", "Material", "Contract"]
+
+NODE_W, NODE_H = 120, 55
+GAP = 40
+STAMP = ".gen-model.json"
+
+
+def _id(rng):
+    return "id-%032x" % rng.getrandbits(128)
+
+
+def _name(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _folder_xml(path, name, rng, root=False, ftype=None, fid=None):
+    tag = "ArchimateModel" if root else "Folder"
+    extra = '\n    version="5.0.0"' if root else ""
+    if ftype:
+        # Folder top-level coArchi selalu punya type (= nama direktori)
+        extra = f'\n    type="{ftype}"'
+    _write(os.path.join(path, "folder.xml"),
+           f'<archimate:{tag}\n    xmlns:archimate="http://www.archimatetool.com/archimate"\n'
+           f'    name={quoteattr(name)}\n    id="{fid or _id(rng)}"{extra}/>\n')
+
+
+def _href(elem):
+    return f'{elem["type"]}_{elem["id"]}.xml#{elem["id"]}'
+
+
+def _element_xml(elem):
+    return (f'<archimate:{elem["type"]}\n'
+            f'    xmlns:archimate="http://www.archimatetool.com/archimate"\n'
+            f'    name={quoteattr(elem["name"])}\n    id="{elem["id"]}"/>\n')
+
+
+def _relation_xml(rel, src, tgt):
+    access = '\n    accessType="1"' if rel["type"] == "AccessRelationship" else ""
+    return (f'<archimate:{rel["type"]}\n    {NS}\n    id="{rel["id"]}"{access}>\n'
+            f'  <source\n      xsi:type="archimate:{src["type"]}"\n'
+            f'      href="{_href(src)}"/>\n'
+            f'  <target\n      xsi:type="archimate:{tgt["type"]}"\n'
+            f'      href="{_href(tgt)}"/>\n'
+            f'</archimate:{rel["type"]}>\n')
+
+
+def _grid(count, cols):
+    """Posisi (x, y) node dalam grid relatif terhadap container"""
+    return [(GAP // 2 + (i % cols) * (NODE_W + GAP), 24 + (i // cols) * (NODE_H + GAP))
+            for i in range(count)]
+
+
+def _group_tree(members, depth, fanout, rng):
+    """Bagi members ke group bertingkat → (list anak, lebar, tinggi)
+
+    Anak berupa ("node", elem) atau ("group", name, anak, w, h); koordinat
+    dihitung saat diagram ditulis.
+    """
+    if depth <= 0 or len(members) <= fanout:
+        cols = max(1, int(len(members) ** 0.5 + 0.5))
+        rows = (len(members) + cols - 1) // cols
+        return ([("node", m) for m in members],
+                cols * (NODE_W + GAP) + GAP // 2, 24 + rows * (NODE_H + GAP))
+    size = (len(members) + fanout - 1) // fanout
+    groups = []
+    for i in range(0, len(members), size):
+        kids, w, h = _group_tree(members[i:i + size], depth - 1, fanout, rng)
+        groups.append(("group", _name(rng), kids, w, h))
+    cols = max(1, int(len(groups) ** 0.5 + 0.5))
+    col_w = max(g[3] for g in groups) + GAP
+    row_h = max(g[4] for g in groups) + GAP
+    rows = (len(groups) + cols - 1) // cols
+    return groups, cols * col_w + GAP // 2, 24 + rows * row_h
+
+
+def _diagram_children(kids, out, indent, rng, node_ids, conns_by_src):
+    """Tulis <children> untuk kids; posisi di-grid relatif terhadap parent"""
+    pad = "  " * indent
+    if kids and kids[0][0] == "group":
+        cols = max(1, int(len(kids) ** 0.5 + 0.5))
+        col_w = max(k[3] for k in kids) + GAP
+        row_h = max(k[4] for k in kids) + GAP
+        pos = [(GAP // 2 + (i % cols) * col_w, 24 + (i // cols) * row_h)
+               for i in range(len(kids))]
+    else:
+        pos = _grid(len(kids), max(1, int(len(kids) ** 0.5 + 0.5)))
+    for kid, (x, y) in zip(kids, pos):
+        if kid[0] == "group":
+            _, name, sub, w, h = kid
+            out.append(f'{pad}<children\n{pad}    xsi:type="archimate:DiagramModelGroup"\n'
+                       f'{pad}    id="{_id(rng)}"\n{pad}    name={quoteattr(name)}>\n'
+                       f'{pad}  <bounds\n{pad}      x="{x}"\n{pad}      y="{y}"\n'
+                       f'{pad}      width="{w}"\n{pad}      height="{h}"/>\n')
+            _diagram_children(sub, out, indent + 1, rng, node_ids, conns_by_src)
+            out.append(f'{pad}</children>\n')
+            continue
+        elem = kid[1]
+        nid = node_ids[elem["id"]]
+        out.append(f'{pad}<children\n{pad}    xsi:type="archimate:DiagramModelArchimateObject"\n'
+                   f'{pad}    id="{nid}">\n')
+        for rel, tgt_id in conns_by_src.get(elem["id"], ()):
+            out.append(f'{pad}  <sourceConnections\n'
+                       f'{pad}      xsi:type="archimate:DiagramModelArchimateConnection"\n'
+                       f'{pad}      id="{_id(rng)}"\n{pad}      source="{nid}"\n'
+                       f'{pad}      target="{node_ids[tgt_id]}">\n'
+                       f'{pad}    <archimateRelationship\n'
+                       f'{pad}        xsi:type="archimate:{rel["type"]}"\n'
+                       f'{pad}        href="{_href(rel)}"/>\n'
+                       f'{pad}  </sourceConnections>\n')
+        out.append(f'{pad}  <bounds\n{pad}      x="{x}"\n{pad}      y="{y}"\n'
+                   f'{pad}      width="{NODE_W}"\n{pad}      height="{NODE_H}"/>\n'
+                   f'{pad}  <archimateElement\n{pad}      xsi:type="archimate:{elem["type"]}"\n'
+                   f'{pad}      href="{_href(elem)}"/>\n'
+                   f'{pad}</children>\n')
+
+
+def generate_model(out, elements=1000, diagrams=None, nodes_per_diagram=200, depth=1,
+                   density=1.5, fanout=4, folder_depth=2, seed=42):
+    """Tulis model Grafico sintetis ke folder `out` → dict ringkasan
+
+    density: jumlah relasi per elemen (relasi dibuat antar elemen dalam
+    satu cluster, cluster = isi satu diagram); depth: tingkat group
+    bersarang di diagram; folder_depth: kedalaman sub-folder diagram.
+    """
+    rng = random.Random(seed)
+    if diagrams is None:
+        diagrams = max(1, elements // nodes_per_diagram)
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+    os.makedirs(out)
+    _folder_xml(out, f"synthetic-{elements}", rng, root=True)
+
+    # Elemen
+    folders = list(FOLDER_WEIGHTS)
+    weights = [FOLDER_WEIGHTS[f] for f in folders]
+    for f in folders + ["relations", "diagrams"]:
+        os.makedirs(os.path.join(out, f))
+        _folder_xml(os.path.join(out, f), f.replace("_", " ").title(), rng, ftype=f)
+    elems = []
+    for _ in range(elements):
+        folder = rng.choices(folders, weights)[0]
+        elem = {"id": _id(rng), "type": rng.choice(ELEMENT_TYPES[folder]),
+                "name": _name(rng), "folder": folder}
+        elems.append(elem)
+        _write(os.path.join(out, folder, f'{elem["type"]}_{elem["id"]}.xml'),
+               _element_xml(elem))
+
+    # Cluster = isi tiap diagram; relasi dibuat di dalam cluster supaya tampil
+    clusters = [rng.sample(elems, min(nodes_per_diagram, len(elems)))
+                for _ in range(diagrams)]
+    relations, cluster_rels = 0, []
+    for cluster in clusters:
+        rels = []
+        for _ in range(int(len(cluster) * density)):
+            src, tgt = rng.sample(cluster, 2) if len(cluster) > 1 else (cluster[0],) * 2
+            rel = {"id": _id(rng), "type": rng.choice(RELATION_TYPES)}
+            _write(os.path.join(out, "relations", f'{rel["type"]}_{rel["id"]}.xml'),
+                   _relation_xml(rel, src, tgt))
+            rels.append((rel, src["id"], tgt["id"]))
+        relations += len(rels)
+        cluster_rels.append(rels)
+
+    # Diagram, disebar ke sub-folder bertingkat
+    dfolders = [os.path.join(out, "diagrams")]
+    for level in range(folder_depth):
+        parent = dfolders[-1]
+        for i in range(2):
+            # Sub-folder coArchi diberi nama sesuai id folder
+            fid = _id(rng)
+            path = os.path.join(parent, fid)
+            os.makedirs(path)
+            _folder_xml(path, f"pkg-{level}-{i}", rng, fid=fid)
+            dfolders.append(path)
+    connections = 0
+    for n, (cluster, rels) in enumerate(zip(clusters, cluster_rels)):
+        node_ids = {e["id"]: _id(rng) for e in cluster}
+        conns_by_src = {}
+        for rel, src_id, tgt_id in rels:
+            conns_by_src.setdefault(src_id, []).append((rel, tgt_id))
+        connections += len(rels)
+        kids, _, _ = _group_tree(cluster, depth, fanout, rng)
+        did = _id(rng)
+        parts = [f'<archimate:ArchimateDiagramModel\n    {NS}\n'
+                 f'    name={quoteattr(f"View {n + 1:04d} {_name(rng)}")}\n    id="{did}">\n']
+        _diagram_children(kids, parts, 1, rng, node_ids, conns_by_src)
+        parts.append('</archimate:ArchimateDiagramModel>\n')
+        _write(os.path.join(dfolders[n % len(dfolders)], f"ArchimateDiagramModel_{did}.xml"),
+               "".join(parts))
+
+    summary = {"elements": elements, "relations": relations, "diagrams": diagrams,
+               "nodes_per_diagram": min(nodes_per_diagram, len(elems)),
+               "connections": connections, "depth": depth, "density": density,
+               "fanout": fanout, "folder_depth": folder_depth, "seed": seed}
+    _write(os.path.join(out, STAMP), json.dumps(summary, indent=2) + "\n")
+    return summary
+
+
+def read_stamp(out):
+    """Ringkasan model hasil generate_model (None kalau bukan model sintetis)"""
+    try:
+        with open(os.path.join(out, STAMP), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def parse_count(text):
+    """'10k' → 10000, '1m' → 1000000"""
+    text = text.strip().lower()
+    mult = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    try:
+        return int(float(text.rstrip("km")) * mult)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"jumlah tidak valid: {text}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate model Grafico sintetis")
+    ap.add_argument("--out", "-o", required=True, help="Folder output (dihapus dulu kalau ada)")
+    ap.add_argument("--elements", "-n", type=parse_count, default=1000,
+                    help="Jumlah elemen, boleh 10k/1m (default: 1000)")
+    ap.add_argument("--diagrams", type=int, default=None,
+                    help="Jumlah diagram (default: elements / nodes-per-diagram)")
+    ap.add_argument("--nodes-per-diagram", type=int, default=200)
+    ap.add_argument("--depth", type=int, default=1, help="Tingkat group bersarang (default: 1)")
+    ap.add_argument("--fanout", type=int, default=4, help="Anak per group (default: 4)")
+    ap.add_argument("--density", type=float, default=1.5,
+                    help="Relasi/koneksi per elemen di tiap diagram (default: 1.5)")
+    ap.add_argument("--folder-depth", type=int, default=2,
+                    help="Kedalaman sub-folder diagram (default: 2)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+    if args.elements < 1 or args.nodes_per_diagram < 1:
+        print("ERROR: --elements dan --nodes-per-diagram harus > 0")
+        sys.exit(1)
+
+    summary = generate_model(args.out, args.elements, args.diagrams, args.nodes_per_diagram,
+                             args.depth, args.density, args.fanout, args.folder_depth,
+                             args.seed)
+    print(f"✅ {args.out}: {summary['elements']} elemen, {summary['relations']} relasi, "
+          f"{summary['diagrams']} diagram")
+
+
+if __name__ == "__main__":
+    main()
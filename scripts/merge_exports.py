@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Gabungkan hasil export_png.py --shard i/N dari beberapa runner
+
+Setiap folder shard berisi gambar + manifest (.export-manifest.json) dengan
+info shard. Gambar disalin ke satu folder output dan manifestnya digabung,
+sehingga run berikutnya (--incremental) melihat satu manifest utuh. Waktu
+render semua diagram disimpan terpisah (--render-times) untuk --shard
+berikutnya, supaya manifest yang di-commit tetap stabil.
+
+Pemakaian (mis. artifact matrix CI diunduh ke shards/1 … shards/4):
+  python scripts/merge_exports.py shards/* --out exports
+"""
+
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+import export_png as ex
+
+
+def read_shards(folders):
+    """[(folder, manifest)] urut index shard; exit kalau tidak konsisten"""
+    shards = []
+    for folder in folders:
+        manifest = ex.load_manifest(folder)
+        info = manifest.get("shard")
+        if not info:
+            print(f"ERROR: {folder} tidak berisi manifest shard ({ex.MANIFEST_NAME})")
+            sys.exit(1)
+        shards.append((folder, manifest))
+    shards.sort(key=lambda s: s[1]["shard"]["index"])
+    first = shards[0][1]
+    for folder, manifest in shards[1:]:
+        for key, value in (("settings", first["settings"]),
+                           ("count", first["shard"]["count"]),
+                           ("format", first["shard"]["format"])):
+            current = manifest["settings"] if key == "settings" else manifest["shard"][key]
+            if current != value:
+                print(f"ERROR: {folder}: {key} berbeda dari shard lain")
+                sys.exit(1)
+    return shards
+
+
+def merge(shards, out_folder, allow_partial=False, times_path=None):
+    """Salin output + gabung manifest → (jumlah file disalin, daftar masalah)
+
+    Semua shard dicek dulu; kalau ada masalah tidak ada yang ditulis. Waktu
+    render shard ("times") masuk ke times_path, bukan ke manifest gabungan.
+    """
+    first = shards[0][1]
+    count, fmt = first["shard"]["count"], first["shard"]["format"]
+    seen = [m["shard"]["index"] for _, m in shards]
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    problems = []
+    if len(seen) != len(set(seen)):
+        problems.append(f"shard ganda: {sorted(i for i in set(seen) if seen.count(i) > 1)}")
+    if missing and not allow_partial:
+        problems.append(f"shard belum ada: {missing} dari {count}")
+    if problems:
+        return 0, problems
+
+    owner = {}
+    files = []      # (src, dst)
+    for folder, manifest in shards:
+        index = manifest["shard"]["index"]
+        for out_name, entry in manifest["outputs"].items():
+            if out_name in owner:
+                problems.append(f"{out_name} ada di shard {owner[out_name]} dan {index}")
+                continue
+            owner[out_name] = index
+            if entry.get("rendered"):
+                # Variant resolusi (--variants) ikut disalin; "full" = out_name sendiri
+                names = {out_name} | {v["file"] for v in entry.get("variants", {}).values()}
+                missing_files = [n for n in sorted(names)
+                                 if not os.path.exists(os.path.join(folder, n))]
+                if missing_files:
+                    problems.append(f"{', '.join(missing_files)} tidak ada di {folder}")
+                files.extend((os.path.join(folder, n), os.path.join(out_folder, n))
+                             for n in sorted(names))
+    if problems:
+        return 0, problems
+
+    os.makedirs(out_folder, exist_ok=True)
+    previous = ex.load_manifest(out_folder)
+    merged = {"version": ex.MANIFEST_VERSION, "settings": first["settings"], "outputs": {
+        # Sama seperti export biasa: entri format lain tetap disimpan
+        k: v for k, v in previous.get("outputs", {}).items()
+        if previous.get("settings") == first["settings"] and not k.endswith("." + fmt)
+    }}
+    copied = 0
+    for src, dst in files:
+        if os.path.abspath(src) != os.path.abspath(dst) and not (
+                os.path.exists(dst) and filecmp.cmp(src, dst, shallow=False)):
+            shutil.copyfile(src, dst)
+            copied += 1
+    for _, manifest in shards:
+        merged["outputs"].update(manifest["outputs"])
+    ex.save_manifest(out_folder, merged)
+    if any(e.get("variants") for e in merged["outputs"].values()):
+        ex.write_variant_index(out_folder, merged)
+    if times_path:
+        times = ex.load_render_times(times_path)
+        for _, manifest in shards:
+            times.update(manifest.get("times", {}))
+        ex.save_render_times(times_path, times)
+    return copied, problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gabungkan output export_png.py --shard")
+    ap.add_argument("shards", nargs="+", help="Folder output tiap shard")
+    ap.add_argument("--out", "-o", default=os.environ.get("OUTPUT_FOLDER", "exports"),
+                    help="Folder output gabungan (default: exports)")
+    ap.add_argument("--render-times", default=ex.DEFAULT_RENDER_TIMES, metavar="PATH",
+                    help="Simpan waktu render semua shard ke sini (bobot --shard berikutnya; "
+                         f"default: {ex.DEFAULT_RENDER_TIMES})")
+    ap.add_argument("--allow-partial", action="store_true",
+                    help="Tetap gabungkan walau ada shard yang belum ada")
+    args = ap.parse_args(argv)
+
+    shards = read_shards(args.shards)
+    copied, problems = merge(shards, args.out, args.allow_partial, args.render_times)
+    for p in problems:
+        print(f"  [error] {p}")
+    if problems:
+        print(f"❌ Gabung gagal/tidak lengkap ({len(problems)} masalah)")
+        sys.exit(1)
+    total = sum(len(m["outputs"]) for _, m in shards)
+    print(f"✅ {len(shards)} shard digabung ke {args.out}: {total} output, {copied} file disalin")
+
+
+if __name__ == "__main__":
+    main()
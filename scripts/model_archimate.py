@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Konversi model Grafico (coArchi) ⇄ satu file .archimate
+
+pack   : folder Grafico → satu file .archimate (format file Archi), ditulis
+         berurutan per file sumber. Offset tiap fragmen disimpan di sidecar
+         <out>.manifest.json; saat pack ulang, fragmen yang file sumbernya
+         tidak berubah (size/mtime, lalu sha1) disalin byte-per-byte dari
+         output lama — hanya file yang berubah yang di-parse dan dikonversi.
+unpack : .archimate → folder Grafico, di-stream dengan iterparse (elemen
+         dibuang dari memori setelah ditulis). File yang isinya sama tidak
+         ditulis ulang.
+
+Dalam .archimate, referensi href Grafico ("Type_id.xml#id") menjadi atribut
+id (archimateElement="id-…"); saat unpack nama file dan xsi:type disusun
+kembali dari tipe elemen, jadi pack → unpack menghasilkan file yang sama.
+
+Pemakaian:
+  python scripts/model_archimate.py pack --model model
+  python scripts/model_archimate.py unpack .cache/archiPKG.archimate --model /tmp/model
+
+Default output .cache/archiPKG.archimate (di-gitignore, bukan di folder model
+yang di-commit); scripts/export.js membuka path yang sama, atau env ARCHI_MODEL.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+ARCHIMATE_NS = "http://www.archimatetool.com/archimate"
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+XSI_TYPE = f"{{{XSI_NS}}}type"
+FORMAT_VERSION = 1
+DEFAULT_OUT = os.path.join(".cache", "archiPKG.archimate")
+# Urutan folder top-level seperti di Archi
+TOP_FOLDERS = ["strategy", "business", "application", "technology", "motivation",
+               "implementation_migration", "other", "relations", "diagrams"]
+# Nama fitur Grafico (nama EMF) → nama elemen di file .archimate
+TAGS = {"children": "child", "sourceConnections": "sourceConnection",
+        "properties": "property", "bendpoints": "bendpoint", "features": "feature"}
+TYPES = {"DiagramModelArchimateObject": "DiagramObject",
+         "DiagramModelArchimateConnection": "Connection",
+         "DiagramModelGroup": "Group", "DiagramModelNote": "Note"}
+# Child Grafico berisi href → atribut id di .archimate
+REF_TAGS = ("source", "target", "archimateElement", "archimateRelationship", "model")
+# source/target hanya referensi di level elemen (relasi); di koneksi diagram sudah atribut
+NESTED_REF_TAGS = ("archimateElement", "archimateRelationship", "model")
+
+_ATTR_SPECIAL = re.compile(r'[&<"\n\r\t]')
+
+TAGS_BACK = {v: k for k, v in TAGS.items()}
+TYPES_BACK = {v: k for k, v in TYPES.items()}
+
+
+# ─── SERIALISASI ─────────────────────────────────────────────────────────────
+
+def _attr(value):
+    if not _ATTR_SPECIAL.search(value):
+        return value
+    return (value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;")
+            .replace("\n", "&#xA;").replace("\r", "&#xD;").replace("\t", "&#x9;"))
+
+
+def _text(value):
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace("\r", "&#xD;")
+
+
+@functools.lru_cache(maxsize=None)
+def _qname(name):
+    if name.startswith(f"{{{XSI_NS}}}"):
+        return "xsi:" + name[len(XSI_NS) + 2:]
+    if name.startswith(f"{{{ARCHIMATE_NS}}}"):
+        return "archimate:" + name[len(ARCHIMATE_NS) + 2:]
+    return name
+
+
+def serialize(root, level=0, grafico=False):
+    """Elemen → teks XML; iteratif (aman untuk nesting dalam)
+
+    grafico=True: satu atribut per baris seperti coArchi; selain itu satu
+    baris per elemen seperti Archi.
+    """
+    parts = []
+    stack = [(root, level, False)]
+    while stack:
+        elem, lvl, closing = stack.pop()
+        pad = "  " * lvl
+        tag = _qname(elem.tag)
+        if closing:
+            parts.append(f"{pad}</{tag}>\n")
+            continue
+        sep = f"\n{pad}    " if grafico else " "
+        attrs = "".join(f'{sep}{_qname(k)}="{_attr(v)}"' for k, v in elem.attrib.items())
+        kids = list(elem)
+        if kids:
+            parts.append(f"{pad}<{tag}{attrs}>\n")
+            stack.append((elem, lvl, True))
+            stack.extend((kid, lvl + 1, False) for kid in reversed(kids))
+        elif elem.text:
+            parts.append(f"{pad}<{tag}{attrs}>{_text(elem.text)}</{tag}>\n")
+        else:
+            parts.append(f"{pad}<{tag}{attrs}/>\n")
+    return "".join(parts)
+
+
+def _open_only(text, tag, level):
+    """Teks serialize() tanpa tag penutup (isi folder ditulis sesudahnya)"""
+    if text.endswith("/>\n") and text.count("\n") == 1:
+        return text[:-3] + ">\n"
+    closing = f"{'  ' * level}</{tag}>\n"
+    return text[:-len(closing)]
+
+
+def _drop_layout_text(elem):
+    """Whitespace indentasi (sisa child yang dipindah/dilepas) bukan isi teks"""
+    if elem.text and not elem.text.strip():
+        elem.text = None
+
+
+def _uses_xsi(root):
+    return any(XSI_TYPE in e.attrib for e in root.iter())
+
+
+# ─── GRAFICO → .ARCHIMATE ────────────────────────────────────────────────────
+
+def to_archimate(root, kind):
+    """Ubah (in-place) root file Grafico ke bentuk .archimate → tag root"""
+    for elem in list(root.iter()):
+        refs = NESTED_REF_TAGS if elem is not root else REF_TAGS
+        for sub in list(elem):
+            if sub.tag in refs and "href" in sub.attrib and not len(sub):
+                elem.set(sub.tag, sub.get("href").split("#")[-1])
+                elem.remove(sub)
+        _drop_layout_text(elem)
+        if elem is not root:
+            elem.tag = TAGS.get(elem.tag, elem.tag)
+            xsi = elem.get(XSI_TYPE)
+            if xsi and xsi.startswith("archimate:"):
+                elem.set(XSI_TYPE, "archimate:" + TYPES.get(xsi[10:], xsi[10:]))
+    local = root.tag.rpartition("}")[2]
+    if kind == "model":
+        tag, attrib = f"{{{ARCHIMATE_NS}}}model", {"xmlns:xsi": XSI_NS,
+                                                    "xmlns:archimate": ARCHIMATE_NS}
+    elif kind == "folder":
+        tag, attrib = "folder", {}
+    else:
+        tag, attrib = "element", {XSI_TYPE: f"archimate:{local}"}
+    attrib.update(root.attrib)
+    root.attrib.clear()
+    root.attrib.update(attrib)
+    root.tag = tag
+    return tag
+
+
+def convert_file(path, kind, level):
+    """Satu file Grafico → fragmen .archimate (bytes)"""
+    root = ET.parse(path).getroot()
+    tag = to_archimate(root, kind)
+    text = serialize(root, level)
+    if kind in ("model", "folder"):
+        text = _open_only(text, _qname(tag), level)
+    return text.encode("utf-8")
+
+
+def plan(model_folder):
+    """Urutan isi .archimate → ("file", relpath, level, kind, stat) / ("close", level, tag)"""
+    items = [("file", "folder.xml", 0, "model", os.stat(os.path.join(model_folder, "folder.xml")))]
+
+    def walk(rel, level):
+        with os.scandir(os.path.join(model_folder, rel)) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        meta = [e for e in entries if e.name == "folder.xml"]
+        if not meta:
+            print(f"  [warn] {rel}/ tanpa folder.xml, dilewati")
+            return
+        items.append(("file", f"{rel}/folder.xml", level, "folder", meta[0].stat()))
+        for e in entries:
+            if not e.name.startswith(".") and e.is_dir():
+                walk(f"{rel}/{e.name}", level + 1)
+        for e in entries:
+            if e.name.endswith(".xml") and e.name != "folder.xml":
+                items.append(("file", f"{rel}/{e.name}", level + 1, "element", e.stat()))
+        items.append(("close", level, "folder"))
+
+    with os.scandir(model_folder) as it:
+        dirs = [e.name for e in it if not e.name.startswith(".") and e.is_dir()]
+    order = {name: i for i, name in enumerate(TOP_FOLDERS)}
+    for name in sorted(dirs, key=lambda d: (order.get(d, len(order)), d)):
+        walk(name, 1)
+    items.append(("close", 0, "archimate:model"))
+    return items
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def manifest_path(out):
+    return out + ".manifest.json"
+
+
+def load_manifest(out):
+    """Manifest fragmen; None kalau tidak ada/usang atau output diubah di luar pack"""
+    try:
+        with open(manifest_path(out), encoding="utf-8") as f:
+            manifest = json.load(f)
+        st = os.stat(out)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get("version") != FORMAT_VERSION
+            or manifest.get("output") != [st.st_size, st.st_mtime_ns]):
+        return None
+    return manifest
+
+
+def pack(model_folder, out, force=False):
+    """Grafico → .archimate; fragmen yang tidak berubah disalin dari output lama"""
+    manifest = None if force else load_manifest(out)
+    old = manifest["fragments"] if manifest else {}
+    stats = {"converted": 0, "reused": 0, "bytes": 0, "written": False}
+    fragments = {}
+    parent = os.path.dirname(out)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = out + ".tmp"
+    src = open(out, "rb") if old else None
+    try:
+        with open(tmp, "wb") as dst:
+            dst.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+            for item in plan(model_folder):
+                if item[0] == "close":
+                    dst.write(f"{'  ' * item[1]}</{item[2]}>\n".encode("utf-8"))
+                    continue
+                _, rel, level, kind, st = item
+                path = os.path.join(model_folder, rel)
+                prev = old.get(rel)
+                digest = None
+                if prev and (prev[0] != st.st_size or prev[1] != st.st_mtime_ns):
+                    digest = _sha1(path)
+                if prev and (digest is None or digest == prev[2]):
+                    src.seek(prev[3])
+                    data = src.read(prev[4])
+                    digest = prev[2]
+                    stats["reused"] += 1
+                else:
+                    data = convert_file(path, kind, level)
+                    digest = digest or _sha1(path)
+                    stats["converted"] += 1
+                fragments[rel] = [st.st_size, st.st_mtime_ns, digest, dst.tell(), len(data)]
+                dst.write(data)
+            stats["bytes"] = dst.tell()
+    finally:
+        if src:
+            src.close()
+
+    if manifest and fragments == old:
+        # Tidak ada yang berubah — output dan manifest lama dipertahankan
+        os.remove(tmp)
+        return stats
+    if manifest and list(fragments) == list(old) and not stats["converted"]:
+        # Hanya mtime sumber yang berubah (isi sama) — cukup perbarui manifest
+        os.remove(tmp)
+    else:
+        os.replace(tmp, out)
+        stats["written"] = True
+    st = os.stat(out)
+    with open(manifest_path(out), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": FORMAT_VERSION, "output": [st.st_size, st.st_mtime_ns],
+                            "fragments": fragments}, separators=(",", ":")))
+    return stats
+
+
+# ─── .ARCHIMATE → GRAFICO ────────────────────────────────────────────────────
+
+def element_types(archimate_path):
+    """{id: tipe} semua <element> (pass pertama, untuk menyusun href)"""
+    types = {}
+    parents = []
+    for event, elem in ET.iterparse(archimate_path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "element":
+                types[elem.get("id")] = elem.get(XSI_TYPE, "").rpartition(":")[2]
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag in ("element", "folder") and parents:
+            parents[-1].remove(elem)
+    return types
+
+
+def to_grafico(root, tag, types):
+    """Ubah (in-place) subtree .archimate ke bentuk file Grafico"""
+    missing = set()
+    for elem in list(root.iter()):
+        refs = REF_TAGS if elem is root else NESTED_REF_TAGS
+        for key in [k for k in elem.attrib if k in refs]:
+            ref = elem.attrib.pop(key)
+            if ref not in types:
+                missing.add(ref)
+            rtype = types.get(ref, "Unknown")
+            ET.SubElement(elem, key, {XSI_TYPE: f"archimate:{rtype}",
+                                      "href": f"{rtype}_{ref}.xml#{ref}"})
+        _drop_layout_text(elem)
+        if elem is not root:
+            elem.tag = TAGS_BACK.get(elem.tag, elem.tag)
+            xsi = elem.get(XSI_TYPE)
+            if xsi and xsi.startswith("archimate:"):
+                elem.set(XSI_TYPE, "archimate:" + TYPES_BACK.get(xsi[10:], xsi[10:]))
+    root.attrib.pop(XSI_TYPE, None)
+    attrib = {"xmlns:xsi": XSI_NS} if _uses_xsi(root) else {}
+    attrib["xmlns:archimate"] = ARCHIMATE_NS
+    attrib.update(root.attrib)
+    root.attrib.clear()
+    root.attrib.update(attrib)
+    root.tag = f"{{{ARCHIMATE_NS}}}{tag}"
+    return missing
+
+
+def _write_if_changed(path, data, stats):
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    stats["unchanged"] += 1
+                    return
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    stats["written"] += 1
+
+
+def unpack(archimate_path, model_folder, prune=False):
+    """.archimate → folder Grafico (streaming); file yang sama isinya tidak ditulis"""
+    types = element_types(archimate_path)
+    stats = {"written": 0, "unchanged": 0, "removed": 0, "missing": set()}
+    produced = set()
+    dirs = []           # folder output untuk setiap <folder> yang sedang terbuka
+    parents = []        # stack elemen terbuka (untuk melepas child yang sudah ditulis)
+
+    def emit(path, elem, tag):
+        stats["missing"] |= to_grafico(elem, tag, types)
+        _write_if_changed(path, serialize(elem, grafico=True).encode("utf-8"), stats)
+        produced.add(os.path.normpath(path))
+
+    for event, elem in ET.iterparse(archimate_path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "folder":
+                base = dirs[-1] if dirs else model_folder
+                name = elem.get("id") if dirs else (elem.get("type") or elem.get("id"))
+                dirs.append(os.path.join(base, name))
+                os.makedirs(dirs[-1], exist_ok=True)
+            parents.append(elem)
+            continue
+        parents.pop()
+        parent = parents[-1] if parents else None
+        if elem.tag == "element" and parent is not None and parent.tag == "folder":
+            etype = elem.get(XSI_TYPE, "").rpartition(":")[2]
+            emit(os.path.join(dirs[-1], f"{etype}_{elem.get('id')}.xml"), elem, etype)
+            parent.remove(elem)
+        elif elem.tag == "folder":
+            # Sisa isi folder (documentation/property) masuk folder.xml
+            emit(os.path.join(dirs.pop(), "folder.xml"), elem, "Folder")
+            parent.remove(elem)
+        elif parent is None:
+            emit(os.path.join(model_folder, "folder.xml"), elem, "ArchimateModel")
+
+    if prune:
+        for dirpath, dirnames, filenames in os.walk(model_folder, topdown=False):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for fname in filenames:
+                path = os.path.normpath(os.path.join(dirpath, fname))
+                if fname.endswith(".xml") and path not in produced:
+                    os.remove(path)
+                    stats["removed"] += 1
+            if dirpath != model_folder and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Konversi model Grafico ⇄ file .archimate")
+    ap.add_argument("command", choices=["pack", "unpack"])
+    ap.add_argument("archimate", nargs="?", default=None,
+                    help=f"File .archimate (default: {DEFAULT_OUT})")
+    ap.add_argument("--model", "-m", default=os.environ.get("MODEL_FOLDER", "model"),
+                    help="Folder model Grafico (default: model)")
+    ap.add_argument("--out", "-o", default=None, help="Alias argumen file .archimate untuk pack")
+    ap.add_argument("--force", action="store_true",
+                    help="pack: konversi ulang semua file (abaikan manifest)")
+    ap.add_argument("--prune", action="store_true",
+                    help="unpack: hapus file .xml di folder model yang tidak ada di .archimate")
+    args = ap.parse_args(argv)
+
+    target = args.out or args.archimate or DEFAULT_OUT
+    start = time.perf_counter()
+    if args.command == "pack":
+        if not os.path.isdir(args.model):
+            print(f"ERROR: Folder model tidak ditemukan: {args.model}")
+            sys.exit(1)
+        stats = pack(args.model, target, args.force)
+        status = "ditulis" if stats["written"] else "tidak berubah"
+        print(f"📦 {target} {status}: {stats['converted']} file dikonversi, "
+              f"{stats['reused']} fragmen dipakai ulang, {stats['bytes'] / 1024:.0f} KiB")
+    else:
+        if not os.path.isfile(target):
+            print(f"ERROR: File .archimate tidak ditemukan: {target}")
+            sys.exit(1)
+        stats = unpack(target, args.model, args.prune)
+        for ref in sorted(stats["missing"]):
+            print(f"  [warn] referensi ke id yang tidak ada: {ref}")
+        print(f"📂 {args.model}: {stats['written']} file ditulis, {stats['unchanged']} sama"
+              + (f", {stats['removed']} dihapus" if args.prune else ""))
+    print(f"⏱️  {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Index graf relasi model Grafico untuk analisis dampak
+
+Graf dibaca langsung dari index SQLite model_index.py (tabel files): setiap
+relasi dengan source/target adalah edge, dan kolom id/name/source/target
+punya index SQL. Lookup tetangga O(degree) dan traversal BFS dibatasi
+kedalaman tanpa memuat seluruh model ke memori. Index di-refresh dulu
+(hanya file baru/berubah yang di-parse); --no-refresh memakai index apa
+adanya, mis. setelah export atau `model_index.py rebuild`.
+
+Pemakaian:
+  python scripts/model_graph.py impact "Customer Data" --depth 3
+  python scripts/model_graph.py neighbors id-1234 --direction both --type AccessRelationship
+  python scripts/model_graph.py stats --no-refresh
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from model_index import DEFAULT_INDEX, ModelIndex
+
+DIRECTIONS = ("in", "out", "both")
+FOLDER_TYPE = "Folder"
+
+
+class ModelGraph:
+    """Query graf relasi di atas koneksi SQLite index model"""
+
+    def __init__(self, db):
+        self.db = db
+        self._entries = {}      # memo id → {"name", "type"} atau None
+
+    def element(self, eid):
+        """{"name", "type"} elemen/relasi, None kalau id tidak ada di model"""
+        if eid not in self._entries:
+            row = self.db.execute("SELECT name, type FROM files WHERE id = ? LIMIT 1",
+                                  (eid,)).fetchone()
+            self._entries[eid] = {"name": row[0], "type": row[1]} if row else None
+        return self._entries[eid]
+
+    def resolve(self, query):
+        """id atau nama elemen → list id yang cocok"""
+        if self.element(query) is not None:
+            return [query]
+        return [r[0] for r in self.db.execute(
+            "SELECT id FROM files WHERE name = ? AND type != ? AND id IS NOT NULL "
+            "ORDER BY path", (query, FOLDER_TYPE))]
+
+    def neighbors(self, eid, direction="out", types=None):
+        """[(arah, tipe relasi, id tetangga, id relasi)] — O(degree) lewat index SQL"""
+        result = []
+        for arrow, here, there in (("out", "source", "target"), ("in", "target", "source")):
+            if direction not in (arrow, "both"):
+                continue
+            sql = (f"SELECT type, {there}, id FROM files "
+                   f"WHERE {here} = ? AND {there} IS NOT NULL")
+            params = [eid]
+            if types:
+                sql += f" AND type IN ({', '.join('?' * len(types))})"
+                params.extend(types)
+            for rel_type, other, rel_id in self.db.execute(sql + " ORDER BY type, path", params):
+                result.append((arrow, rel_type, other, rel_id))
+        return result
+
+    def traverse(self, start, depth=2, direction="in", types=None):
+        """BFS dari start sampai `depth` langkah → {id: (jarak, tipe relasi, id relasi, id asal)}
+
+        direction "in" mengikuti relasi ke arah source, yaitu elemen yang
+        bergantung pada start (mis. proses yang meng-access DataObject).
+        """
+        seen = {start: (0, None, None, None)}
+        queue = deque([start])
+        while queue:
+            eid = queue.popleft()
+            dist = seen[eid][0]
+            if dist >= depth:
+                continue
+            for _, rel_type, other, rel_id in self.neighbors(eid, direction, types):
+                if other not in seen:
+                    seen[other] = (dist + 1, rel_type, rel_id, eid)
+                    queue.append(other)
+        return seen
+
+    def stats(self):
+        """Jumlah elemen (tanpa relasi dan folder) dan relasi per tipe"""
+        elements = self.db.execute(
+            "SELECT COUNT(*) FROM files WHERE id IS NOT NULL AND type != ? "
+            "AND source IS NULL AND target IS NULL", (FOLDER_TYPE,)).fetchone()[0]
+        types = dict(self.db.execute(
+            "SELECT type, COUNT(*) AS n FROM files "
+            "WHERE source IS NOT NULL AND target IS NOT NULL "
+            "GROUP BY type ORDER BY n DESC, type"))
+        return {"elements": elements, "relations": sum(types.values()), "by_type": types}
+
+    def label(self, eid):
+        entry = self.element(eid)
+        if entry is None:
+            return f"{eid} (tidak ada di model)"
+        return f"{entry['name'] or '(tanpa nama)'} [{entry['type']}]"
+
+
+def _start_ids(graph, query):
+    ids = graph.resolve(query)
+    if not ids:
+        print(f"ERROR: elemen tidak ditemukan: {query}")
+        sys.exit(1)
+    if len(ids) > 1:
+        print(f"  [warn] {len(ids)} elemen bernama '{query}', semuanya dipakai")
+    return ids
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query graf relasi model Grafico")
+    ap.add_argument("command", choices=["impact", "neighbors", "stats"])
+    ap.add_argument("element", nargs="?", help="id atau nama elemen")
+    ap.add_argument("--model", "-m", default=os.environ.get("MODEL_FOLDER", "model"),
+                    help="Folder model Grafico (default: model)")
+    ap.add_argument("--index", default=DEFAULT_INDEX, metavar="PATH",
+                    help=f"Index model persisten (default: {DEFAULT_INDEX})")
+    ap.add_argument("--no-refresh", action="store_true",
+                    help="Jangan sinkronkan index dengan folder model sebelum query")
+    ap.add_argument("--depth", "-d", type=int, default=3,
+                    help="Kedalaman traversal impact (default: 3)")
+    ap.add_argument("--direction", choices=DIRECTIONS, default=None,
+                    help="in = yang bergantung pada elemen (default impact), "
+                         "out = yang dipakai elemen (default neighbors: both)")
+    ap.add_argument("--type", "-t", action="append", default=None, dest="types",
+                    metavar="RELASI", help="Batasi tipe relasi (boleh diulang)")
+    ap.add_argument("--json", action="store_true", help="Output JSON")
+    args = ap.parse_args(argv)
+
+    if args.no_refresh:
+        if not os.path.exists(args.index):
+            print(f"ERROR: Index tidak ditemukan: {args.index}")
+            sys.exit(1)
+    elif not os.path.isdir(args.model):
+        print(f"ERROR: Folder model tidak ditemukan: {args.model}")
+        sys.exit(1)
+    if args.command != "stats" and not args.element:
+        ap.error(f"{args.command} butuh argumen elemen")
+
+    with ModelIndex(args.index) as idx:
+        start = time.perf_counter()
+        if not args.no_refresh:
+            idx.refresh(args.model)
+        load_ms = (time.perf_counter() - start) * 1000
+        graph = ModelGraph(idx.db)
+        run_query(graph, args, load_ms)
+
+
+def run_query(graph, args, load_ms):
+    if args.command == "stats":
+        stats = graph.stats()
+        if args.json:
+            print(json.dumps(stats, indent=2))
+        else:
+            print(f"📊 {stats['elements']} elemen, {stats['relations']} relasi "
+                  f"(index disinkronkan dalam {load_ms:.0f} ms)")
+            for rel_type, count in stats["by_type"].items():
+                print(f"  {count:>7}  {rel_type}")
+        return
+
+    results = []
+    start = time.perf_counter()
+    for eid in _start_ids(graph, args.element):
+        if args.command == "impact":
+            found = graph.traverse(eid, args.depth, args.direction or "in", args.types)
+            hits = [{"id": other, "name": (graph.element(other) or {}).get("name"),
+                     "type": (graph.element(other) or {}).get("type"), "distance": dist,
+                     "via": rel_type, "from": parent}
+                    for other, (dist, rel_type, _, parent) in found.items() if dist > 0]
+            hits.sort(key=lambda h: (h["distance"], h["name"] or ""))
+        else:
+            hits = [{"id": other, "name": (graph.element(other) or {}).get("name"),
+                     "type": (graph.element(other) or {}).get("type"), "direction": arrow,
+                     "via": rel_type, "relation": rel_id}
+                    for arrow, rel_type, other, rel_id
+                    in graph.neighbors(eid, args.direction or "both", args.types)]
+        results.append({"id": eid, "name": graph.element(eid)["name"], "results": hits})
+    query_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps({"query_ms": round(query_ms, 3), "load_ms": round(load_ms, 1),
+                          "matches": results}, indent=2, ensure_ascii=False))
+        return
+    arrow = {"in": "←", "out": "→", "both": "↔"}[args.direction or "in"]
+    for match in results:
+        print(f"🔎 {graph.label(match['id'])}")
+        if not match["results"]:
+            print("  (tidak ada)")
+        for hit in match["results"]:
+            if args.command == "impact":
+                print(f"  {'  ' * (hit['distance'] - 1)}[{hit['distance']}] "
+                      f"{graph.label(hit['id'])} {arrow} {hit['via']}")
+            else:
+                print(f"  {'→' if hit['direction'] == 'out' else '←'} {graph.label(hit['id'])} ({hit['via']})")
+    print(f"\n⏱️  Query {query_ms:.2f} ms (index disinkronkan dalam {load_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Index persisten (SQLite) untuk file elemen/relasi Grafico
+
+Setiap file XML di-key dengan path relatif + mtime + size. File yang tidak
+berubah dibaca dari index, hanya file baru/berubah yang di-parse ulang.
+
+Pemakaian:
+  python scripts/model_index.py rebuild --model model
+  python scripts/model_index.py verify  --model model
+"""
+
+import xml.etree.ElementTree as ET
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+
+DEFAULT_INDEX = os.path.join(".cache", "model-index.sqlite")
+SCHEMA_VERSION = "2"
+
+ELEMENT_FOLDERS = ["business", "application", "technology", "motivation",
+                   "strategy", "implementation_migration", "other", "relations"]
+
+
+def _strip_ns(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _href_id(elem):
+    href = elem.get("href", "") if elem is not None else ""
+    return href.split("#")[-1] if "#" in href else None
+
+
+def parse_element_file(path):
+    """Baca satu file elemen → (sha1, id, name, type, source, target)
+
+    source/target hanya terisi untuk relasi (id dari href <source>/<target>).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    root = ET.fromstring(data)
+    ends = {_strip_ns(sub.tag): sub for sub in root}
+    return (hashlib.sha1(data).hexdigest(), root.get("id"),
+            root.get("name", ""), _strip_ns(root.tag),
+            _href_id(ends.get("source")), _href_id(ends.get("target")))
+
+
+def iter_element_files(model_folder, subdirs=ELEMENT_FOLDERS):
+    """Yield (relpath, abspath, stat) untuk setiap file .xml elemen"""
+    for subdir in subdirs:
+        folder = os.path.join(model_folder, subdir)
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.name.endswith(".xml") and entry.is_file():
+                    yield f"{subdir}/{entry.name}", entry.path, entry.stat()
+
+
+class ModelIndex:
+    def __init__(self, db_path=DEFAULT_INDEX):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self._init_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _init_schema(self):
+        cur = self.db.cursor()
+        cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = cur.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != SCHEMA_VERSION:
+            cur.execute("DROP TABLE IF EXISTS files")
+            cur.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        cur.execute("""CREATE TABLE IF NOT EXISTS files (
+                           path TEXT PRIMARY KEY,
+                           mtime_ns INTEGER NOT NULL,
+                           size INTEGER NOT NULL,
+                           sha1 TEXT,
+                           id TEXT,
+                           name TEXT,
+                           type TEXT,
+                           source TEXT,
+                           target TEXT,
+                           error TEXT)""")
+        # Lookup per id/nama dan tetangga relasi (model_graph) tanpa scan tabel
+        for column in ("id", "name", "source", "target"):
+            cur.execute(f"CREATE INDEX IF NOT EXISTS files_{column} ON files ({column})")
+        self.db.commit()
+
+    def clear(self):
+        self.db.execute("DELETE FROM files")
+        self.db.commit()
+
+    def refresh(self, model_folder, subdirs=ELEMENT_FOLDERS):
+        """Sinkronkan index dengan folder model → (rows, stats)
+
+        rows: {relpath: (sha1, id, name, type, source, target, error)}; hanya
+        file baru atau yang mtime/size-nya berubah yang di-parse ulang.
+        """
+        cached = {r[0]: r[1:] for r in self.db.execute(
+            "SELECT path, mtime_ns, size, sha1, id, name, type, source, target, error "
+            "FROM files")}
+        rows, updates = {}, []
+        stats = {"cached": 0, "parsed": 0, "removed": 0}
+        for rel, path, st in iter_element_files(model_folder, subdirs):
+            hit = cached.pop(rel, None)
+            if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                rows[rel] = hit[2:]
+                stats["cached"] += 1
+                continue
+            try:
+                row = parse_element_file(path) + (None,)
+            except Exception as e:
+                row = (None, None, None, None, None, None, str(e))
+            rows[rel] = row
+            updates.append((rel, st.st_mtime_ns, st.st_size) + row)
+            stats["parsed"] += 1
+
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO files "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", updates)
+            self.db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in cached])
+        stats["removed"] = len(cached)
+        return rows, stats
+
+    def verify(self, model_folder, subdirs=ELEMENT_FOLDERS):
+        """Parse ulang semua file dan bandingkan dengan isi index → list masalah"""
+        indexed = {r[0]: r[1:] for r in self.db.execute(
+            "SELECT path, mtime_ns, size, sha1, id, name, type, source, target FROM files")}
+        problems = []
+        for rel, path, st in iter_element_files(model_folder, subdirs):
+            entry = indexed.pop(rel, None)
+            if entry is None:
+                problems.append(f"{rel}: tidak ada di index")
+                continue
+            if (entry[0], entry[1]) != (st.st_mtime_ns, st.st_size):
+                problems.append(f"{rel}: mtime/size berubah (stale)")
+                continue
+            try:
+                actual = parse_element_file(path)
+            except Exception as e:
+                if entry[2] is not None:
+                    problems.append(f"{rel}: gagal di-parse ({e})")
+                continue
+            if tuple(entry[2:]) != actual:
+                problems.append(f"{rel}: isi index tidak cocok dengan file")
+        problems.extend(f"{rel}: file sudah tidak ada" for rel in indexed)
+        return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Kelola index persisten model Grafico")
+    ap.add_argument("command", choices=["rebuild", "verify"])
+    ap.add_argument("--model", "-m", default=os.environ.get("MODEL_FOLDER", "model"),
+                    help="Folder model Grafico (default: model)")
+    ap.add_argument("--index", "-i", default=DEFAULT_INDEX,
+                    help=f"Path file index (default: {DEFAULT_INDEX})")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.model):
+        print(f"ERROR: Folder model tidak ditemukan: {args.model}")
+        sys.exit(1)
+
+    with ModelIndex(args.index) as idx:
+        if args.command == "rebuild":
+            idx.clear()
+            rows, stats = idx.refresh(args.model)
+            print(f"✅ Index dibangun ulang: {stats['parsed']} file → {args.index}")
+        else:
+            problems = idx.verify(args.model)
+            for p in problems:
+                print(f"  [stale] {p}")
+            if problems:
+                print(f"❌ {len(problems)} masalah ditemukan — jalankan 'rebuild'")
+                sys.exit(1)
+            print("✅ Index cocok dengan model")
+
+
+if __name__ == "__main__":
+    main()
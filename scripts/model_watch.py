@@ -0,0 +1,194 @@
+"""
+Pemantau perubahan file model Grafico untuk export_png.py --watch
+
+InotifyWatcher memakai inotify Linux langsung lewat ctypes (tanpa dependensi
+tambahan); di platform lain, atau kalau inotify gagal dipakai,
+make_watcher() jatuh ke PollingWatcher yang membandingkan mtime/size.
+
+Keduanya punya API yang sama: wait(timeout) → set path (absolut) file .xml
+yang berubah/ditambah/dihapus, setelah perubahan "tenang" selama `settle`
+detik (Archi menulis banyak file sekaligus saat save).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_SETTLE = 0.1
+
+
+def _is_model_file(path):
+    return path.endswith(".xml")
+
+
+def scan(folder):
+    """{path: (mtime_ns, size)} untuk semua file .xml di bawah folder"""
+    snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for fname in filenames:
+            if _is_model_file(fname):
+                path = os.path.join(dirpath, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+class PollingWatcher:
+    name = "polling"
+
+    def __init__(self, folder, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE):
+        self.folder = folder
+        self.interval = interval
+        self.settle = settle
+        self.snapshot = scan(folder)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _diff(self):
+        current = scan(self.folder)
+        old = self.snapshot
+        changed = {p for p in current.keys() | old.keys() if current.get(p) != old.get(p)}
+        self.snapshot = current
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._diff()
+            if changed:
+                # Tunggu sampai tidak ada perubahan baru selama `settle`
+                while True:
+                    time.sleep(self.settle)
+                    more = self._diff()
+                    if not more:
+                        return changed
+                    changed |= more
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+
+# ─── INOTIFY (LINUX) ──────────────────────────────────────────────────────────
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    name = "inotify"
+
+    def __init__(self, folder, settle=DEFAULT_SETTLE):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify hanya tersedia di Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 gagal")
+        self.folder = folder
+        self.settle = settle
+        self.dirs = {}
+        self._add_tree(folder)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _add_dir(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch gagal: {path}")
+        self.dirs[wd] = path
+
+    def _add_tree(self, root):
+        """Pasang watch di root + semua subfolder → file .xml yang sudah ada"""
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            self._add_dir(dirpath)
+            found.update(os.path.join(dirpath, f) for f in filenames if _is_model_file(f))
+        return found
+
+    def _read(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        data = os.read(self.fd, 64 * 1024)
+        changed, pos = set(), 0
+        while pos + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                # Antrian kernel penuh — anggap semua file bisa berubah
+                changed |= set(scan(self.folder))
+                continue
+            base = self.dirs.get(wd)
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if base is None or not name:
+                continue
+            path = os.path.join(base, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                    # File yang dibuat sebelum watch terpasang ikut dilaporkan
+                    changed |= self._add_tree(path)
+                continue
+            if _is_model_file(name):
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        changed = self._read(timeout)
+        if not changed:
+            return set()
+        while True:
+            more = self._read(self.settle)
+            if more is None:
+                return changed
+            changed |= more
+
+
+def make_watcher(folder, interval=DEFAULT_INTERVAL, polling=False):
+    """inotify kalau bisa, selain itu polling tiap `interval` detik"""
+    if not polling:
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(folder, interval)
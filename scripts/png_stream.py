@@ -0,0 +1,63 @@
+"""
+Writer PNG streaming untuk render bertile
+
+Baris gambar ditulis per band (strip horizontal) dan langsung dikompres ke
+chunk IDAT, jadi memori yang dipakai sebanding dengan satu band — bukan
+dengan ukuran seluruh kanvas.
+"""
+
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IDAT_CHUNK = 1 << 20
+
+
+def _chunk(tag, data):
+    body = tag + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+class PngStreamWriter:
+    """PNG RGB 8-bit; panggil write_band() berurutan dari atas ke bawah"""
+
+    def __init__(self, fp, width, height, dpi=150, level=6, strategy=zlib.Z_DEFAULT_STRATEGY):
+        self.fp = fp
+        self.width, self.height = width, height
+        self.stride = width * 3
+        self.rows_written = 0
+        self.z = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 8, strategy)
+        self.pending = bytearray()
+        fp.write(PNG_SIGNATURE)
+        fp.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        ppm = int(round(dpi / 0.0254))
+        fp.write(_chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1)))
+
+    def write_band(self, raw):
+        """raw: bytes RGB band selebar `width` (mis. Image.tobytes())"""
+        stride = self.stride
+        rows = len(raw) // stride
+        if self.rows_written + rows > self.height:
+            raise ValueError("Band melebihi tinggi gambar")
+        # Filter byte 0 (None) di depan setiap baris
+        scan = bytearray(rows * (stride + 1))
+        for i in range(rows):
+            start = i * (stride + 1)
+            scan[start + 1:start + 1 + stride] = raw[i * stride:(i + 1) * stride]
+        self._push(self.z.compress(bytes(scan)))
+        self.rows_written += rows
+
+    def _push(self, data):
+        self.pending += data
+        while len(self.pending) >= IDAT_CHUNK:
+            self.fp.write(_chunk(b"IDAT", bytes(self.pending[:IDAT_CHUNK])))
+            del self.pending[:IDAT_CHUNK]
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"Baru {self.rows_written}/{self.height} baris ditulis")
+        self.pending += self.z.flush()
+        if self.pending:
+            self.fp.write(_chunk(b"IDAT", bytes(self.pending)))
+            self.pending = bytearray()
+        self.fp.write(_chunk(b"IEND", b""))
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Server HTTP lokal untuk me-render diagram ArchiMate (Grafico) on-demand
+
+Model dibaca sekali dan dipantau (sama seperti export_png.py --watch);
+gambar di-render ke memori di process pool, lalu disimpan di cache LRU
+dengan key hash isi model (file diagram + elemen/relasi yang di-href-nya +
+setting renderer). Hash yang sama dipakai sebagai ETag.
+
+Endpoint:
+  GET /                      → halaman HTML daftar view
+  GET /diagrams              → daftar view (JSON)
+  GET /diagrams/<id>.png     → render PNG (juga .svg)
+  GET /stats                 → statistik cache
+
+Pemakaian:
+  python scripts/serve_diagrams.py --model model --port 8765
+"""
+
+import argparse
+import asyncio
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+import export_png as ex
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "webp": "image/webp"}
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class RenderCache:
+    """LRU bytes dibatasi total ukuran; key = (id, fmt, hash isi)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, data):
+        n = len(data or b"")
+        if n > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key) or b"")
+        self.entries[key] = data
+        self.size += n
+        while self.size > self.max_bytes and self.entries:
+            _, old = self.entries.popitem(last=False)
+            self.size -= len(old or b"")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "bytes": self.size,
+                "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None}
+
+
+class DiagramServer:
+    def __init__(self, model_folder, elements_map, jobs=2, cache_bytes=64 << 20, opts=None):
+        self.model_folder = model_folder
+        self.opts = opts or {}
+        self.session = ex.WatchSession(model_folder, None, elements_map, {"outputs": {}},
+                                       self.opts)
+        self.settings = ex.settings_digest(self.opts)
+        self.cache = RenderCache(cache_bytes)
+        self.inflight = {}
+        self.renders = 0
+        # Refresh model jalan di thread; lock ini menjaga request tidak membaca
+        # session (diagram, elements_map, deps) yang sedang diubah
+        self.lock = asyncio.Lock()
+        self._ids = None
+        self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=ex._init_worker,
+                                        initargs=({}, self.opts))
+
+    # ─── MODEL ───────────────────────────────────────────────────────────────
+
+    @property
+    def ids(self):
+        """{diagram id: path}; dibangun ulang setelah model berubah"""
+        if self._ids is None:
+            self._ids = {root.get("id"): path
+                         for path, root in self.session.diagrams.items() if root.get("id")}
+        return self._ids
+
+    def refresh(self, changed):
+        """Terapkan perubahan file → perbarui diagram terdampak
+
+        Hanya file diagram yang berubah yang di-parse ulang; sisanya cukup
+        dependensinya (dan content hash) yang dihitung ulang. Blocking (parse
+        + sha1) — dari event loop panggil lewat apply_changes.
+        """
+        affected = self.session.apply(changed)
+        self.session.update(affected, changed, {})
+        if affected:
+            self._ids = None
+            print(f"🔄 {len(changed)} file berubah, {len(affected)} diagram diperbarui",
+                  flush=True)
+
+    async def apply_changes(self, changed):
+        """refresh di thread, di bawah lock — request lain menunggu, loop tetap jalan"""
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            await loop.run_in_executor(None, self.refresh, changed)
+
+    def content_hash(self, path, fmt):
+        deps = self.session.deps[path]
+        blob = json.dumps([self.settings, fmt, sorted(deps.items())]).encode("utf-8")
+        return hashlib.sha1(blob).hexdigest()
+
+    async def watch(self, interval=None, polling=False):
+        from model_watch import DEFAULT_INTERVAL, make_watcher
+
+        loop = asyncio.get_running_loop()
+        with make_watcher(self.model_folder, interval or DEFAULT_INTERVAL, polling) as watcher:
+            print(f"👀 Model dipantau ({watcher.name})")
+            while True:
+                changed = await loop.run_in_executor(None, watcher.wait, 1.0)
+                if changed:
+                    await self.apply_changes(changed)
+
+    # ─── RENDER ──────────────────────────────────────────────────────────────
+
+    def _payload(self, diagram):
+        """(diagram, elemen yang di-href) untuk worker — jalan di thread, bukan event loop
+
+        DOM dikirim sebagai XML; StreamedDiagram (file besar) langsung di-pickle.
+        """
+        data = diagram if isinstance(diagram, ex.StreamedDiagram) else ex.ET.tostring(diagram)
+        return data, ex.referenced_elements(diagram, self.session.elements_map)
+
+    async def render(self, path, fmt, key):
+        """Future bytes hasil render (dari cache, render yang sedang jalan, atau pool)
+
+        Dipanggil di bawah self.lock supaya diagram dan elemen yang dikirim ke
+        worker sama versinya dengan `key`; future-nya ditunggu di luar lock.
+        """
+        loop = asyncio.get_running_loop()
+        found, data = self.cache.get(key)
+        if found:
+            fut = loop.create_future()
+            fut.set_result(data)
+            return fut
+        if key not in self.inflight:
+            # Serialisasi diagram besar bisa makan ratusan ms; jangan blokir koneksi lain
+            data, elements = await loop.run_in_executor(None, self._payload,
+                                                        self.session.diagrams[path])
+            job = loop.run_in_executor(self.pool, ex._render_bytes_in_worker, data, elements, fmt)
+            self.inflight[key] = asyncio.ensure_future(self._store(key, job))
+            self.renders += 1
+        return self.inflight[key]
+
+    async def _store(self, key, job):
+        try:
+            data = await job
+            self.cache.put(key, data)
+            return data
+        finally:
+            self.inflight.pop(key, None)
+
+    # ─── HTTP ────────────────────────────────────────────────────────────────
+
+    def list_views(self):
+        views = []
+        for did, path in sorted(self.ids.items(), key=lambda kv: self.session.diagrams[kv[1]]
+                                .get("name", "")):
+            views.append({"id": did, "name": self.session.diagrams[path].get("name", "Untitled"),
+                          "path": ex.model_relpath(path, self.model_folder),
+                          **{fmt: f"/diagrams/{did}.{fmt}" for fmt in ex.OUTPUT_FORMATS}})
+        return views
+
+    def index_html(self):
+        items = "\n".join(
+            f'<li><a href="{v["png"]}">{html.escape(v["name"])}</a> '
+            f'(<a href="{v["svg"]}">svg</a>)</li>' for v in self.list_views())
+        return (f"<!doctype html><meta charset=\"utf-8\"><title>Diagram</title>"
+                f"<h1>Diagram ({len(self.ids)})</h1><ul>\n{items}\n</ul>\n").encode("utf-8")
+
+    async def route(self, method, target, headers):
+        """→ (status, headers, body)"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        path = unquote(urlsplit(target).path).rstrip("/") or "/"
+        async with self.lock:
+            status, extra, body = await self._route(path, headers)
+        if not isinstance(body, asyncio.Future):
+            return status, extra, body
+        # Render ditunggu di luar lock: refresh model tidak perlu menunggu pool
+        try:
+            data = await asyncio.shield(body)
+        except Exception as e:
+            return 500, {}, f"render gagal: {type(e).__name__}: {e}\n".encode("utf-8")
+        if data is None:
+            return 404, {}, b"diagram tidak punya elemen visual\n"
+        return status, extra, data
+
+    async def _route(self, path, headers):
+        """Bagian route yang membaca model (di bawah lock) → (status, headers, body);
+        body request gambar berupa future render"""
+        if path == "/":
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.index_html()
+        if path == "/diagrams":
+            return 200, {"Content-Type": "application/json"}, _json(self.list_views())
+        if path == "/stats":
+            return 200, {"Content-Type": "application/json"}, _json(
+                dict(self.cache.stats(), renders=self.renders, diagrams=len(self.ids)))
+        if not path.startswith("/diagrams/"):
+            return 404, {}, b"tidak ditemukan\n"
+
+        did, _, fmt = path[len("/diagrams/"):].rpartition(".")
+        if fmt not in CONTENT_TYPES:
+            return 404, {}, b"format harus .png, .svg atau .webp\n"
+        diagram_path = self.ids.get(did)
+        if diagram_path is None:
+            return 404, {}, b"diagram tidak ditemukan\n"
+
+        digest = self.content_hash(diagram_path, fmt)
+        etag = f'"{digest}"'
+        common = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in _etags(headers.get("if-none-match", "")):
+            return 304, common, b""
+        try:
+            job = await self.render(diagram_path, fmt, (did, fmt, digest))
+        except Exception as e:
+            return 500, {}, f"render gagal: {type(e).__name__}: {e}\n".encode("utf-8")
+        return 200, dict(common, **{"Content-Type": CONTENT_TYPES[fmt]}), job
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                parts = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                start = time.perf_counter()
+                if len(parts) != 3:
+                    status, extra, body, version = 400, {}, b"request tidak valid\n", "HTTP/1.0"
+                else:
+                    method, target, version = parts
+                    status, extra, body = await self.route(method, target, headers)
+                keep = (version == "HTTP/1.1" and status != 400
+                        and headers.get("connection", "").lower() != "close")
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if parts[:1] != ["HEAD"] and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                print(f"  {' '.join(parts[:2])} → {status} "
+                      f"({(time.perf_counter() - start) * 1000:.0f} ms)", flush=True)
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _json(data):
+    return (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _etags(value):
+    """Token If-None-Match; weak (W/) dianggap sama"""
+    return {t.strip().removeprefix("W/") for t in value.split(",") if t.strip()}
+
+
+async def serve(server, host, port, watch=True, interval=None, polling=False):
+    srv = await asyncio.start_server(server.handle, host, port)
+    print(f"🌐 http://{host}:{port}/ — {len(server.ids)} diagram, Ctrl+C untuk berhenti",
+          flush=True)
+    tasks = [asyncio.create_task(server.watch(interval, polling))] if watch else []
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Server render diagram ArchiMate (Grafico)")
+    ap.add_argument("--model", "-m", default=os.environ.get("MODEL_FOLDER", "model"),
+                    help="Folder model Grafico (default: model)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", "-p", type=int, default=8765)
+    ap.add_argument("--jobs", "-j", type=int, default=2, metavar="N",
+                    help="Jumlah proses render (default: 2)")
+    ap.add_argument("--cache-mb", type=float, default=64,
+                    help="Batas ukuran cache gambar dalam MB (default: 64)")
+    ap.add_argument("--index", nargs="?", const=ex.DEFAULT_INDEX, default=None, metavar="PATH",
+                    help=f"Pakai index model persisten (default: {ex.DEFAULT_INDEX})")
+    ap.add_argument("--no-watch", action="store_true", help="Jangan pantau perubahan model")
+    ap.add_argument("--watch-polling", action="store_true",
+                    help="Paksa polling walau inotify tersedia")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.model):
+        print(f"ERROR: Folder model tidak ditemukan: {args.model}")
+        sys.exit(1)
+    print(f"📂 Model  : {args.model}")
+    elements_map = ex.load_model_elements(args.model, args.index)
+    server = DiagramServer(args.model, elements_map, max(1, args.jobs),
+                           int(args.cache_mb * (1 << 20)))
+    try:
+        asyncio.run(serve(server, args.host, args.port, not args.no_watch,
+                          polling=args.watch_polling))
+    except KeyboardInterrupt:
+        print("\n👋 Server dihentikan")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Index spasial grid seragam untuk node/koneksi diagram
+
+Setiap item disimpan di semua sel grid yang dilalui bounding box-nya;
+query(rect) hanya memeriksa sel yang beririsan dengan rect, bukan semua item.
+"""
+
+import math
+
+
+class GridIndex:
+    def __init__(self, cell_size=256):
+        self.cell = cell_size
+        self.cells = {}
+        self.rects = []
+
+    def __len__(self):
+        return len(self.rects)
+
+    def _span(self, x1, y1, x2, y2):
+        c = self.cell
+        return (math.floor(x1 / c), math.floor(y1 / c),
+                math.floor(x2 / c), math.floor(y2 / c))
+
+    def insert(self, rect):
+        """Tambah rect (x1, y1, x2, y2) → nomor item (urutan insert)"""
+        i = len(self.rects)
+        self.rects.append(rect)
+        cx1, cy1, cx2, cy2 = self._span(*rect)
+        cells = self.cells
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cells.setdefault((cx, cy), []).append(i)
+        return i
+
+    def query(self, rect, margin=0):
+        """Nomor item yang bbox-nya beririsan dengan rect, urut sesuai insert"""
+        x1, y1, x2, y2 = (rect[0] - margin, rect[1] - margin,
+                          rect[2] + margin, rect[3] + margin)
+        cx1, cy1, cx2, cy2 = self._span(x1, y1, x2, y2)
+        found = set()
+        cells, rects = self.cells, self.rects
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                for i in cells.get((cx, cy), ()):
+                    if i in found:
+                        continue
+                    r = rects[i]
+                    if r[0] <= x2 and r[2] >= x1 and r[1] <= y2 and r[3] >= y1:
+                        found.add(i)
+        return sorted(found)
+
+    @classmethod
+    def build(cls, rects, cell_size=None):
+        """Bangun index; ukuran sel default ~2x rata-rata sisi bbox"""
+        rects = list(rects)
+        if cell_size is None:
+            if rects:
+                avg = sum((r[2] - r[0]) + (r[3] - r[1]) for r in rects) / (2 * len(rects))
+                cell_size = max(64, int(avg * 2))
+            else:
+                cell_size = 256
+        index = cls(cell_size)
+        for r in rects:
+            index.insert(r)
+        return index
@@ -0,0 +1,96 @@
+"""
+Backend SVG untuk export_png.py
+
+SvgDraw meniru subset API ImageDraw yang dipakai renderer (line, polygon,
+rectangle, ellipse, text, textbbox), jadi helper draw_arrow_*/draw_diamond_*
+bisa dipakai tanpa perubahan dan menghasilkan primitif vektor.
+"""
+
+from xml.sax.saxutils import escape, quoteattr
+
+
+def _pts(points):
+    return " ".join(f"{x},{y}" for x, y in points)
+
+
+def _font_size(font, default=12):
+    return getattr(font, "size", default)
+
+
+class SvgDraw:
+    # Dikenali DrawList.flush: segmen dikirim sekaligus lewat lines()
+    vector = True
+
+    def __init__(self):
+        self.parts = []
+
+    def lines(self, segments, fill="#000000", width=1, dash=None):
+        """Banyak segmen lepas dalam satu <path> (subpath M..L per segmen)"""
+        if not segments:
+            return
+        d = " ".join(f"M{x1} {y1}L{x2} {y2}" for x1, y1, x2, y2 in segments)
+        dasharray = f' stroke-dasharray="{dash[0]} {dash[1]}"' if dash else ""
+        self.parts.append(f'<path d="{d}" fill="none" stroke="{fill}" '
+                          f'stroke-width="{width}"{dasharray}/>')
+
+    def line(self, xy, fill="#000000", width=1, joint=None):
+        if len(xy) == 2:
+            (x1, y1), (x2, y2) = xy
+            self.parts.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" '
+                              f'stroke="{fill}" stroke-width="{width}"/>')
+        else:
+            self.parts.append(f'<polyline points="{_pts(xy)}" fill="none" '
+                              f'stroke="{fill}" stroke-width="{width}"/>')
+
+    def polygon(self, xy, fill=None, outline=None, width=1):
+        stroke = f' stroke="{outline}" stroke-width="{width}"' if outline else ""
+        self.parts.append(f'<polygon points="{_pts(xy)}" fill="{fill or "none"}"{stroke}/>')
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        (x1, y1), (x2, y2) = (xy[0], xy[1]) if len(xy) == 2 else ((xy[0], xy[1]), (xy[2], xy[3]))
+        stroke = f' stroke="{outline}" stroke-width="{width}"' if outline else ""
+        self.parts.append(f'<rect x="{x1}" y="{y1}" width="{x2 - x1}" height="{y2 - y1}" '
+                          f'fill="{fill or "none"}"{stroke}/>')
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        x1, y1, x2, y2 = xy
+        stroke = f' stroke="{outline}" stroke-width="{width}"' if outline else ""
+        self.parts.append(f'<ellipse cx="{(x1 + x2) / 2}" cy="{(y1 + y2) / 2}" '
+                          f'rx="{(x2 - x1) / 2}" ry="{(y2 - y1) / 2}" '
+                          f'fill="{fill or "none"}"{stroke}/>')
+
+    def text(self, xy, text, fill="#000000", font=None):
+        x, y = xy
+        size = _font_size(font)
+        # ImageDraw menaruh teks dari atas (ascender), SVG dari baseline
+        try:
+            ascent = font.getmetrics()[0]
+        except Exception:
+            ascent = round(size * 0.8)
+        self.parts.append(f'<text x="{x}" y="{y + ascent}" font-size="{size}" '
+                          f'fill="{fill}">{escape(str(text))}</text>')
+
+    def textbbox(self, xy, text, font=None):
+        x, y = xy
+        try:
+            l, t, r, b = font.getbbox(text)
+        except Exception:
+            l, t, r, b = 0, 0, len(text) * 7, _font_size(font)
+        return x + l, y + t, x + r, y + b
+
+
+class SvgCanvas:
+    ext = "svg"
+
+    def __init__(self, width, height, background="#FFFFFF"):
+        self.width, self.height = width, height
+        self.draw = SvgDraw()
+        self.draw.rectangle([(0, 0), (width, height)], fill=background)
+
+    def tobytes(self, font_family="DejaVu Sans, Liberation Sans, Arial, sans-serif", size=None):
+        """size=(w, h) mengubah ukuran tampil saja — viewBox (koordinat gambar) tetap"""
+        width, height = size or (self.width, self.height)
+        head = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+                f'height="{height}" viewBox="0 0 {self.width} {self.height}" '
+                f'font-family={quoteattr(font_family)}>\n')
+        return (head + "\n".join(self.draw.parts) + "\n</svg>\n").encode("utf-8")
@@ -0,0 +1,52 @@
+"""Fixture bersama: scripts/ di sys.path + model Grafico sintetis kecil"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import gen_model  # noqa: E402
+
+REPO_MODEL = os.path.join(ROOT, "model")
+
+
+@pytest.fixture(scope="session")
+def synthetic_model(tmp_path_factory):
+    """Model kecil dengan group bersarang 3 tingkat dan sub-folder diagram"""
+    out = str(tmp_path_factory.mktemp("model") / "grafico")
+    gen_model.generate_model(out, elements=300, nodes_per_diagram=60, depth=3,
+                             density=1.5, folder_depth=1, seed=7)
+    return out
+
+
+def diagram_files(model_folder):
+    paths = []
+    for dirpath, _, filenames in os.walk(os.path.join(model_folder, "diagrams")):
+        paths.extend(os.path.join(dirpath, f) for f in filenames
+                     if f.endswith(".xml") and f != "folder.xml")
+    return sorted(paths)
+
+
+def run_export(model, out, monkeypatch, capsys, *args):
+    """export_png.main() untuk model → out; → stdout run itu"""
+    import export_png as ex
+
+    monkeypatch.setenv("MODEL_FOLDER", model)
+    monkeypatch.setenv("OUTPUT_FOLDER", out)
+    ex.main(["--render-times", os.path.join(out, "times.json"), *args])
+    return capsys.readouterr().out
+
+
+def output_digests(folder):
+    """{nama file gambar: sha1} di folder output"""
+    import hashlib
+
+    digests = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.endswith((".png", ".svg", ".webp")):
+            with open(os.path.join(folder, fname), "rb") as f:
+                digests[fname] = hashlib.sha1(f.read()).hexdigest()
+    return digests
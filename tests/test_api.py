@@ -0,0 +1,36 @@
+"""API load_model/render: pesan ditulis ke sink sendiri, sys.stdout tidak dialihkan"""
+
+import io
+import sys
+
+import export_png as ex
+from conftest import REPO_MODEL
+
+
+def test_render_keeps_stdout(monkeypatch, capsys):
+    # redirect_stdout global — render di thread lain akan menelan print thread ini
+    stdout = sys.stdout
+    seen = []
+    paint = ex.paint_diagram
+
+    def checked_paint(*args, **kwargs):
+        seen.append(sys.stdout is stdout)
+        return paint(*args, **kwargs)
+
+    monkeypatch.setattr(ex, "paint_diagram", checked_paint)
+    model = ex.load_model(REPO_MODEL)
+    did = next(d["id"] for d in model.diagrams.values() if d["name"] == "PerencanaanProduksi")
+    for fmt in ("png", "svg"):
+        assert ex.render(model, did, fmt)
+    assert seen and all(seen)
+    assert capsys.readouterr().out == ""
+
+
+def test_render_bytes_log_sink(capsys):
+    elements_map = ex.load_elements(REPO_MODEL)
+    path = next(p for p in ex.discover_diagrams(REPO_MODEL)
+                if ex.diagram_header(p)[1] == "PerencanaanProduksi")
+    log = io.StringIO()
+    assert ex.render_bytes(ex.load_diagram(path), elements_map, ex.load_fonts(), "svg", log=log)
+    assert "✅" in log.getvalue()
+    assert capsys.readouterr().out == ""
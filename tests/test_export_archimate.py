@@ -0,0 +1,13 @@
+"""export_archimate: file yang dikumpulkan dari folder model Grafico"""
+
+from pathlib import Path
+
+import export_archimate as ea
+from conftest import diagram_files
+
+
+def test_find_diagram_files_skips_folder_metadata(synthetic_model):
+    files = ea.find_diagram_files(Path(synthetic_model))
+    assert (Path(synthetic_model) / 'diagrams' / 'folder.xml').exists()
+    assert not any(f.name == 'folder.xml' for f in files)
+    assert sorted(map(str, files)) == diagram_files(synthetic_model)
@@ -0,0 +1,73 @@
+"""Export --incremental harus sama dengan export penuh dan stabil di run berikutnya"""
+
+import os
+import re
+import shutil
+
+import pytest
+
+import export_png as ex
+from conftest import REPO_MODEL, output_digests, run_export
+
+
+@pytest.fixture
+def same_name_model(tmp_path):
+    """Model repo + salinan view lain dengan nama yang sama seperti 'Bussiness Process'"""
+    model = str(tmp_path / "model")
+    shutil.copytree(REPO_MODEL, model)
+    src = os.path.join(model, "diagrams", "id-29ecc4a9fe1448faa369b33d92b0797c",
+                       "id-b45fe89aba0443f5996f3655222299a5",
+                       "ArchimateDiagramModel_id-3d8ec848347d41e3aba6c40cb60365cc.xml")
+    with open(src, encoding="utf-8") as f:
+        text = f.read()
+    text = re.sub(r'name="[^"]*"', 'name="Bussiness Process"', text, count=1)
+    text = text.replace("id-3d8ec848347d41e3aba6c40cb60365cc", "id-00000000000000000000000000000dup")
+    dup = os.path.join(model, "diagrams", "zz", "ArchimateDiagramModel_id-dup.xml")
+    os.makedirs(os.path.dirname(dup))
+    with open(dup, "w", encoding="utf-8") as f:
+        f.write(text)
+    return model
+
+
+def test_same_name_views_incremental_matches_full(same_name_model, tmp_path, monkeypatch,
+                                                  capsys):
+    full, inc = str(tmp_path / "full"), str(tmp_path / "inc")
+    log = run_export(same_name_model, full, monkeypatch, capsys)
+    assert "dilewati" in log
+    run_export(same_name_model, inc, monkeypatch, capsys, "--incremental")
+    assert output_digests(inc) == output_digests(full)
+
+    # Run berikutnya tidak me-render ulang apa pun
+    log = run_export(same_name_model, inc, monkeypatch, capsys, "--incremental")
+    assert re.search(r"Selesai! 0/\d+ diagram di-export", log)
+    assert output_digests(inc) == output_digests(full)
+
+
+def test_incremental_rerenders_only_changed_dependency(tmp_path, monkeypatch, capsys):
+    model = str(tmp_path / "model")
+    shutil.copytree(REPO_MODEL, model)
+    out = str(tmp_path / "out")
+    run_export(model, out, monkeypatch, capsys, "--incremental")
+    before = output_digests(out)
+
+    # Ganti nama satu elemen → hanya view yang memakainya yang di-render ulang
+    elements_map = ex.load_elements(model)
+    users = {}
+    for path in ex.discover_diagrams(model):
+        root = ex.load_diagram(path)
+        for ref in {sub.get("href").split("#")[-1] for sub in root.iter()
+                    if "#" in sub.get("href", "")}:
+            users.setdefault(ref, set()).add(ex.output_name(root, "png"))
+    ref, views = next((r, v) for r, v in sorted(users.items())
+                      if r in elements_map and elements_map[r]["type"] != "Folder"
+                      and len(v) == 1)
+    path = elements_map[ref]["path"]
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(re.sub(r'name="([^"]*)"', r'name="\1 (renamed)"', text, count=1))
+
+    log = run_export(model, out, monkeypatch, capsys, "--incremental")
+    assert "Selesai! 1/" in log
+    after = output_digests(out)
+    assert {f for f in after if after[f] != before[f]} == views
@@ -0,0 +1,55 @@
+"""Grafico → .archimate → Grafico harus menghasilkan file yang sama byte-per-byte"""
+
+import os
+
+import pytest
+
+import model_archimate as ma
+from conftest import REPO_MODEL
+
+
+def _xml_files(folder):
+    files = {}
+    for dirpath, _, filenames in os.walk(folder):
+        for fname in filenames:
+            if fname.endswith(".xml"):
+                path = os.path.join(dirpath, fname)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, folder)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("model", ["repo", "synthetic"])
+def test_pack_unpack_roundtrip(model, synthetic_model, tmp_path):
+    folder = REPO_MODEL if model == "repo" else synthetic_model
+    out = str(tmp_path / "model.archimate")
+    ma.pack(folder, out)
+    stats = ma.unpack(out, str(tmp_path / "unpacked"))
+    assert not stats["missing"]
+    assert _xml_files(str(tmp_path / "unpacked")) == _xml_files(folder)
+
+
+def test_repack_reuses_unchanged_fragments(synthetic_model, tmp_path):
+    folder = str(tmp_path / "grafico")
+    out = str(tmp_path / "model.archimate")
+    ma.pack(synthetic_model, out)
+    ma.unpack(out, folder)
+    with open(out, "rb") as f:
+        first = f.read()
+    stats = ma.pack(folder, out)
+    assert stats["converted"] == 0 and not stats["written"]
+
+    # Satu elemen diubah → hanya fragmen itu yang dikonversi ulang
+    path = next(os.path.join(folder, "business", f)
+                for f in sorted(os.listdir(os.path.join(folder, "business")))
+                if f != "folder.xml")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace('name="', 'name="Renamed ', 1))
+    stats = ma.pack(folder, out)
+    assert stats["converted"] == 1 and stats["written"]
+    with open(out, "rb") as f:
+        assert f.read() != first
+    ma.unpack(out, str(tmp_path / "again"))
+    assert _xml_files(str(tmp_path / "again")) == _xml_files(folder)
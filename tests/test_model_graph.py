@@ -0,0 +1,97 @@
+"""Query graf relasi (model_graph) di atas index SQLite"""
+
+import os
+
+import pytest
+
+import model_graph
+from model_graph import ModelGraph
+from model_index import ModelIndex
+
+NS = ('xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"\n'
+      '    xmlns:archimate="http://www.archimatetool.com/archimate"')
+# id → (folder, tipe, nama)
+ELEMENTS = {
+    "id-actor": ("business", "BusinessActor", "Customer"),
+    "id-proc": ("business", "BusinessProcess", "Order"),
+    "id-app": ("application", "ApplicationComponent", "ERP"),
+    "id-data": ("application", "DataObject", "Customer Data"),
+}
+# (id relasi, tipe, source, target)
+RELATIONS = [
+    ("id-r1", "AssignmentRelationship", "id-actor", "id-proc"),
+    ("id-r2", "AccessRelationship", "id-proc", "id-data"),
+    ("id-r3", "AccessRelationship", "id-app", "id-data"),
+]
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _href(eid):
+    _, etype, _ = ELEMENTS[eid]
+    return f'xsi:type="archimate:{etype}" href="{etype}_{eid}.xml#{eid}"'
+
+
+@pytest.fixture
+def graph(tmp_path):
+    model = str(tmp_path / "model")
+    for folder in ("business", "application", "relations"):
+        # Folder bernama sama dengan elemen tidak boleh ikut resolve/stats
+        _write(os.path.join(model, folder, "folder.xml"),
+               f'<archimate:Folder xmlns:archimate="http://www.archimatetool.com/archimate" '
+               f'name="Customer" id="id-folder-{folder}" type="{folder}"/>\n')
+    for eid, (folder, etype, name) in ELEMENTS.items():
+        _write(os.path.join(model, folder, f"{etype}_{eid}.xml"),
+               f'<archimate:{etype}\n    {NS}\n    name="{name}"\n    id="{eid}"/>\n')
+    for rid, rtype, src, tgt in RELATIONS:
+        _write(os.path.join(model, "relations", f"{rtype}_{rid}.xml"),
+               f'<archimate:{rtype}\n    {NS}\n    id="{rid}">\n'
+               f'  <source {_href(src)}/>\n  <target {_href(tgt)}/>\n'
+               f'</archimate:{rtype}>\n')
+    with ModelIndex(str(tmp_path / "index.sqlite")) as idx:
+        idx.refresh(model)
+        yield ModelGraph(idx.db)
+
+
+def test_resolve_by_id_and_name_skips_folders(graph):
+    assert graph.resolve("id-proc") == ["id-proc"]
+    assert graph.resolve("Customer") == ["id-actor"]
+    assert graph.resolve("Nope") == []
+    assert graph.label("id-data") == "Customer Data [DataObject]"
+
+
+def test_neighbors_direction_and_type_filter(graph):
+    assert graph.neighbors("id-proc", "out") == [
+        ("out", "AccessRelationship", "id-data", "id-r2")]
+    assert graph.neighbors("id-proc", "both") == [
+        ("out", "AccessRelationship", "id-data", "id-r2"),
+        ("in", "AssignmentRelationship", "id-actor", "id-r1")]
+    assert graph.neighbors("id-data", "in", types=["AssignmentRelationship"]) == []
+
+
+def test_impact_traversal_depth(graph):
+    impact = graph.traverse("id-data", depth=2, direction="in")
+    assert impact == {
+        "id-data": (0, None, None, None),
+        "id-proc": (1, "AccessRelationship", "id-r2", "id-data"),
+        "id-app": (1, "AccessRelationship", "id-r3", "id-data"),
+        "id-actor": (2, "AssignmentRelationship", "id-r1", "id-proc"),
+    }
+    assert set(graph.traverse("id-data", depth=1)) == {"id-data", "id-proc", "id-app"}
+
+
+def test_stats_excludes_folders_and_relations(graph):
+    assert graph.stats() == {"elements": 4, "relations": 3,
+                             "by_type": {"AccessRelationship": 2,
+                                         "AssignmentRelationship": 1}}
+
+
+def test_cli_impact_json(graph, tmp_path, capsys):
+    model_graph.main(["impact", "Customer Data", "--index", str(tmp_path / "index.sqlite"),
+                      "--no-refresh", "--depth", "1", "--json"])
+    out = capsys.readouterr().out
+    assert "id-proc" in out and "id-app" in out and "id-actor" not in out
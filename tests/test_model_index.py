@@ -0,0 +1,59 @@
+"""Index SQLite model: refresh inkremental dan hasil yang sama dengan parse langsung"""
+
+import os
+import shutil
+
+import pytest
+
+import export_png as ex
+from conftest import REPO_MODEL
+from model_index import ModelIndex, iter_element_files, parse_element_file
+
+
+@pytest.fixture
+def model(tmp_path):
+    folder = str(tmp_path / "model")
+    shutil.copytree(REPO_MODEL, folder)
+    return folder
+
+
+def test_refresh_matches_direct_parse(model, tmp_path):
+    with ModelIndex(str(tmp_path / "index.sqlite")) as idx:
+        rows, stats = idx.refresh(model)
+        files = list(iter_element_files(model))
+        assert stats == {"cached": 0, "parsed": len(files), "removed": 0}
+        for rel, path, _ in files:
+            assert rows[rel] == parse_element_file(path) + (None,)
+        assert idx.verify(model) == []
+
+
+def test_refresh_reparses_only_changed_files(model, tmp_path):
+    db = str(tmp_path / "index.sqlite")
+    with ModelIndex(db) as idx:
+        idx.refresh(model)
+    files = list(iter_element_files(model))
+    changed, removed = files[1][1], files[2][1]
+    with open(changed, encoding="utf-8") as f:
+        text = f.read()
+    with open(changed, "w", encoding="utf-8") as f:
+        f.write(text.replace('name="', 'name="Renamed ', 1))
+    os.remove(removed)
+    with open(os.path.join(model, "business", "Broken_x.xml"), "w", encoding="utf-8") as f:
+        f.write("<archimate:BusinessActor")
+
+    # Koneksi baru: index persisten dibaca ulang dari file
+    with ModelIndex(db) as idx:
+        rows, stats = idx.refresh(model)
+        assert stats == {"cached": len(files) - 2, "parsed": 2, "removed": 1}
+        assert rows[files[1][0]][2].startswith("Renamed ")
+        assert rows["business/Broken_x.xml"][-1]
+        assert idx.verify(model) == []
+
+
+def test_indexed_elements_match_plain_loader(model, tmp_path, capsys):
+    plain = ex.load_elements(model)
+    indexed = ex.load_elements_indexed(model, str(tmp_path / "index.sqlite"))
+    assert indexed == plain
+    # Run kedua dari cache menghasilkan elements_map yang sama
+    assert ex.load_elements_indexed(model, str(tmp_path / "index.sqlite")) == plain
+    assert "0 di-parse ulang" in capsys.readouterr().out
@@ -0,0 +1,62 @@
+"""DiagramServer: refresh model jalan di thread, request menunggu model yang konsisten"""
+
+import asyncio
+import contextlib
+import io
+import re
+import shutil
+import threading
+
+import export_png as ex
+import serve_diagrams as sd
+from conftest import REPO_MODEL
+
+
+def test_refresh_runs_off_loop_and_serializes_requests(tmp_path):
+    model = str(tmp_path / "model")
+    shutil.copytree(REPO_MODEL, model)
+    elements_map = ex.load_elements(model)
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = sd.DiagramServer(model, elements_map, jobs=1)
+    did, path = next((did, p) for did, p in sorted(server.ids.items())
+                     if server.session.deps[p] and len(server.session.deps[p]) > 1)
+    element = next(elements_map[ref]["path"] for ref in
+                   ex.referenced_elements(server.session.diagrams[path], elements_map))
+    target = f"/diagrams/{did}.svg"
+
+    refresh, threads, release = server.refresh, [], threading.Event()
+
+    def slow_refresh(changed):
+        threads.append(threading.current_thread())
+        release.wait(5)
+        refresh(changed)
+
+    server.refresh = slow_refresh
+
+    async def scenario():
+        status, headers, body = await server.route("GET", target, {})
+        assert status == 200 and body.startswith(b"<")
+        with open(element, encoding="utf-8") as f:
+            text = f.read()
+        with open(element, "w", encoding="utf-8") as f:
+            f.write(re.sub(r'name="([^"]*)"', r'name="\1 (baru)"', text, count=1))
+
+        applying = asyncio.create_task(server.apply_changes([element]))
+        await asyncio.sleep(0.05)
+        request = asyncio.create_task(server.route("GET", target, {}))
+        # Loop tidak terblokir refresh, tapi request menunggu sampai refresh selesai
+        await asyncio.sleep(0.05)
+        assert threads and threads[0] is not threading.main_thread()
+        assert not request.done()
+        release.set()
+        await applying
+        return headers, await request
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            before, (status, after, body) = asyncio.run(scenario())
+    finally:
+        server.close()
+    assert status == 200
+    assert after["ETag"] != before["ETag"]
+    assert b"(baru)" in body
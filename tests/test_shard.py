@@ -0,0 +1,57 @@
+"""--shard i/N: pembagian LPT dan merge_exports harus sama dengan export penuh"""
+
+import os
+import re
+
+import export_png as ex
+import merge_exports
+from conftest import diagram_files, output_digests, run_export
+
+
+def test_shard_paths_partition_is_complete_and_balanced(synthetic_model):
+    paths = diagram_files(synthetic_model)
+    costs = {p: float(i + 1) for i, p in enumerate(paths)}
+    parts = [ex.shard_paths(paths, costs, i, 3)[0] for i in (1, 2, 3)]
+    assert sorted(p for part in parts for p in part) == sorted(paths)
+    assert sum(len(part) for part in parts) == len(paths)
+
+    _, loads = ex.shard_paths(paths, costs, 1, 3)
+    assert loads == [sum(costs[p] for p in part) for part in parts]
+    # LPT: selisih shard terberat dan teringan tidak lebih dari satu diagram terberat
+    assert max(loads) - min(loads) <= max(costs.values())
+
+
+def test_shards_merge_to_full_export(synthetic_model, tmp_path, monkeypatch, capsys):
+    full = str(tmp_path / "full")
+    run_export(synthetic_model, full, monkeypatch, capsys)
+    shards = []
+    for i in (1, 2):
+        folder = str(tmp_path / f"shard{i}")
+        run_export(synthetic_model, folder, monkeypatch, capsys, "--shard", f"{i}/2")
+        shards.append(folder)
+        # Waktu render shard hanya di manifest; file times ditulis saat merge
+        assert not os.path.exists(os.path.join(folder, "times.json"))
+        assert ex.load_manifest(folder)["times"]
+
+    times = str(tmp_path / "times.json")
+    merged = str(tmp_path / "merged")
+    copied, problems = merge_exports.merge(merge_exports.read_shards(shards), merged,
+                                           times_path=times)
+    assert not problems
+    assert copied == len(output_digests(full))
+    assert output_digests(merged) == output_digests(full)
+    assert ex.load_manifest(merged)["outputs"] == ex.load_manifest(full)["outputs"]
+    assert len(ex.load_render_times(times)) == len(diagram_files(synthetic_model))
+
+    # Manifest gabungan dipakai run --incremental berikutnya: tidak ada yang di-render
+    log = run_export(synthetic_model, merged, monkeypatch, capsys, "--incremental")
+    assert re.search(r"Selesai! 0/\d+ diagram di-export", log)
+
+
+def test_merge_refuses_missing_shard(synthetic_model, tmp_path, monkeypatch, capsys):
+    folder = str(tmp_path / "shard1")
+    run_export(synthetic_model, folder, monkeypatch, capsys, "--shard", "1/2")
+    merged = str(tmp_path / "merged")
+    copied, problems = merge_exports.merge(merge_exports.read_shards([folder]), merged)
+    assert copied == 0 and problems
+    assert not os.path.exists(merged)
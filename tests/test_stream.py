@@ -0,0 +1,95 @@
+"""stream_diagram (iterparse) harus menghasilkan node/koneksi yang sama dengan collect_all (DOM)"""
+
+import contextlib
+import io
+import re
+import shutil
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import export_png as ex
+from conftest import REPO_MODEL, diagram_files
+
+NS = ('xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+      'xmlns:archimate="http://www.archimatetool.com/archimate"')
+
+
+def _nodes(nodes):
+    return [tuple(getattr(n, k) for k in ex.Node.__slots__) for n in nodes]
+
+
+def _connections(connections):
+    return [tuple(getattr(c, k) for k in ex.Connection.__slots__) for c in connections]
+
+
+def assert_same(source, elements_map):
+    data = source if isinstance(source, bytes) else open(source, "rb").read()
+    root = ET.fromstring(data)
+    nodes, connections = ex.collect_all(root, elements_map)
+    streamed = ex.stream_diagram(io.BytesIO(data), elements_map)
+    assert streamed.attrib == dict(root.attrib)
+    assert _nodes(streamed.nodes) == _nodes(nodes)
+    assert _connections(streamed.connections) == _connections(connections)
+    return nodes
+
+
+@pytest.mark.parametrize("model", ["repo", "synthetic"])
+def test_stream_matches_dom(model, synthetic_model):
+    folder = REPO_MODEL if model == "repo" else synthetic_model
+    elements_map = ex.load_elements(folder)
+    paths = diagram_files(folder)
+    assert paths
+    total = sum(len(assert_same(path, elements_map)) for path in paths)
+    assert total > 0
+
+
+def _nested(depth):
+    """Group bersarang `depth` tingkat; di level ganjil <bounds> ditulis setelah anaknya"""
+    parts = [f'<archimate:ArchimateDiagramModel {NS} name="Deep" id="d">']
+    for i in range(depth):
+        parts.append(f'<children xsi:type="archimate:DiagramModelGroup" id="g{i}" name="G{i}">')
+        if i % 2 == 0:
+            parts.append(f'<bounds x="{i % 7}" y="1" width="40" height="20"/>')
+        if i and i % 3 == 0:
+            parts.append(f'<sourceConnections xsi:type="archimate:Connection" '
+                         f'id="c{i}" source="g{i}" target="g{i - 1}"/>')
+    for i in reversed(range(depth)):
+        if i % 2:
+            parts.append(f'<bounds x="2" y="{i % 5}" width="30" height="10"/>')
+        parts.append("</children>")
+    parts.append("</archimate:ArchimateDiagramModel>")
+    return "".join(parts).encode("utf-8")
+
+
+def test_stream_deep_nesting():
+    # Lebih dalam dari recursion limit default — keduanya harus iteratif
+    nodes = assert_same(_nested(5000), {})
+    assert len(nodes) == 5000
+    assert nodes[-1].x == sum(i % 7 if i % 2 == 0 else 2 for i in range(5000))
+
+
+def test_watch_session_streams_and_refreshes_labels(tmp_path, monkeypatch):
+    # Semua diagram dianggap "besar" → WatchSession menyimpan StreamedDiagram
+    monkeypatch.setattr(ex, "STREAM_AUTO_BYTES", 0)
+    model = str(tmp_path / "model")
+    shutil.copytree(REPO_MODEL, model)
+    elements_map = ex.load_elements(model)
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = ex.WatchSession(model, str(tmp_path), elements_map, {"outputs": {}}, {})
+    assert all(isinstance(d, ex.StreamedDiagram) for d in session.diagrams.values())
+
+    path, diagram = next((p, d) for p, d in sorted(session.diagrams.items()) if d.nodes)
+    ref = next(n.ref for n in diagram.nodes if n.ref)
+    element = elements_map[ref]["path"]
+    with open(element, encoding="utf-8") as f:
+        text = f.read()
+    with open(element, "w", encoding="utf-8") as f:
+        f.write(re.sub(r'name="([^"]*)"', r'name="\1 (baru)"', text, count=1))
+
+    # Label StreamedDiagram dihitung saat parse, jadi diagramnya harus di-parse ulang
+    with contextlib.redirect_stdout(io.StringIO()):
+        affected = session.apply([element])
+        session.render(affected, [element])
+    assert path in affected
+    assert any(n.label.endswith("(baru)") for n in session.diagrams[path].nodes)
@@ -0,0 +1,94 @@
+"""Resolusi style theme: tipe persis/terkandung, default, extends dan overrides"""
+
+import json
+
+import pytest
+
+import export_png as ex
+
+THEMES = {
+    "default": "base",
+    "themes": {
+        "base": {
+            "element_default": {"fill": "#111111", "border": "#222222"},
+            "elements": [
+                {"types": ["BusinessActor"], "fill": "#AAAAAA"},
+                {"types": ["Service"], "fill": "#BBBBBB", "border": "#000000"},
+            ],
+            "relationship_default": {"color": "#333333"},
+            "relationships": {"AccessRelationship": {"dash": "dashed", "target": "arrow_open"}},
+            "overrides": {
+                "id-elem": {"fill": "#FF0000"},
+                "obj-7": {"border": "#00FF00"},
+                "id-rel": {"dash": "solid"},
+            },
+        },
+        "child": {
+            "extends": "base",
+            "elements": [{"types": ["BusinessActor"], "fill": "#CCCCCC"}],
+            "relationships": {"AccessRelationship": {"color": "#444444"}},
+        },
+        "loop1": {"extends": "loop2"},
+        "loop2": {"extends": "loop1"},
+        "bad": {"relationships": {"FlowRelationship": {"target": "star"}}},
+    },
+}
+
+
+@pytest.fixture
+def themes_path(tmp_path):
+    path = tmp_path / "themes.json"
+    path.write_text(json.dumps(THEMES), encoding="utf-8")
+    return str(path)
+
+
+def node(type, id="obj-1", ref=""):
+    return ex.Node(id, 0, 0, 10, 10, "x", type, "archimate:DiagramModelArchimateObject", ref)
+
+
+def test_element_style_resolution(themes_path):
+    theme = ex.load_theme(None, themes_path)
+    assert theme.name == "base"
+    # Persis (border dari element_default), dengan prefix xsi, terkandung, default
+    assert theme.element_style("BusinessActor") == ("#AAAAAA", "#222222")
+    assert theme.element_style("archimate:BusinessActor") == ("#AAAAAA", "#222222")
+    assert theme.element_style("ApplicationService") == ("#BBBBBB", "#000000")
+    assert theme.element_style("Node") == ("#111111", "#222222")
+
+
+def test_relationship_style_resolution(themes_path):
+    theme = ex.load_theme("base", themes_path)
+    assert theme.relationship_style("archimate:AccessRelationship") == (
+        "#333333", True, None, ex.draw_arrow_open)
+    assert theme.relationship_style("FlowRelationship") == ("#333333", False, None, None)
+
+
+def test_extends_overrides_parent_per_key(themes_path):
+    theme = ex.load_theme("child", themes_path)
+    assert theme.element_style("BusinessActor") == ("#CCCCCC", "#222222")
+    assert theme.element_style("BusinessService") == ("#BBBBBB", "#000000")
+    # Warna dari anak, dash + simbol tetap dari induk
+    assert theme.relationship_style("AccessRelationship") == (
+        "#444444", True, None, ex.draw_arrow_open)
+    assert theme.digest != ex.load_theme("base", themes_path).digest
+
+
+def test_overrides_by_model_ref_and_diagram_id(themes_path):
+    theme = ex.load_theme("child", themes_path)
+    assert theme.node_style(node("BusinessActor", ref="id-elem")) == ("#FF0000", "#222222")
+    assert theme.node_style(node("Node", id="obj-7")) == ("#111111", "#00FF00")
+    assert theme.node_style(node("BusinessActor")) == ("#CCCCCC", "#222222")
+    conn = ex.Connection("a", "b", "AccessRelationship", "c-1", "id-rel")
+    assert theme.connection_style(conn) == ("#444444", False, None, ex.draw_arrow_open)
+
+
+@pytest.mark.parametrize("name", ["loop1", "bad", "missing"])
+def test_invalid_theme_is_rejected(themes_path, name):
+    with pytest.raises(ValueError):
+        ex.load_theme(name, themes_path)
+
+
+def test_repo_themes_load():
+    themes = ex.read_themes()
+    for name in themes["themes"]:
+        assert ex.load_theme(name).element_style("BusinessActor")
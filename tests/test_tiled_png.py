@@ -0,0 +1,55 @@
+"""PNG per band (save_tiled_png) harus sama piksel-per-piksel dengan render di memori"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import export_png as ex
+from conftest import diagram_files
+
+
+@pytest.fixture(scope="module")
+def rendered(synthetic_model):
+    elements_map = ex.load_elements(synthetic_model)
+    path = diagram_files(synthetic_model)[0]
+    diagram = ex.load_diagram(path)
+    fonts = ex.load_fonts()
+    return diagram, elements_map, fonts, ex.render_bytes(diagram, elements_map, fonts, "png")
+
+
+def _pixels(data):
+    img = Image.open(io.BytesIO(data))
+    return img.size, img.convert("RGB").tobytes()
+
+
+@pytest.mark.parametrize("tile_size", [1, 37, 256, 1 << 20])
+def test_tiled_matches_in_memory(rendered, tile_size):
+    diagram, elements_map, fonts, full = rendered
+    tiled = ex.render_bytes(diagram, elements_map, fonts, "png", tile_size=tile_size)
+    assert _pixels(tiled) == _pixels(full)
+
+
+def test_tiled_viewport_matches_in_memory(rendered):
+    diagram, elements_map, fonts, _ = rendered
+    viewport = (40, 40, 300, 200)
+    full = ex.render_bytes(diagram, elements_map, fonts, "png", viewport=viewport)
+    tiled = ex.render_bytes(diagram, elements_map, fonts, "png", viewport=viewport,
+                            tile_size=64)
+    assert _pixels(tiled) == _pixels(full)
+
+
+def test_tiled_skips_identical_output(rendered, tmp_path):
+    diagram, elements_map, fonts, _ = rendered
+    out = str(tmp_path / "view.png")
+    variants = ex.parse_variants("thumb=64px")
+    first, second = {}, {}
+    assert ex.draw_diagram(diagram, elements_map, out, *fonts, tile_size=37, variants=variants,
+                           stats=first)
+    mtime = os.stat(out).st_mtime_ns
+    assert ex.draw_diagram(diagram, elements_map, out, *fonts, tile_size=37, variants=variants,
+                           stats=second)
+    assert first["written"] and second["written"] is False
+    assert os.stat(out).st_mtime_ns == mtime
+    assert sorted(os.listdir(tmp_path)) == ["view.png", "view@thumb.png"]